@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from typing import List
+from services.data_service import LapTable
+
+# --- 합성 세션 파라미터 ---
+
+# 컴파운드별 (기준 랩 타임 대비 속도 이점(초), 랩당 성능 저하(초))
+COMPOUND_PROFILES = {
+    "SOFT": (-0.6, 0.12),
+    "MEDIUM": (0.0, 0.07),
+    "HARD": (0.4, 0.04),
+}
+PIT_LANE_SECONDS = 20.0
+SC_SLOWDOWN_SECONDS = 25.0
+VSC_SLOWDOWN_SECONDS = 15.0
+LAP_TIME_NOISE = 0.3
+
+
+def _driver_ids(n_drivers: int) -> List[str]:
+    return [f"D{i:02d}" for i in range(n_drivers)]
+
+
+def make_lap_table(
+    seed: int = 0,
+    n_drivers: int = 20,
+    total_laps: int = None,
+    year: int = 2024,
+    race_id: str = "1"
+) -> LapTable:
+    """
+    실제 세션과 같은 모양의 합성 랩 테이블을 만듭니다 (data_service.build_lap_table과 같은 컬럼/타입).
+    - 드라이버 20명, 50~78랩, 1~3스톱의 혼합 컴파운드 전략
+    - SC/VSC 구간 (TrackStatus '4'/'6'), 피트 인/아웃 랩, 일부 드라이버 리타이어
+    """
+    rng = np.random.default_rng(seed)
+    if total_laps is None:
+        total_laps = int(rng.integers(50, 79))
+    base_lap_time = float(rng.uniform(78.0, 98.0))
+
+    # 경기 전체에 공통인 SC/VSC 구간
+    track_status = np.full(total_laps + 1, "1", dtype=object)
+    for code, length in (("4", int(rng.integers(3, 6))), ("6", int(rng.integers(1, 3)))):
+        if rng.random() < 0.7:
+            start = int(rng.integers(5, total_laps - length))
+            track_status[start:start + length] = code
+
+    frames = []
+    for driver in _driver_ids(n_drivers):
+        # 리타이어한 드라이버는 경기 도중에 기록이 끝남
+        last_lap = total_laps if rng.random() > 0.1 else int(rng.integers(total_laps // 3, total_laps))
+        stops = int(rng.integers(1, 4))
+        pit_laps = np.sort(rng.choice(np.arange(8, total_laps - 5), size=stops, replace=False)) + 1
+        compounds = rng.choice(list(COMPOUND_PROFILES), size=stops + 1)
+
+        laps = np.arange(1, last_lap + 1)
+        stint = np.searchsorted(pit_laps, laps, side="right")        # 0부터 시작, 피트 아웃 랩부터 새 스틴트
+        stint_start = np.concatenate([[1], pit_laps])[stint]
+        tyre_life = (laps - stint_start + 1).astype(np.float64)
+        compound = compounds[stint]
+
+        offset = np.array([COMPOUND_PROFILES[c][0] for c in compound])
+        degradation = np.array([COMPOUND_PROFILES[c][1] for c in compound])
+        status = track_status[laps]
+        lap_time = (
+            base_lap_time + offset + degradation * tyre_life
+            - 0.03 * (laps - 1)                                          # 연료 감소 효과
+            + rng.normal(0.0, LAP_TIME_NOISE, size=laps.size)
+            + np.where(status == "4", SC_SLOWDOWN_SECONDS, 0.0)
+            + np.where(status == "6", VSC_SLOWDOWN_SECONDS, 0.0)
+        )
+
+        is_pit_in = np.isin(laps + 1, pit_laps)
+        is_pit_out = np.isin(laps, pit_laps)
+        lap_time += np.where(is_pit_in | is_pit_out, PIT_LANE_SECONDS / 2, 0.0)
+        lap_time[0] = np.nan                                             # 첫 랩은 기록이 없는 경우가 많음
+        session_time = np.nancumsum(lap_time) + base_lap_time
+
+        frames.append(pd.DataFrame({
+            "Driver": driver,
+            "LapNumber": laps.astype(np.float64),
+            "Compound": compound,
+            "TyreLife": tyre_life,
+            "Stint": (stint + 1).astype(np.float64),
+            "PitInTime": np.where(is_pit_in, session_time, np.nan),
+            "PitOutTime": np.where(is_pit_out, session_time - lap_time, np.nan),
+            "TrackStatus": status,
+            "IsAccurate": (status == "1") & ~is_pit_in & ~is_pit_out & ~np.isnan(lap_time),
+            "LapTimeSeconds": lap_time,
+        }))
+
+    laps = pd.concat(frames, ignore_index=True)
+    for column in ("Driver", "Compound", "TrackStatus"):
+        laps[column] = laps[column].astype("category")
+
+    return LapTable(year=year, race_id=str(race_id), laps=laps, drivers=_driver_ids(n_drivers))
+
+
+def make_scenarios(n_scenarios: int = 10) -> List[dict]:
+    """ 1~3스톱 시나리오 요청 목록 (SimulationRequest.scenarios 형식) """
+    patterns = [
+        ["SOFT", "HARD"], ["MEDIUM", "HARD"], ["SOFT", "MEDIUM"], ["HARD", "MEDIUM"],
+        ["SOFT", "MEDIUM", "HARD"], ["MEDIUM", "HARD", "SOFT"], ["SOFT", "SOFT", "HARD"],
+        ["MEDIUM", "MEDIUM", "SOFT"], ["SOFT", "MEDIUM", "MEDIUM", "SOFT"], ["HARD", "HARD", "SOFT", "SOFT"],
+    ]
+    return [
+        {
+            "name": f"{'-'.join(c[0] for c in pattern)} #{i}",
+            "stints": [{"compound": c} for c in pattern],
+        }
+        for i, pattern in enumerate(patterns[i % len(patterns)] for i in range(n_scenarios))
+    ]
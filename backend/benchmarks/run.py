@@ -0,0 +1,210 @@
+"""
+시뮬레이션 핫 패스 벤치마크 (네트워크/FastF1 다운로드 없이 합성 세션으로 실행)
+
+사용법 (backend 디렉토리에서):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.25
+
+--baseline을 주면 각 항목의 최솟값을 기준 결과와 비교하여,
+threshold(비율)보다 느려진 항목이 하나라도 있으면 종료 코드 1로 끝납니다.
+"""
+import os
+import shutil
+import tempfile
+
+# 앱 모듈을 import 하기 전에 설정: 임시 캐시 디렉토리, 시작 시 워밍업(네트워크) 끔
+_TEMP_CACHE_DIR = None
+if not os.getenv("F1SIM_CACHE_DIR"):
+    _TEMP_CACHE_DIR = tempfile.mkdtemp(prefix="f1sim-bench-")
+    os.environ["F1SIM_CACHE_DIR"] = _TEMP_CACHE_DIR
+os.environ.setdefault("F1SIM_WARMUP_RECENT_RACES", "0")
+os.environ.setdefault("F1SIM_CPU_WORKERS", "1")
+
+import argparse
+import itertools
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+from models.simulation import FieldSimulationRequest, Scenario, SimulationRequest
+from core import derived_store, encoding
+from services import degradation, lap_engine, simulation_service, strategy_optimizer
+from benchmarks.fixtures import make_lap_table, make_scenarios
+
+BENCH_YEAR = 2024
+BENCH_RACE_ID = "1"
+BENCH_DRIVER = "D00"
+PIT_LOSS_SECONDS = 22.0
+
+# 기본 회귀 허용 비율 (기준 대비 25% 이상 느려지면 실패)
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 2) -> Dict[str, float]:
+    """ fn을 repeat번 실행한 시간(초)의 중앙값/최솟값 """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "runs": repeat,
+    }
+
+
+def build_cases(seed: int) -> Tuple[List[Tuple[str, Callable[[], object], int]], dict]:
+    """
+    측정 항목 (이름, 측정할 함수, 반복 횟수 배율) 목록과 종단 간 측정용 요청 본문.
+    합성 세션은 임시 캐시 디렉토리의 저장소에 기록해 둡니다.
+    """
+    lap_table = make_lap_table(seed=seed, year=BENCH_YEAR, race_id=BENCH_RACE_ID)
+    derived_store.write_lap_table(BENCH_YEAR, BENCH_RACE_ID, lap_table.laps, {"drivers": lap_table.drivers})
+
+    laps = lap_table.laps
+    driver_laps = lap_table.pick_driver(BENCH_DRIVER)
+    total_laps = int(driver_laps['LapNumber'].max())
+    base_lap_time = float(driver_laps['LapTimeSeconds'].dropna().min())
+    degradation_model = simulation_service.model_tire_degradation(driver_laps)
+
+    scenario_dicts = make_scenarios(10)
+    scenarios = [Scenario(**s) for s in scenario_dicts]
+    request_body = {
+        "year": BENCH_YEAR,
+        "raceId": BENCH_RACE_ID,
+        "driverId": BENCH_DRIVER,
+        "pitLossSeconds": PIT_LOSS_SECONDS,
+        "scenarios": scenario_dicts,
+        "optimize": True,
+    }
+    request = SimulationRequest(**request_body)
+    response = simulation_service.simulate_driver(lap_table, request)
+    field_request = FieldSimulationRequest(year=BENCH_YEAR, raceId=BENCH_RACE_ID, pitLossSeconds=PIT_LOSS_SECONDS)
+
+    return [
+        ("simulate_strategy", lambda: simulation_service._simulate_strategy(
+            scenarios[0], total_laps, base_lap_time, degradation_model, PIT_LOSS_SECONDS), 20),
+        ("simulate_scenarios_10", lambda: lap_engine.simulate_scenarios(
+            scenarios, total_laps, base_lap_time, degradation_model, PIT_LOSS_SECONDS), 10),
+        ("optimize_strategy", lambda: strategy_optimizer.optimize_strategy(
+            total_laps, base_lap_time, degradation_model, PIT_LOSS_SECONDS, max_stops=2), 5),
+        ("model_tire_degradation", lambda: simulation_service.model_tire_degradation(driver_laps), 10),
+        ("fit_degradation_session", lambda: degradation.fit_degradation_table(laps), 5),
+        ("get_actual_strategy", lambda: simulation_service.get_actual_strategy(driver_laps), 10),
+        ("get_actual_strategies_session", lambda: simulation_service.get_actual_strategies(laps), 5),
+        ("simulate_driver", lambda: simulation_service.simulate_driver(lap_table, request), 5),
+        ("simulate_field", lambda: simulation_service.run_field_simulation(field_request), 5),
+        ("serialize_json", lambda: encoding.encode_response(response, encoding.JSON), 20),
+        ("serialize_msgpack", lambda: encoding.encode_response(response, encoding.MSGPACK), 20),
+        ("serialize_arrow", lambda: encoding.encode_response(response, encoding.ARROW), 20),
+    ], request_body
+
+
+def run_e2e(request_body: dict, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    ASGI 테스트 클라이언트로 POST /api/simulate 전체 경로(라우터, 프로세스 풀, 직렬화)를 측정.
+    결과 캐시에 걸리지 않도록 호출마다 피트 손실 시간을 조금씩 바꾸고, 캐시 적중 경로는 따로 측정합니다.
+    """
+    from fastapi.testclient import TestClient
+    import main
+
+    calls = itertools.count(1)
+    results = {}
+    with TestClient(main.app) as client:
+        def post(headers=None, fresh=True):
+            body = request_body
+            if fresh:
+                body = {**request_body, "pitLossSeconds": request_body["pitLossSeconds"] + next(calls) * 1e-6}
+            response = client.post("/api/simulate", json=body, headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/simulate 실패: {response.status_code} {response.text}")
+
+        results["e2e_simulate_json"] = measure(post, repeat)
+        results["e2e_simulate_msgpack"] = measure(lambda: post({"Accept": encoding.MSGPACK}), repeat)
+        results["e2e_simulate_cached_json"] = measure(lambda: post(fresh=False), repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    기준보다 threshold 이상 느려진 항목의 설명 목록.
+    잡음(다른 프로세스, CPU 클럭 변화)의 영향이 적은 최솟값으로 비교합니다.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["min"] <= 0:
+            continue
+        ratio = current["min"] / previous["min"]
+        if ratio > 1.0 + threshold:
+            regressions.append(
+                f"{name}: {previous['min'] * 1e3:.3f} ms -> {current['min'] * 1e3:.3f} ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="F1 시뮬레이터 핫 패스 벤치마크")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="허용 회귀 비율 (기본 0.25)")
+    parser.add_argument("--repeat", type=int, default=5, help="기본 반복 횟수 (항목별 배율을 곱함)")
+    parser.add_argument("--seed", type=int, default=0, help="합성 세션 난수 시드")
+    parser.add_argument("--no-e2e", action="store_true", help="ASGI 종단 간 측정 생략")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    cases, request_body = build_cases(args.seed)
+    results = {}
+    for name, fn, scale in cases:
+        results[name] = measure(fn, args.repeat * scale)
+        print(f"{name:32s} {results[name]['median'] * 1e3:10.3f} ms")
+
+    if not args.no_e2e:
+        for name, result in run_e2e(request_body, args.repeat * 4).items():
+            results[name] = result
+            print(f"{name:32s} {result['median'] * 1e3:10.3f} ms")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        exit_code = 1 if regressions else 0
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    try:
+        code = main()
+    finally:
+        if _TEMP_CACHE_DIR:
+            shutil.rmtree(_TEMP_CACHE_DIR, ignore_errors=True)
+    sys.exit(code)
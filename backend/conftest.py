@@ -0,0 +1,2 @@
+# 앱은 backend 디렉토리를 기준으로 import 하므로 (models, services, core ...),
+# 이 파일이 있는 디렉토리를 pytest가 sys.path에 추가하도록 둡니다 (어느 위치에서 실행해도 같은 경로).
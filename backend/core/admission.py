@@ -0,0 +1,161 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from core import metrics
+
+# --- 승인 제어 설정 (환경 변수로 조절) ---
+# 콜드 로드: 저장소에 랩 테이블이 없어 FastF1 세션을 로드(다운로드)해야 하는 요청
+COLD_CONCURRENCY = int(os.getenv("F1SIM_COLD_LOAD_CONCURRENCY", "2"))
+COLD_QUEUE_SIZE = int(os.getenv("F1SIM_COLD_LOAD_QUEUE", "16"))
+COLD_QUEUE_SECONDS = float(os.getenv("F1SIM_COLD_LOAD_QUEUE_SECONDS", "30"))
+# 웜 계산: 이미 준비된 랩 테이블로 시뮬레이션만 하는 요청 (기본값: CPU 코어 수의 2배)
+WARM_CONCURRENCY = int(os.getenv("F1SIM_WARM_CONCURRENCY", str(2 * (os.cpu_count() or 1))))
+WARM_QUEUE_SIZE = int(os.getenv("F1SIM_WARM_QUEUE", "64"))
+WARM_QUEUE_SECONDS = float(os.getenv("F1SIM_WARM_QUEUE_SECONDS", "5"))
+# Retry-After 헤더의 최댓값 (초)
+MAX_RETRY_AFTER_SECONDS = int(os.getenv("F1SIM_MAX_RETRY_AFTER_SECONDS", "60"))
+
+# 평균 처리 시간(지수 이동 평균)의 가중치
+_HOLD_EWMA_ALPHA = 0.2
+
+
+class AdmissionGate:
+    """
+    동시 실행 수를 limit으로 제한하는 승인 게이트 (이벤트 루프 안에서만 사용).
+    - 자리가 없으면 최대 max_queue개까지 먼저 온 순서대로 대기하며, queue_seconds 안에 자리가 나지 않으면 포기합니다.
+    - 대기열이 가득 찼거나 기한이 지나면 503과 Retry-After(예상 대기 시간)로 바로 응답합니다.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_seconds: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_seconds = queue_seconds
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._hold_seconds = None   # 슬롯 점유 시간의 이동 평균
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queueFull": 0, "deadline": 0}
+        _gates[name] = self
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self):
+        """ async with gate.slot(): ... 블록을 슬롯 하나를 점유한 채로 실행합니다. """
+        await self._acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(time.perf_counter() - start)
+            self._release()
+
+    async def _acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queueFull")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with metrics.stage(f"admission_{self.name}"):
+                await asyncio.wait_for(waiter, self.queue_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 슬롯을 넘겨받은 직후에 기한이 지났거나 취소됨: 다음 대기자에게 넘김
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._shed("deadline")
+        self.admitted += 1
+
+    def _release(self):
+        # 슬롯을 놓지 않고 대기 중인 다음 요청에게 그대로 넘김 (먼저 온 순서)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _observe(self, seconds: float):
+        if self._hold_seconds is None:
+            self._hold_seconds = seconds
+        else:
+            self._hold_seconds += _HOLD_EWMA_ALPHA * (seconds - self._hold_seconds)
+
+    def retry_after(self) -> int:
+        """ 지금 대기열 뒤에 선다면 자리가 날 때까지 걸릴 예상 시간 (초, 1 ~ MAX_RETRY_AFTER_SECONDS) """
+        hold = self._hold_seconds if self._hold_seconds is not None else 1.0
+        estimate = hold * (len(self._waiters) + 1) / self.limit
+        return min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(estimate)))
+
+    def _shed(self, reason: str):
+        self.shed[reason] += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name}: {reason}). Retry later.",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "inFlight": self.in_flight,
+            "queueLength": len(self._waiters),
+            "maxQueue": self.max_queue,
+            "queueSeconds": self.queue_seconds,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "retryAfterSeconds": self.retry_after(),
+        }
+
+
+# 이름 -> 게이트 (통계/메트릭 조회용)
+_gates: Dict[str, AdmissionGate] = {}
+
+# 콜드 로드(FastF1 세션 로드)와 웜 계산(시뮬레이션)은 서로 다른 예산을 사용하므로,
+# 아직 캐시되지 않은 레이스 요청이 몰려도 준비된 레이스의 요청은 그 뒤에 줄 서지 않습니다.
+cold_loads = AdmissionGate("coldLoad", COLD_CONCURRENCY, COLD_QUEUE_SIZE, COLD_QUEUE_SECONDS)
+warm_compute = AdmissionGate("warmCompute", WARM_CONCURRENCY, WARM_QUEUE_SIZE, WARM_QUEUE_SECONDS)
+
+
+def get_all_stats() -> Dict[str, dict]:
+    return {name: gate.stats() for name, gate in _gates.items()}
+
+
+class _AdmissionCollector:
+    """ 게이트 통계를 스크레이프 시점에 읽어 메트릭으로 변환합니다. """
+
+    def collect(self):
+        in_flight = GaugeMetricFamily("f1sim_admission_in_flight", "Requests holding an admission slot", labels=["gate"])
+        queue = GaugeMetricFamily("f1sim_admission_queue_length", "Requests waiting for an admission slot", labels=["gate"])
+        admitted = CounterMetricFamily("f1sim_admission_admitted", "Requests admitted", labels=["gate"])
+        shed = CounterMetricFamily("f1sim_admission_shed", "Requests rejected with 503", labels=["gate", "reason"])
+
+        for name, gate in _gates.items():
+            in_flight.add_metric([name], gate.in_flight)
+            queue.add_metric([name], gate.queue_length)
+            admitted.add_metric([name], gate.admitted)
+            for reason, count in gate.shed.items():
+                shed.add_metric([name, reason], count)
+
+        yield from (in_flight, queue, admitted, shed)
+
+
+REGISTRY.register(_AdmissionCollector())
@@ -1,80 +1,149 @@
-import fastf1 as ff1
 import os
 import logging
+import threading
+import time
 from pathlib import Path
+from core import metrics
+from core.cache_index import CacheIndex
 
-# 캐시 디렉토리 설정
-CACHE_DIR = Path(os.getcwd()).parent / ".cache" / "fastf1"
+# 캐시 디렉토리 설정 (F1SIM_CACHE_DIR로 다른 위치를 지정할 수 있음, 예: 벤치마크용 임시 디렉토리)
+CACHE_DIR = Path(os.getenv("F1SIM_CACHE_DIR") or Path(os.getcwd()).parent / ".cache" / "fastf1")
 CACHE_LIMIT_GB = 70  # 용량 제한을 70GB로 설정
+# 1이면 FastF1이 네트워크 요청 없이 캐시에 있는 데이터만 사용 (예: 기존 캐시로 오프라인 일괄 준비)
+FASTF1_OFFLINE = os.getenv("F1SIM_FASTF1_OFFLINE", "0") == "1"
 
-def setup_fast_f1_cache():
+# fastf1(pandas 포함)은 import에 1초 가까이 걸리므로 처음 필요할 때 불러옵니다.
+_fastf1 = None
+_fastf1_lock = threading.Lock()
+
+def get_fastf1():
     """
-    FastF1 캐시를 활성화합니다.
+    fastf1 모듈을 반환합니다. 처음 호출될 때 import 하고 캐시를 활성화하므로,
+    FastF1을 사용하는 코드는 항상 이 함수를 거쳐 캐시가 켜진 상태의 모듈을 받습니다.
     """
+    global _fastf1
+    if _fastf1 is None:
+        with _fastf1_lock:
+            if _fastf1 is None:
+                import fastf1
+                if _enable_cache(fastf1):
+                    # 미리 로드하지 않는 경우(F1SIM_PRELOAD=0)에도 처음 활성화된 시점을 준비 상태에 기록
+                    from core import lifecycle
+                    lifecycle.mark("fastf1Cache")
+                _fastf1 = fastf1
+    return _fastf1
+
+def _enable_cache(ff1) -> bool:
     try:
         if not CACHE_DIR.exists():
             CACHE_DIR.mkdir(parents=True, exist_ok=True)
             
         ff1.Cache.enable_cache(CACHE_DIR)
-        logging.info(f"FastF1 캐시 활성화. 경로: {CACHE_DIR}")
+        if FASTF1_OFFLINE:
+            ff1.Cache.offline_mode(True)
+        logging.info(f"FastF1 캐시 활성화. 경로: {CACHE_DIR}{' (오프라인)' if FASTF1_OFFLINE else ''}")
+        return True
     
     except Exception as e:
         logging.error(f"FastF1 캐시 설정 실패: {e}")
+        return False
 
-def get_dir_size(path: Path) -> int:
-    """디렉토리의 총 크기(바이트)를 계산합니다."""
-    total = 0
+def setup_fast_f1_cache():
+    """
+    FastF1 캐시를 활성화합니다. (fastf1을 미리 import 해 두는 용도로도 사용: 워커 프로세스 초기화, 시작 후 미리 로드)
+    """
+    get_fastf1()
+
+# 인덱스 기반 정리 기준: 사용량이 상한(high-water)을 넘으면 하한(low-water)까지 삭제
+CACHE_HIGH_WATER_RATIO = 1.0
+CACHE_LOW_WATER_RATIO = 0.9
+
+# 세션 디렉토리별 크기/마지막 접근 시간 인덱스 (FastF1 캐시 폴더 안에 함께 보관)
+cache_index = CacheIndex(CACHE_DIR, CACHE_DIR / "f1sim_cache_index.sqlite")
+
+def record_session_access(session):
+    """
+    FastF1 세션을 로드(다운로드 또는 캐시 읽기)한 뒤 호출합니다.
+    해당 세션 디렉토리의 크기와 접근 시간을 인덱스에 기록하고, 상한을 넘었으면 바로 정리합니다.
+    """
     try:
-        for entry in path.rglob('*'):
-            if entry.is_file():
-                total += entry.stat().st_size
+        # FastF1은 api_path의 '/static/' 접두어를 뺀 경로에 세션 파일을 저장함
+        session_dir = CACHE_DIR / session.api_path[len("/static/"):]
+        downloaded = cache_index.record(session_dir)
+        if downloaded > 0:
+            metrics.FASTF1_DOWNLOAD_BYTES.inc(downloaded)
+        evict_fast_f1_cache()
     except Exception as e:
-        logging.error(f"크기 계산 중 오류: {e}")
+        logging.error(f"캐시 인덱스 갱신 실패: {e}")
+
+# 인덱스에 없는 파일(HTTP 캐시 DB, 인덱스 DB, derived 저장소)의 크기를 다시 계산하는 간격 (초)
+UNINDEXED_SCAN_SECONDS = float(os.getenv("F1SIM_CACHE_UNINDEXED_SCAN_SECONDS", "300"))
+_unindexed = {"bytes": 0, "scannedAt": None}
+_unindexed_lock = threading.Lock()
+
+def _tree_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.stat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
     return total
 
+def unindexed_bytes(max_age: float = UNINDEXED_SCAN_SECONDS) -> int:
+    """
+    캐시 디렉토리에서 세션 인덱스가 추적하지 않는 파일의 크기:
+    최상위 파일(FastF1 HTTP 캐시 fastf1_http_cache.sqlite, 캐시 인덱스 DB)과 derived 저장소(랩 테이블, 번들, 결과, what-if).
+    삭제 대상은 아니지만 용량 제한에 포함합니다. 디렉토리를 훑어야 하므로 max_age 동안은 이전 값을 사용합니다.
+    """
+    with _unindexed_lock:
+        scanned_at = _unindexed["scannedAt"]
+        if scanned_at is not None and time.monotonic() - scanned_at < max_age:
+            return _unindexed["bytes"]
+
+        total = 0
+        if CACHE_DIR.is_dir():
+            with os.scandir(CACHE_DIR) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        total += entry.stat().st_size
+            total += _tree_size(CACHE_DIR / "derived")
+        _unindexed.update(bytes=total, scannedAt=time.monotonic())
+        return total
+
+def evict_fast_f1_cache():
+    """ 전체 사용량(세션 인덱스 + 인덱스에 없는 파일)이 용량 상한을 넘었으면 오래 사용하지 않은 세션부터 삭제합니다. """
+    limit_bytes = CACHE_LIMIT_GB * 1024 * 1024 * 1024  # GB -> Bytes 변환
+    evicted_count, evicted_bytes = cache_index.evict(
+        high_water_bytes=int(limit_bytes * CACHE_HIGH_WATER_RATIO),
+        low_water_bytes=int(limit_bytes * CACHE_LOW_WATER_RATIO),
+        unindexed_bytes=unindexed_bytes(),
+    )
+    if evicted_count:
+        logging.info(f"캐시 정리 완료. 삭제된 세션: {evicted_count}개, 확보된 공간: {evicted_bytes / (1024**2):.2f} MB")
+
 def clear_fast_f1_cache():
     """
-    [변경] 캐시 용량이 95GB를 초과할 경우에만, 
-    오래된 파일부터 순차적으로 삭제하여 공간을 확보합니다.
+    [변경] 매일 실행되는 정리 작업.
+    파일 전체를 훑지 않고 인덱스의 사용량만 확인하여, 용량을 초과한 경우
+    마지막 접근이 오래된 세션부터 세션 단위로 삭제합니다.
+    (인덱스가 아직 없는 기존 캐시는 최초 1회만 전체를 스캔하여 등록합니다.)
     """
     try:
         logging.info("캐시 용량 점검 시작...")
-        
-        limit_bytes = CACHE_LIMIT_GB * 1024 * 1024 * 1024  # GB -> Bytes 변환
-        current_size = get_dir_size(CACHE_DIR)
-        
-        logging.info(f"현재 캐시 크기: {current_size / (1024**3):.2f} GB / 제한: {CACHE_LIMIT_GB} GB")
-
-        # 용량이 제한보다 작으면 아무것도 하지 않음
-        if current_size <= limit_bytes:
-            logging.info("용량이 충분합니다. 정리를 건너뜁니다.")
-            return
-
-        # 파일 목록을 가져와서 '수정 시간(mtime)' 순으로 정렬 (오래된 것이 맨 앞으로)
-        files = []
-        for entry in CACHE_DIR.rglob('*'):
-            if entry.is_file():
-                files.append((entry, entry.stat().st_mtime, entry.stat().st_size))
-        
-        files.sort(key=lambda x: x[1]) # 오래된 순 정렬
-
-        deleted_size = 0
-        deleted_count = 0
-
-        # 오래된 파일부터 하나씩 지움
-        for file_path, mtime, size in files:
-            if current_size <= limit_bytes:
-                break  # 용량이 확보되면 중단
-            
-            try:
-                file_path.unlink() # 파일 삭제
-                current_size -= size
-                deleted_size += size
-                deleted_count += 1
-            except Exception as e:
-                logging.error(f"파일 삭제 실패 {file_path}: {e}")
-
-        logging.info(f"정리 완료. 삭제된 파일: {deleted_count}개, 확보된 공간: {deleted_size / (1024**2):.2f} MB")
+
+        if not cache_index.is_initialized():
+            cache_index.rebuild()
+
+        session_size = cache_index.total_bytes()
+        other_size = unindexed_bytes(max_age=0)
+        logging.info(
+            f"현재 캐시 크기: {(session_size + other_size) / (1024**3):.2f} GB "
+            f"(세션 {session_size / (1024**3):.2f} GB, 기타 {other_size / (1024**3):.2f} GB) / 제한: {CACHE_LIMIT_GB} GB"
+        )
+
+        evict_fast_f1_cache()
 
     except Exception as e:
         logging.error(f"FastF1 캐시 정리 실패: {e}")
\ No newline at end of file
@@ -0,0 +1,183 @@
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator, Tuple
+
+
+class CacheIndex:
+    """
+    FastF1 캐시의 세션 디렉토리별 크기와 마지막 접근 시간을 기록하는 SQLite 인덱스.
+    전체 디렉토리를 훑지 않고도 현재 사용량을 알 수 있고,
+    가장 오래 접근하지 않은 세션부터 세션 단위로 삭제할 수 있습니다 (삭제하는 항목 수에 비례하는 비용).
+    여러 워커 프로세스가 같은 파일을 공유합니다 (WAL 모드).
+    """
+
+    def __init__(self, root: Path, db_path: Path):
+        self.root = root
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,       -- 캐시 루트 기준 세션 디렉토리 상대 경로
+                size INTEGER NOT NULL,       -- 바이트
+                last_access REAL NOT NULL    -- UNIX 시간
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('total_bytes', 0);
+        """)
+        return conn
+
+    @staticmethod
+    def _session_size(session_dir: Path) -> int:
+        """ 세션 디렉토리 하나의 크기 (하위 폴더 없이 파일 몇 개뿐이므로 저렴함) """
+        total = 0
+        with os.scandir(session_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    total += entry.stat().st_size
+        return total
+
+    def record(self, session_dir: Path, accessed_at: float = None) -> int:
+        """
+        세션이 새로 쓰이거나 다시 읽혔을 때 크기와 접근 시간을 갱신합니다.
+        반환값: 이전 기록 대비 늘어난 바이트 (새로 내려받은 데이터의 양)
+        """
+        if not session_dir.is_dir():
+            return 0
+        size = self._session_size(session_dir)
+        path = str(session_dir.relative_to(self.root))
+        accessed_at = accessed_at or time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT size FROM entries WHERE path = ?", (path,)).fetchone()
+            delta = size - (row[0] if row else 0)
+            conn.execute(
+                "INSERT INTO entries (path, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+                (path, size, accessed_at),
+            )
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (delta,))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return delta
+
+    def total_bytes(self) -> int:
+        conn = self._connect()
+        try:
+            return int(conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0])
+        finally:
+            conn.close()
+
+    def is_initialized(self) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone() is not None
+        finally:
+            conn.close()
+
+    def _iter_session_dirs(self) -> Iterator[Tuple[Path, float]]:
+        """ FastF1 캐시 파일(.ff1pkl)이 들어 있는 디렉토리와 그 안의 최신 수정 시간 """
+        for dirpath, _, filenames in os.walk(self.root):
+            mtimes = [
+                os.stat(os.path.join(dirpath, name)).st_mtime
+                for name in filenames if name.endswith(".ff1pkl")
+            ]
+            if mtimes:
+                yield Path(dirpath), max(mtimes)
+
+    def rebuild(self):
+        """
+        캐시 디렉토리 전체를 한 번 훑어 인덱스를 새로 만듭니다.
+        인덱스가 없던 기존 캐시를 처음 등록할 때만 사용합니다.
+        """
+        logging.info("캐시 인덱스 재구성 시작...")
+        rows = [
+            (str(session_dir.relative_to(self.root)), self._session_size(session_dir), mtime)
+            for session_dir, mtime in self._iter_session_dirs()
+        ]
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries")
+            conn.executemany("INSERT INTO entries (path, size, last_access) VALUES (?, ?, ?)", rows)
+            conn.execute(
+                "UPDATE meta SET value = (SELECT COALESCE(SUM(size), 0) FROM entries) WHERE key = 'total_bytes'"
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', ?)", (time.time(),))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        logging.info(f"캐시 인덱스 재구성 완료. 세션 {len(rows)}개 등록")
+
+    def _remove_empty_parents(self, path: Path):
+        """ 세션 삭제 후 비어 있는 상위 디렉토리(이벤트 폴더 등)를 정리합니다. """
+        parent = path.parent
+        while parent != self.root and self.root in parent.parents:
+            try:
+                parent.rmdir()  # 비어 있지 않으면 OSError
+            except OSError:
+                break
+            parent = parent.parent
+
+    def evict(self, high_water_bytes: int, low_water_bytes: int, unindexed_bytes: int = 0) -> Tuple[int, int]:
+        """
+        사용량이 high_water_bytes를 넘으면, 마지막 접근이 가장 오래된 세션부터
+        low_water_bytes 이하가 될 때까지 세션 디렉토리 단위로 삭제합니다.
+        unindexed_bytes: 같은 디렉토리에 있지만 인덱스에 없는(삭제 대상이 아닌) 파일의 크기. 사용량에 함께 계산합니다.
+        반환값: (삭제한 세션 수, 확보한 바이트)
+        """
+        # 대상 선정과 인덱스 삭제를 한 트랜잭션(쓰기 잠금)에서 처리: 여러 워커가 동시에 정리해도
+        # 같은 세션을 두 번 고르거나 total_bytes를 두 번 빼지 않음. 디렉토리 삭제는 커밋 후에 진행
+        conn = self._connect()
+        victims = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                total = int(conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0])
+                total += unindexed_bytes
+                if total > high_water_bytes:
+                    freed = 0
+                    # last_access 인덱스를 따라 필요한 만큼만 읽음
+                    candidates = []
+                    for path, size in conn.execute("SELECT path, size FROM entries ORDER BY last_access"):
+                        if total - freed <= low_water_bytes:
+                            break
+                        candidates.append((path, size))
+                        freed += size
+
+                    for path, size in candidates:
+                        # 실제로 지운 행만 사용량에서 뺌
+                        if conn.execute("DELETE FROM entries WHERE path = ?", (path,)).rowcount == 1:
+                            conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_bytes'", (size,))
+                            victims.append((path, size))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+        for path, _ in victims:
+            try:
+                session_dir = self.root / path
+                shutil.rmtree(session_dir, ignore_errors=True)
+                self._remove_empty_parents(session_dir)
+            except Exception as e:
+                logging.error(f"세션 캐시 삭제 실패 {path}: {e}")
+
+        return len(victims), sum(size for _, size in victims)
@@ -0,0 +1,364 @@
+import json
+import logging
+import os
+import time
+import uuid
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from typing import List, Optional, Tuple
+from core.cache import CACHE_DIR
+
+# FastF1 원본 캐시와 같은 위치에 두는 가공 데이터 저장소
+DERIVED_DIR = CACHE_DIR / "derived"
+LAP_TABLE_DIR = DERIVED_DIR / "laps"
+
+# 저장 형식이 바뀌면 올립니다. 버전이 다른 파일은 무시되고 다시 생성됩니다.
+LAP_TABLE_VERSION = 1
+
+# Arrow 스키마 메타데이터에 부가 정보(드라이버 목록 등)를 저장하는 키
+METADATA_KEY = b"f1sim"
+
+
+def lap_table_path(year: int, race_id: str) -> Path:
+    """ (연도, 라운드)별 랩 테이블 파일 경로 """
+    return LAP_TABLE_DIR / f"{year}_{int(race_id):02d}.arrow"
+
+
+def _to_arrow(laps: pd.DataFrame) -> pa.Table:
+    """
+    DataFrame을 Arrow 테이블로 변환합니다.
+    실수 컬럼은 NaN을 null로 바꾸지 않고 그대로 저장하여,
+    읽을 때 메모리 맵 버퍼를 복사 없이 pandas에서 바로 사용할 수 있도록 합니다.
+    """
+    columns = {}
+    for name, column in laps.items():
+        if column.dtype.kind == 'f':
+            columns[name] = pa.array(column.to_numpy())
+        else:
+            columns[name] = pa.array(column)
+    return pa.table(columns)
+
+
+def write_lap_table(year: int, race_id: str, laps: pd.DataFrame, metadata: dict) -> Optional[Path]:
+    """
+    랩 테이블을 Arrow IPC 파일로 저장합니다.
+    임시 파일에 쓴 뒤 rename 하므로, 여러 워커가 동시에 써도 읽는 쪽은 항상 완전한 파일을 봅니다.
+    """
+    path = lap_table_path(year, race_id)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        LAP_TABLE_DIR.mkdir(parents=True, exist_ok=True)
+
+        table = _to_arrow(laps)
+        payload = json.dumps({**metadata, "version": LAP_TABLE_VERSION}).encode()
+        table = table.replace_schema_metadata({METADATA_KEY: payload})
+
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return path
+
+    except Exception as e:
+        logging.error(f"랩 테이블 저장 실패 ({path}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def read_lap_table(year: int, race_id: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+    """
+    저장된 랩 테이블을 메모리 맵으로 엽니다.
+    실수 컬럼은 OS 페이지 캐시를 그대로 참조하므로 여러 워커 프로세스가 같은 메모리를 공유합니다.
+    파일이 없거나 버전이 다르면(라운드 번호가 아닌 race_id 포함) None을 반환합니다.
+    """
+    try:
+        path = lap_table_path(year, race_id)
+    except ValueError:
+        return None
+    if not path.exists():
+        return None
+
+    try:
+        source = pa.memory_map(str(path), "r")
+        table = pa.ipc.open_file(source).read_all()
+
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        if metadata.get("version") != LAP_TABLE_VERSION:
+            return None
+
+        laps = table.to_pandas(split_blocks=True)
+        return laps, metadata
+
+    except Exception as e:
+        logging.warning(f"랩 테이블 읽기 실패 ({path}): {e}")
+        return None
+
+
+def read_lap_table_metadata(year: int, race_id: str) -> Optional[dict]:
+    """ 저장된 랩 테이블의 부가 정보(드라이버 목록 등)만 읽습니다 (스키마만 열고 데이터는 읽지 않음). """
+    try:
+        path = lap_table_path(year, race_id)
+    except ValueError:
+        return None
+    if not path.exists():
+        return None
+
+    try:
+        with pa.memory_map(str(path), "r") as source:
+            schema = pa.ipc.open_file(source).schema
+        metadata = json.loads(schema.metadata[METADATA_KEY])
+        if metadata.get("version") != LAP_TABLE_VERSION:
+            return None
+        return metadata
+
+    except Exception as e:
+        logging.warning(f"랩 테이블 메타데이터 읽기 실패 ({path}): {e}")
+        return None
+
+# --- 세션 번들 (랩 테이블에서 계산한 분석 결과) ---
+
+BUNDLE_DIR = DERIVED_DIR / "bundles"
+BUNDLE_VERSION = 2
+
+
+def bundle_path(year: int, race_id: str) -> Path:
+    """ (연도, 라운드)별 세션 번들 파일 경로 (랩 테이블 파일 옆에 두는 JSON) """
+    return BUNDLE_DIR / f"{year}_{int(race_id):02d}.json"
+
+
+def has_bundle(year: int, race_id: str) -> bool:
+    return bundle_path(year, race_id).exists()
+
+
+def write_bundle(year: int, race_id: str, payload: dict) -> Optional[Path]:
+    """ 세션 번들을 JSON으로 저장합니다 (랩 테이블과 같은 방식으로 임시 파일 후 rename). """
+    path = bundle_path(year, race_id)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps({**payload, "version": BUNDLE_VERSION}))
+        os.replace(tmp_path, path)
+        return path
+
+    except Exception as e:
+        logging.error(f"세션 번들 저장 실패 ({path}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def read_bundle(year: int, race_id: str) -> Optional[dict]:
+    """ 저장된 세션 번들을 읽습니다. 파일이 없거나 버전이 다르면 None을 반환합니다. """
+    path = bundle_path(year, race_id)
+    if not path.exists():
+        return None
+
+    try:
+        payload = json.loads(path.read_text())
+        if payload.get("version") != BUNDLE_VERSION:
+            return None
+        return payload
+
+    except Exception as e:
+        logging.warning(f"세션 번들 읽기 실패 ({path}): {e}")
+        return None
+
+def read_all_bundles() -> List[dict]:
+    """ 저장된 세션 번들을 모두 읽습니다 (버전이 다르거나 읽을 수 없는 파일은 건너뜀). """
+    payloads = []
+    for path in sorted(BUNDLE_DIR.glob("*.json")):
+        try:
+            payload = json.loads(path.read_text())
+        except Exception as e:
+            logging.warning(f"세션 번들 읽기 실패 ({path}): {e}")
+            continue
+        if payload.get("version") == BUNDLE_VERSION:
+            payloads.append(payload)
+    return payloads
+
+# --- 시즌 메타데이터 인덱스 (라운드, 이벤트 정보, 라운드별 드라이버) ---
+
+SEASON_DIR = DERIVED_DIR / "seasons"
+SEASON_INDEX_VERSION = 1
+
+
+def season_index_path(year: int) -> Path:
+    return SEASON_DIR / f"{year}.json"
+
+
+def write_season_index(year: int, payload: dict) -> Optional[Path]:
+    """ 시즌 인덱스를 JSON으로 저장합니다 (임시 파일 후 rename). """
+    path = season_index_path(year)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        SEASON_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps({**payload, "version": SEASON_INDEX_VERSION}, ensure_ascii=False))
+        os.replace(tmp_path, path)
+        return path
+
+    except Exception as e:
+        logging.error(f"시즌 인덱스 저장 실패 ({path}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def read_season_index(year: int) -> Optional[dict]:
+    """ 저장된 시즌 인덱스를 읽습니다. 파일이 없거나 버전이 다르면 None을 반환합니다. """
+    path = season_index_path(year)
+    if not path.exists():
+        return None
+
+    try:
+        payload = json.loads(path.read_text())
+        if payload.get("version") != SEASON_INDEX_VERSION:
+            return None
+        return payload
+
+    except Exception as e:
+        logging.warning(f"시즌 인덱스 읽기 실패 ({path}): {e}")
+        return None
+
+# --- 전략 수정(what-if) 상태 (리포트별) ---
+# 여러 워커 프로세스가 같은 리포트의 수정 요청을 받을 수 있도록 디스크에 공유합니다.
+
+WHATIF_DIR = DERIVED_DIR / "whatif"
+
+
+def whatif_path(report_id: str) -> Optional[Path]:
+    """ 리포트별 상태 파일 경로. reportId가 UUID 형식이 아니면 None (경로 조작 방지) """
+    try:
+        return WHATIF_DIR / f"{uuid.UUID(report_id)}.json"
+    except (ValueError, TypeError):
+        return None
+
+
+def whatif_revision(report_id: str) -> Optional[Tuple[int, int]]:
+    """
+    저장된 상태의 리비전 (inode, 수정 시각 ns). 파일을 새로 쓸 때마다 rename으로 바뀌므로,
+    메모리에 올려 둔 상태가 다른 프로세스의 수정보다 오래되었는지 파일을 읽지 않고 확인할 수 있습니다.
+    """
+    path = whatif_path(report_id)
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def write_whatif_state(report_id: str, payload: dict) -> Optional[Tuple[int, int]]:
+    """ 상태를 저장하고 새 리비전을 반환합니다 (임시 파일 후 rename). """
+    path = whatif_path(report_id)
+    if path is None:
+        return None
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        WHATIF_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False))
+        os.replace(tmp_path, path)
+        return whatif_revision(report_id)
+
+    except Exception as e:
+        logging.error(f"what-if 상태 저장 실패 ({path}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def read_whatif_state(report_id: str) -> Optional[Tuple[dict, Tuple[int, int]]]:
+    """ 저장된 상태와 읽은 시점의 리비전. 없거나 읽을 수 없으면 None """
+    path = whatif_path(report_id)
+    if path is None:
+        return None
+    try:
+        with path.open("rb") as f:
+            stat = os.fstat(f.fileno())
+            payload = json.loads(f.read())
+        return payload, (stat.st_ino, stat.st_mtime_ns)
+
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"what-if 상태 읽기 실패 ({path}): {e}")
+        return None
+
+
+def prune_whatif_states(max_age_seconds: float) -> int:
+    """ 마지막 수정 후 max_age_seconds가 지난 상태 파일을 삭제합니다. 반환값: 삭제한 파일 수 """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in WHATIF_DIR.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+# --- 시뮬레이션 결과 (요청 해시별, 선택 사항) ---
+
+RESULT_DIR = DERIVED_DIR / "results"
+
+
+def data_version(year: int, race_id: str) -> Optional[str]:
+    """
+    레이스 데이터의 버전 문자열 (저장 형식 버전 + 랩 테이블 파일 수정 시각).
+    랩 테이블이 다시 만들어지면 바뀌므로, 이 값에 의존하는 결과 캐시가 자동으로 무효화됩니다.
+    """
+    try:
+        mtime_ns = lap_table_path(year, race_id).stat().st_mtime_ns
+    except (OSError, ValueError):
+        return None
+    return f"{LAP_TABLE_VERSION}.{BUNDLE_VERSION}.{mtime_ns}"
+
+
+def result_path(key: str) -> Path:
+    return RESULT_DIR / key[:2] / f"{key}.json"
+
+
+def write_result(key: str, content: bytes) -> Optional[Path]:
+    """ 직렬화된 결과를 저장합니다 (임시 파일 후 rename). """
+    path = result_path(key)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+        return path
+
+    except Exception as e:
+        logging.error(f"결과 저장 실패 ({path}): {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def read_result(key: str) -> Optional[bytes]:
+    path = result_path(key)
+    try:
+        content = path.read_bytes()
+        # 읽은 시각을 수정 시각으로 기록: 자주 쓰이는 결과는 정리 대상에서 빠짐
+        os.utime(path)
+        return content
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"결과 읽기 실패 ({path}): {e}")
+        return None
+
+
+def prune_results(max_age_seconds: float) -> int:
+    """
+    max_age_seconds 동안 쓰거나 읽지 않은 결과 파일을 삭제합니다 (데이터 버전이 바뀌면 이전 결과는 더 이상 읽히지 않음).
+    반환값: 삭제한 파일 수
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in RESULT_DIR.glob("*/*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
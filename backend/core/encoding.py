@@ -0,0 +1,134 @@
+import json
+import msgpack
+import numpy as np
+import pyarrow as pa
+from typing import List, Optional, Tuple
+
+# --- 지원하는 응답 형식 (Accept 헤더로 선택) ---
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Accept 헤더에 올 수 있는 별칭 -> 응답 형식
+_MEDIA_TYPES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    ARROW: ARROW,
+    "application/vnd.apache.arrow.file": ARROW,
+    "*/*": JSON,
+    "application/*": JSON,
+}
+
+# 랩 타임 배열 표현 (응답의 lapTimeEncoding 필드로 알려 줌)
+LAP_TIMES_FLOAT32 = "float32-le"        # 리틀 엔디언 float32 바이트열
+LAP_TIMES_DELTA_MS = "delta-ms"         # 밀리초 정수, 첫 값은 절대값이고 이후는 직전 랩과의 차이
+LAP_TIMES_DELTA_MS_INT32 = "delta-ms-int32-le"  # delta-ms를 리틀 엔디언 int32 바이트열로
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Accept 헤더에서 지원하는 응답 형식을 고릅니다.
+    q 값이 가장 높은 형식을 선택하고, 지원하는 형식이 없으면 JSON을 사용합니다.
+    """
+    if not accept:
+        return JSON
+
+    candidates: List[Tuple[float, int, str]] = []
+    for order, part in enumerate(accept.split(",")):
+        media_range, *params = [p.strip() for p in part.split(";")]
+        media_type = _MEDIA_TYPES.get(media_range.lower())
+        if media_type is None:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, order, media_type))
+
+    return min(candidates)[2] if candidates else JSON
+
+
+def _delta_ms(lap_times) -> np.ndarray:
+    """ 랩 타임(초)을 밀리초 정수로 반올림한 뒤 직전 랩과의 차이로 바꿉니다 (np.cumsum으로 복원). """
+    millis = np.rint(np.asarray(lap_times, dtype=np.float64) * 1000).astype(np.int64)
+    return np.diff(millis, prepend=0)
+
+
+def _iter_strategies(results: dict):
+    """ 응답의 results에서 (키, StrategyResult dict)를 순서대로 꺼냅니다. 시나리오 목록은 'scenarios.0' 형식의 키 """
+    for key, value in results.items():
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                yield f"{key}.{i}", item
+        elif value is not None:
+            yield key, value
+
+
+def _encode_lap_times(payload: dict, packed: bool, delta: bool) -> dict:
+    """ 응답 dict의 lapTimes를 지정한 표현으로 바꿉니다 (payload를 직접 수정). """
+    for _, strategy in _iter_strategies(payload["results"]):
+        lap_times = strategy["lapTimes"]
+        if delta:
+            deltas = _delta_ms(lap_times)
+            strategy["lapTimes"] = deltas.astype("<i4").tobytes() if packed else deltas.tolist()
+        elif packed:
+            strategy["lapTimes"] = np.asarray(lap_times, dtype="<f4").tobytes()
+
+    if delta:
+        payload["lapTimeEncoding"] = LAP_TIMES_DELTA_MS_INT32 if packed else LAP_TIMES_DELTA_MS
+    elif packed:
+        payload["lapTimeEncoding"] = LAP_TIMES_FLOAT32
+    return payload
+
+
+def _encode_arrow(payload: dict, delta: bool) -> bytes:
+    """
+    랩 타임을 (strategy, lap, lapTime) 열 형식 테이블로, 나머지 필드는 스키마 메타데이터(JSON)로 담은 Arrow IPC 스트림
+    """
+    keys, laps, values = [], [], []
+    for key, strategy in _iter_strategies(payload["results"]):
+        lap_times = strategy.pop("lapTimes")
+        keys.extend([key] * len(lap_times))
+        laps.append(np.arange(1, len(lap_times) + 1, dtype=np.int16))
+        values.append(_delta_ms(lap_times).astype(np.int32) if delta else np.asarray(lap_times, dtype=np.float32))
+
+    payload["lapTimeEncoding"] = LAP_TIMES_DELTA_MS if delta else "float32"
+    table = pa.table({
+        "strategy": pa.array(keys, type=pa.string()).dictionary_encode(),
+        "lap": pa.array(np.concatenate(laps) if laps else np.empty(0, dtype=np.int16)),
+        "lapTime": pa.array(
+            np.concatenate(values) if values else np.empty(0, dtype=np.int32 if delta else np.float32)
+        ),
+    })
+    table = table.replace_schema_metadata({b"f1sim": json.dumps(payload).encode()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_response(response, media_type: str = JSON, delta: bool = False) -> bytes:
+    """
+    Pydantic 응답 모델을 선택한 형식의 바이트열로 인코딩합니다.
+    - JSON: 기본 형식은 model_dump_json으로 바로 직렬화 (응답 모델 재검증 생략)
+    - MessagePack: lapTimes를 float32 (또는 delta-ms int32) 바이트 배열로 압축
+    - Arrow: 모든 전략의 랩 타임을 하나의 열 형식 테이블로
+    delta=True이면 랩 타임을 밀리초 차이값(delta-ms)으로 보냅니다.
+    """
+    if media_type == JSON and not delta:
+        return response.model_dump_json().encode()
+
+    payload = response.model_dump(mode="json")
+    if media_type == ARROW:
+        return _encode_arrow(payload, delta)
+    if media_type == MSGPACK:
+        return msgpack.packb(_encode_lap_times(payload, packed=True, delta=delta))
+    return json.dumps(_encode_lap_times(payload, packed=False, delta=delta)).encode()
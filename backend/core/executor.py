@@ -0,0 +1,144 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException
+from core import metrics
+from core.cache import setup_fast_f1_cache
+
+# --- 실행 풀 설정 (환경 변수로 조절) ---
+# I/O 작업(FastF1 로드, 스케줄 조회)을 동시에 실행할 스레드 수
+IO_WORKERS = int(os.getenv("F1SIM_IO_WORKERS", "8"))
+# CPU 작업(시뮬레이션)을 실행할 프로세스 수. 0이면 프로세스 풀 대신 스레드에서 실행합니다.
+CPU_WORKERS = int(os.getenv("F1SIM_CPU_WORKERS", str(os.cpu_count() or 1)))
+# 프로세스 시작 방식. 스케줄러/스레드 풀과 함께 fork 하면 교착 위험이 있어 spawn을 기본으로 합니다.
+CPU_START_METHOD = os.getenv("F1SIM_CPU_START_METHOD", "spawn")
+
+
+class _RemoteHTTPException(Exception):
+    """ HTTPException은 pickle 할 수 없으므로, 워커 프로세스에서 부모로 전달할 때 사용합니다. """
+    def __init__(self, status_code, detail=None, headers=None):
+        super().__init__(status_code, detail, headers)
+
+
+def _call_in_worker(fn, *args):
+    """ 워커 프로세스에서 실행되는 진입점. (결과, 단계별 소요 시간 기록)을 반환합니다. """
+    try:
+        return metrics.collect_stages(fn, *args)
+    except HTTPException as e:
+        raise _RemoteHTTPException(e.status_code, e.detail, e.headers)
+
+
+class _Pool:
+    """ 실행 풀 하나와 대기열 통계를 묶은 객체 """
+
+    def __init__(self, name: str, workers: int, factory):
+        self.name = name
+        self.workers = workers
+        self._factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0   # 제출 후 아직 끝나지 않은 작업 (실행 중 + 대기 중)
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def executor(self) -> Executor:
+        # 첫 사용 시점에 생성 (앱 import 만으로 프로세스가 뜨지 않도록)
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._factory()
+            return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(self.executor, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "inFlight": self.in_flight,
+            "queueDepth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _make_io_executor() -> Executor:
+    return ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="f1sim-io")
+
+
+def _make_cpu_executor() -> Executor:
+    if CPU_WORKERS <= 0:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="f1sim-cpu")
+    return ProcessPoolExecutor(
+        max_workers=CPU_WORKERS,
+        mp_context=multiprocessing.get_context(CPU_START_METHOD),
+        initializer=setup_fast_f1_cache,  # 워커 프로세스에서도 같은 FastF1 캐시 사용
+    )
+
+
+_io_pool = _Pool("io", IO_WORKERS, _make_io_executor)
+_cpu_pool = _Pool("cpu", max(CPU_WORKERS, 1), _make_cpu_executor)
+
+
+async def run_io(fn, *args):
+    """
+    I/O 위주의 블로킹 함수(FastF1 로드 등)를 스레드 풀에서 실행합니다.
+    호출한 요청의 contextvars를 그대로 이어받습니다.
+    """
+    context = contextvars.copy_context()
+    return await _io_pool.run(functools.partial(context.run, fn), *args)
+
+
+async def run_cpu(fn, *args):
+    """
+    CPU 위주의 함수(시뮬레이션)를 프로세스 풀에서 실행합니다.
+    fn과 인자는 pickle 가능해야 하며, 워커에서 발생한 HTTPException은 그대로 다시 발생시킵니다.
+    워커에서 기록한 단계별 소요 시간은 이 프로세스의 메트릭과 요청 프로파일에 반영됩니다.
+    """
+    try:
+        result, events = await _cpu_pool.run(_call_in_worker, fn, *args)
+    except _RemoteHTTPException as e:
+        status_code, detail, headers = e.args
+        raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+    metrics.replay(events)
+    return result
+
+
+def get_stats() -> dict:
+    """ 실행 풀별 동시 실행/대기열 통계 """
+    return {
+        _io_pool.name: _io_pool.stats(),
+        _cpu_pool.name: _cpu_pool.stats(),
+    }
+
+
+def shutdown():
+    """ 앱 종료 시 실행 풀을 정리합니다. """
+    _io_pool.shutdown()
+    _cpu_pool.shutdown()
+    logging.info("실행 풀 종료됨.")
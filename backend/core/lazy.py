@@ -0,0 +1,41 @@
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """
+    첫 속성 접근 시점에 실제 모듈을 import 하는 대리 객체.
+    라우터가 서비스 모듈(FastF1, pandas, NumPy 포함)을 이 객체로 참조하면, 앱 import 만으로는
+    무거운 라이브러리를 불러오지 않으므로 워커가 바로 요청(/health 등)을 받을 수 있습니다.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        """ 실제 모듈을 import 하여 반환합니다 (이미 불러왔으면 그대로 반환). """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                    from core import lifecycle
+                    lifecycle.note_lazy_load()
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """ 예: data_service = lazy_import("services.data_service") """
+    return LazyModule(name)
@@ -0,0 +1,85 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from core import metrics
+from core.cache import setup_fast_f1_cache
+
+# --- 시작/준비 상태 설정 (환경 변수로 조절) ---
+# 1이면 바인드 직후 백그라운드에서 무거운 모듈과 FastF1 캐시를 미리 준비 (0이면 첫 요청에서 불러옴)
+PRELOAD = os.getenv("F1SIM_PRELOAD", "1") == "1"
+# 1이면 최근 레이스 워밍업까지 끝나야 /ready가 200을 반환
+READY_REQUIRES_WARMUP = os.getenv("F1SIM_READY_REQUIRES_WARMUP", "1") == "1"
+
+# 미리 불러올 모듈 (라우터는 이 모듈들을 첫 사용 시점에 import 함)
+PRELOAD_MODULES = (
+    "services.data_service",
+    "services.simulation_service",
+    "services.sweep_service",
+    "services.whatif_service",
+    "services.result_cache",
+    "services.warmup_service",
+    "core.encoding",
+)
+
+_started_at = time.monotonic()
+_lock = threading.Lock()
+# 준비 단계 -> 완료까지 걸린 시간 (프로세스 시작 기준, 초). 아직 끝나지 않았으면 None
+_checks = {"modules": None, "fastf1Cache": None, "warmup": None}
+
+
+def mark(check: str):
+    """ 준비 단계 하나를 완료로 표시합니다. """
+    with _lock:
+        if _checks[check] is None:
+            _checks[check] = round(time.monotonic() - _started_at, 3)
+            logging.info(f"[lifecycle] {check} 준비 완료 ({_checks[check]}초)")
+
+
+def note_lazy_load():
+    """ 미리 로드하지 않는 경우(F1SIM_PRELOAD=0), 서비스 모듈을 처음 불러온 시점을 modules 완료로 기록합니다. """
+    if not PRELOAD:
+        mark("modules")
+
+
+def required_checks() -> tuple:
+    """
+    /ready가 200이 되기 위해 끝나야 하는 단계. FastF1 캐시는 항상 필요하며,
+    미리 로드하지 않으면(F1SIM_PRELOAD=0) 모듈/워밍업은 첫 요청에서 진행되므로 기다리지 않습니다.
+    """
+    if not PRELOAD:
+        return ("fastf1Cache",)
+    return ("modules", "fastf1Cache", "warmup") if READY_REQUIRES_WARMUP else ("modules", "fastf1Cache")
+
+
+def is_ready() -> bool:
+    with _lock:
+        return all(_checks[check] is not None for check in required_checks())
+
+
+def status() -> dict:
+    """ /ready 응답 본문: 준비 여부, 단계별 완료 시각, 프로세스 시작 후 경과 시간 """
+    with _lock:
+        checks = dict(_checks)
+    return {
+        "status": "ready" if is_ready() else "starting",
+        "checks": checks,
+        "required": list(required_checks()),
+        "uptimeSeconds": round(time.monotonic() - _started_at, 3),
+    }
+
+
+def preload():
+    """
+    [백그라운드] 무거운 모듈(FastF1, pandas, NumPy, 서비스)을 import 하고 FastF1 캐시를 활성화합니다.
+    I/O 스레드에서 실행하므로 그동안에도 이벤트 루프는 /health 등의 요청을 처리합니다.
+    """
+    with metrics.stage("preload_modules"):
+        for name in PRELOAD_MODULES:
+            importlib.import_module(name)
+    mark("modules")
+
+    # 캐시가 활성화되면 get_fastf1이 fastf1Cache를 완료로 표시 (설정에 실패하면 준비되지 않은 상태로 남음)
+    with metrics.stage("preload_fastf1_cache"):
+        setup_fast_f1_cache()
@@ -0,0 +1,177 @@
+import dataclasses
+import functools
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 생성된 모든 캐시 (이름 -> 캐시), 통계 조회/무효화 API에서 사용
+_registry: Dict[str, "MemoryCache"] = {}
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    객체가 차지하는 메모리(바이트)를 대략 추정합니다.
+    DataFrame/ndarray는 실제 버퍼 크기를, 컨테이너와 모델 객체는 내부 값을 재귀적으로 합산합니다.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    # pandas / numpy (무거운 모듈을 직접 import 하지 않고 속성으로 판별)
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes") and hasattr(value, "dtype"):
+        return int(value.nbytes)
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(v, _seen) for v in value)
+    if dataclasses.is_dataclass(value):
+        return size + sum(estimate_size(getattr(value, f.name), _seen) for f in dataclasses.fields(value))
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), _seen)
+    return size
+
+
+def is_negative(value: Any) -> bool:
+    """ 로드 실패로 간주하는 결과 (None, 빈 리스트 등) """
+    return value is None or (hasattr(value, "__len__") and len(value) == 0)
+
+
+class MemoryCache:
+    """
+    바이트 용량 제한과 TTL을 지원하는 스레드 안전 LRU 캐시.
+    - max_bytes: 항목 크기(estimate_size) 합계의 상한. 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다.
+    - ttl: 정상 결과의 유효 시간(초). None이면 만료되지 않습니다.
+    - negative_ttl: 실패 결과(None, 빈 리스트)의 유효 시간(초). 잠시 후 다시 로드를 시도하도록 짧게 둡니다.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: Optional[float] = None, negative_ttl: float = 60.0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        _registry[name] = self
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """ (찾았는지 여부, 값)을 반환합니다. 만료된 항목은 제거하고 미스로 처리합니다. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+
+                self._remove(key)
+                self.expirations += 1
+
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """ 값을 저장합니다. 실패 결과에는 negative_ttl이 적용됩니다. """
+        if ttl is None:
+            ttl = self.negative_ttl if is_negative(value) else self.ttl
+        size = estimate_size(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                logging.warning(f"[{self.name}] 캐시 용량보다 큰 항목은 저장하지 않습니다: {size} bytes")
+                return
+
+            expires_at = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+
+            # 용량 초과 시 LRU 순으로 제거
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """ 항목 하나를 제거합니다. 제거했으면 True """
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl,
+                "negativeTtlSeconds": self.negative_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def cached(self, key=None):
+        """
+        함수 결과를 이 캐시에 저장하는 데코레이터.
+        key: 인자로부터 캐시 키를 만드는 함수 (기본값: 인자 튜플)
+        데코레이트된 함수에는 .cache, .cache_key 속성이 추가됩니다.
+        """
+        def decorator(fn):
+            make_key = key or (lambda *args: args)
+
+            @functools.wraps(fn)
+            def wrapper(*args):
+                cache_key = make_key(*args)
+                found, value = self.get(cache_key)
+                if found:
+                    return value
+                value = fn(*args)
+                self.set(cache_key, value)
+                return value
+
+            wrapper.cache = self
+            wrapper.cache_key = make_key
+            return wrapper
+        return decorator
+
+
+def get_cache(name: str) -> Optional[MemoryCache]:
+    return _registry.get(name)
+
+
+def get_all_stats() -> dict:
+    """ 모든 캐시의 통계 """
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,115 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from core import memory_cache
+
+# --- 1. 메트릭 정의 (GET /metrics로 노출) ---
+
+# 요청 처리 단계별 소요 시간 (load_race_data, pick_driver, 성능 저하 적합, 시나리오 계산, 직렬화 등)
+STAGE_SECONDS = Histogram(
+    "f1sim_stage_seconds",
+    "Latency of each request-processing stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+# HTTP 요청 전체 소요 시간 (라우트 템플릿 기준)
+REQUEST_SECONDS = Histogram(
+    "f1sim_request_seconds",
+    "Latency of HTTP requests",
+    ["method", "route", "status"],
+)
+# FastF1이 새로 내려받아 디스크 캐시에 추가한 바이트 (캐시 인덱스의 세션 크기 증가분)
+FASTF1_DOWNLOAD_BYTES = Counter(
+    "f1sim_fastf1_download_bytes",
+    "Bytes added to the FastF1 disk cache by session downloads",
+)
+
+Event = Tuple[str, float]
+
+# 현재 범위(요청 또는 워커 작업)에서 기록한 단계 목록
+_events: contextvars.ContextVar[Optional[List[Event]]] = contextvars.ContextVar("f1sim_stage_events", default=None)
+# True이면 히스토그램에 바로 기록하지 않음 (워커 프로세스: 부모가 replay로 기록)
+_deferred: contextvars.ContextVar[bool] = contextvars.ContextVar("f1sim_stage_deferred", default=False)
+
+
+class _CacheCollector:
+    """ MemoryCache 통계를 스크레이프 시점에 읽어 메트릭으로 변환합니다 (캐시 조회 경로에는 비용 없음). """
+
+    def collect(self):
+        hits = CounterMetricFamily("f1sim_cache_hits", "Memory cache hits", labels=["cache"])
+        misses = CounterMetricFamily("f1sim_cache_misses", "Memory cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("f1sim_cache_evictions", "Memory cache LRU evictions", labels=["cache"])
+        size = GaugeMetricFamily("f1sim_cache_bytes", "Estimated memory cache size in bytes", labels=["cache"])
+
+        for name, stats in memory_cache.get_all_stats().items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+            size.add_metric([name], stats["bytes"])
+
+        yield from (hits, misses, evictions, size)
+
+
+REGISTRY.register(_CacheCollector())
+
+# --- 2. 단계 기록 ---
+
+def record_stage(name: str, seconds: float):
+    """ 단계 하나의 소요 시간을 기록합니다. """
+    events = _events.get()
+    if events is not None:
+        events.append((name, seconds))
+    if not _deferred.get():
+        STAGE_SECONDS.labels(name).observe(seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """ with 블록의 소요 시간을 단계 name으로 기록합니다. """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def collect_stages(fn, *args) -> Tuple[object, List[Event]]:
+    """
+    워커 프로세스에서 fn(*args)를 실행하고 그동안 기록된 단계 목록을 함께 반환합니다.
+    워커의 히스토그램은 스크레이프되지 않으므로, 부모 프로세스가 replay로 다시 기록합니다.
+    """
+    events: List[Event] = []
+    events_token = _events.set(events)
+    deferred_token = _deferred.set(True)
+    try:
+        return fn(*args), events
+    finally:
+        _deferred.reset(deferred_token)
+        _events.reset(events_token)
+
+
+def replay(events: List[Event]):
+    """ 워커에서 수집한 단계 기록을 현재 프로세스(와 진행 중인 요청 프로파일)에 반영합니다. """
+    for name, seconds in events:
+        record_stage(name, seconds)
+
+# --- 3. 요청별 프로파일 (Server-Timing 헤더) ---
+
+def start_profile() -> List[Event]:
+    """ 현재 요청의 단계 기록을 시작합니다. 반환된 목록에 이후 기록되는 단계가 쌓입니다. """
+    events: List[Event] = []
+    _events.set(events)
+    return events
+
+
+def server_timing(events: List[Event], total_seconds: float) -> str:
+    """ 단계 기록을 Server-Timing 헤더 값으로 만듭니다 (같은 단계는 합산, 단위 ms). """
+    totals = {}
+    for name, seconds in events:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items()]
+    parts.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(parts)
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Callable, Dict, Hashable, Optional
+from core import executor
+
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 로드를 하나로 합칩니다 (single-flight).
+    - fn이 MemoryCache.cached로 데코레이트된 함수이면, 캐시에 있는 결과는 스레드 전환 없이 바로 반환합니다.
+    - 이미 로드가 진행 중인 키는 새로 로드하지 않고 진행 중인 작업의 결과를 함께 기다립니다.
+    - admission(*args)가 승인 게이트를 반환하면 새 로드는 그 게이트의 슬롯을 얻은 뒤 실행합니다
+      (합류한 요청은 슬롯을 차지하지 않으며, 게이트가 거절하면 함께 503을 받습니다).
+    """
+
+    def __init__(self, name: str, fn, admission: Optional[Callable] = None):
+        self.name = name
+        self.fn = fn
+        self._admission = admission
+        self._cache = getattr(fn, "cache", None)
+        self._make_key = getattr(fn, "cache_key", lambda *args: args)
+        # 캐시는 run에서 이미 확인했으므로, 새 로드는 데코레이트 전의 함수를 실행하고 결과를 직접 저장
+        # (감싼 함수를 다시 부르면 캐시 미스가 두 번 집계됨)
+        self._loader = getattr(fn, "__wrapped__", fn) if self._cache is not None else fn
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0        # 캐시된 결과로 바로 응답
+        self.misses = 0      # 새 로드를 시작 (I/O 풀에서 실행)
+        self.coalesced = 0   # 진행 중인 로드에 합류
+
+    async def run(self, *args):
+        """ fn(*args)의 결과를 반환합니다. 필요할 때만 I/O 풀에서 한 번 실행합니다. """
+        key = self._make_key(*args)
+
+        if self._cache is not None:
+            found, value = self._cache.get(key)
+            if found:
+                self.hits += 1
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # 별도 Task로 실행하여, 먼저 요청한 클라이언트가 끊겨도 로드는 계속되고 다른 대기자에게 전달됨
+            gate = self._admission(*args) if self._admission is not None else None
+            task = asyncio.ensure_future(self._load(gate, args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._complete(key, t))
+
+        return await asyncio.shield(task)
+
+    async def _load(self, gate, args):
+        if gate is None:
+            return await executor.run_io(self._call, args)
+        async with gate.slot():
+            return await executor.run_io(self._call, args)
+
+    def _call(self, args):
+        """ [I/O 스레드] 로더를 실행하고, 캐시를 사용하는 함수이면 결과를 캐시에 저장합니다. """
+        value = self._loader(*args)
+        if self._cache is not None:
+            self._cache.set(self._make_key(*args), value)
+        return value
+
+    def _complete(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # 대기자가 모두 취소된 경우에도 예외가 '처리되지 않음' 경고로 남지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inFlight": len(self._inflight),
+        }
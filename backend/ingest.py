@@ -0,0 +1,192 @@
+"""
+시즌 단위 일괄 준비 (오프라인 ingest)
+
+연도 범위의 FastF1 스케줄을 따라, 끝난 모든 레이스의 가공 데이터를 API와 같은 캐시 디렉토리에 미리 만듭니다.
+- 시즌 인덱스 (라운드, 이벤트 정보, 라운드별 드라이버)
+- 압축 랩 테이블 (derived/laps)
+- 세션 번들: 실제 전략, 성능 저하 모델, 레이스 이벤트 (derived/bundles)
+이후 API는 이 레이스들을 FastF1 로드 없이 처리하므로, 새 노드를 요청 없이 완전히 워밍업할 수 있습니다.
+
+레이스는 프로세스 풀에서 병렬로 처리하며, 레이스가 끝날 때마다 진행 상태를 파일에 기록합니다.
+중단되거나 일부가 실패해도 같은 명령을 다시 실행하면 끝나지 않은(실패한) 레이스부터 이어서 진행합니다.
+
+사용법 (backend 디렉토리에서):
+    python ingest.py 2018 2024
+    python ingest.py 2024 --workers 4
+    python ingest.py 2019 2023 --offline      # 기존 FastF1 캐시만 사용 (네트워크 요청 없음)
+    python ingest.py 2024 --force             # 이미 준비된 레이스도 다시 생성
+                                              # (실행 중인 서버에는 DELETE /api/system/races/{year}/{race_id}로 반영)
+
+하나라도 실패한 레이스가 있으면 종료 코드 1로 끝납니다.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple
+
+# 레이스 일정(EventDate, 레이스 당일 0시) 이후 데이터가 공개될 때까지 기다리는 시간
+RACE_DATA_DELAY = timedelta(days=1)
+
+
+def _state_key(year: int, race_id: str) -> str:
+    return f"{year}_{int(race_id):02d}"
+
+
+def ingest_race(year: int, race_id: str, force: bool = False) -> dict:
+    """
+    [워커 프로세스] 레이스 하나의 랩 테이블과 세션 번들을 만들어 저장합니다 (이미 있으면 그대로 사용).
+    반환값: {status: done|failed, drivers, seconds, error}
+    """
+    from core import derived_store
+    from services import data_service, simulation_service
+
+    start = time.perf_counter()
+    if force:
+        derived_store.lap_table_path(year, race_id).unlink(missing_ok=True)
+        derived_store.bundle_path(year, race_id).unlink(missing_ok=True)
+        data_service.invalidate_race(year, race_id)
+
+    bundle = simulation_service.get_session_bundle(year, race_id)
+    lap_table = data_service.get_lap_table(year, race_id) if bundle is not None else None
+    if lap_table is None:
+        return {"status": "failed", "error": "레이스 데이터를 로드할 수 없습니다.", "seconds": round(time.perf_counter() - start, 3)}
+
+    return {"status": "done", "drivers": lap_table.drivers, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def load_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {"races": {}}
+    except Exception as e:
+        logging.warning(f"[ingest] 진행 상태 파일을 읽을 수 없어 처음부터 시작합니다 ({path}): {e}")
+        return {"races": {}}
+
+
+def save_state(path: Path, state: dict):
+    """ 진행 상태를 저장합니다 (임시 파일 후 rename: 중간에 중단되어도 파일이 깨지지 않음). """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=1))
+    os.replace(tmp_path, path)
+
+
+def finished_races(years: List[int]) -> List[Tuple[int, str]]:
+    """ 시즌 인덱스(없으면 FastF1 스케줄로 구성하여 저장)에서 데이터가 공개되었을 레이스를 라운드 순으로 찾습니다. """
+    from services import data_service
+
+    cutoff = datetime.now() - RACE_DATA_DELAY
+    races = []
+    for year in years:
+        index = data_service.get_season_index(year)
+        if not index:
+            logging.error(f"[ingest] {year}년 스케줄을 가져올 수 없습니다.")
+            continue
+        entries = sorted(index["races"].values(), key=lambda e: e["round"])
+        races.extend((year, e["raceId"]) for e in entries if datetime.fromisoformat(e["date"]) <= cutoff)
+    return races
+
+
+def run(years: List[int], workers: int, state_path: Path, force: bool) -> int:
+    from core import derived_store
+    from core.cache import setup_fast_f1_cache
+    from services import data_service
+
+    state = load_state(state_path)
+    races = finished_races(years)
+
+    # 1. 이전 실행에서 끝난 레이스는 건너뜀 (워커들이 동시에 기록한 시즌 인덱스의 드라이버 목록은 여기서 보정)
+    pending = []
+    for year, race_id in races:
+        entry = state["races"].get(_state_key(year, race_id))
+        done = (
+            entry is not None and entry["status"] == "done"
+            and derived_store.lap_table_path(year, race_id).exists() and derived_store.has_bundle(year, race_id)
+        )
+        if done and not force:
+            data_service.record_race_drivers(year, race_id, entry["drivers"])
+        else:
+            pending.append((year, race_id))
+
+    logging.info(f"[ingest] 대상 {len(races)}개 중 {len(races) - len(pending)}개 완료됨, {len(pending)}개 진행 (워커 {workers}개)")
+    if not pending:
+        return 0
+
+    # 2. 레이스별로 프로세스 풀에서 실행하고, 끝나는 대로 상태 파일에 기록
+    failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=setup_fast_f1_cache,
+    ) as pool:
+        futures = {pool.submit(ingest_race, year, race_id, force): (year, race_id) for year, race_id in pending}
+        for count, future in enumerate(as_completed(futures), start=1):
+            year, race_id = futures[future]
+            key = _state_key(year, race_id)
+            try:
+                result = future.result()
+            except Exception as e:
+                # 워커 프로세스가 죽은 경우(BrokenProcessPool) 포함: 실패로 기록하고 다음 실행에서 재시도
+                result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+            previous = state["races"].get(key) or {}
+            state["races"][key] = {
+                **result,
+                "attempts": previous.get("attempts", 0) + 1,
+                "updatedAt": datetime.now().isoformat(timespec="seconds"),
+            }
+            if result["status"] == "done":
+                data_service.record_race_drivers(year, race_id, result["drivers"])
+                logging.info(f"[ingest] ({count}/{len(pending)}) {year} {race_id} 완료 ({result['seconds']}초)")
+            else:
+                failed += 1
+                logging.error(f"[ingest] ({count}/{len(pending)}) {year} {race_id} 실패: {result['error']}")
+            save_state(state_path, state)
+
+    logging.info(
+        f"[ingest] {len(pending) - failed}/{len(pending)}개 완료, {failed}개 실패 "
+        f"({time.perf_counter() - started:.1f}초). 상태: {state_path}"
+    )
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="시즌 단위 가공 데이터 일괄 준비 (랩 테이블, 시즌 인덱스, 성능 저하 모델)")
+    parser.add_argument("start_year", type=int, help="시작 연도")
+    parser.add_argument("end_year", type=int, nargs="?", help="마지막 연도 (생략하면 시작 연도만)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="동시에 처리할 레이스 수 (프로세스)")
+    parser.add_argument("--cache-dir", help="캐시 디렉토리 (기본값: API와 같은 위치, F1SIM_CACHE_DIR)")
+    parser.add_argument("--state", help="진행 상태 파일 경로 (기본값: <캐시>/derived/ingest_state.json)")
+    parser.add_argument("--offline", action="store_true", help="FastF1 캐시에 있는 데이터만 사용 (네트워크 요청 없음)")
+    parser.add_argument("--force", action="store_true", help="이미 준비된 레이스도 다시 생성")
+    args = parser.parse_args(argv)
+
+    end_year = args.end_year if args.end_year is not None else args.start_year
+    if end_year < args.start_year:
+        parser.error("마지막 연도는 시작 연도보다 작을 수 없습니다.")
+
+    # 앱 모듈을 import 하기 전에 설정 (워커 프로세스도 같은 환경 변수를 이어받음)
+    if args.cache_dir:
+        os.environ["F1SIM_CACHE_DIR"] = str(Path(args.cache_dir).resolve())
+    if args.offline:
+        os.environ["F1SIM_FASTF1_OFFLINE"] = "1"
+
+    logging.basicConfig(level=logging.INFO)
+    from core import derived_store
+
+    state_path = Path(args.state) if args.state else derived_store.DERIVED_DIR / "ingest_state.json"
+    years = list(range(args.start_year, end_year + 1))
+    return run(years, max(1, args.workers), state_path, args.force)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,25 @@
+import asyncio
 import logging
+import os
+import time
 import pytz
 from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from core.cache import setup_fast_f1_cache, clear_fast_f1_cache
-from routers import data, simulation
+from apscheduler.triggers.interval import IntervalTrigger
+from core.cache import clear_fast_f1_cache, setup_fast_f1_cache
+from core import executor, lifecycle, metrics
+from core.lazy import lazy_import
+from routers import data, simulation, system
+
+# 워밍업 서비스는 시뮬레이션 서비스 전체(pandas, FastF1 포함)를 불러오므로 실제로 실행할 때 import
+warmup_service = lazy_import("services.warmup_service")
+whatif_service = lazy_import("services.whatif_service")
+result_cache = lazy_import("services.result_cache")
+# 주기 워밍업 간격 (분). warmup_service를 import 하지 않고 스케줄을 등록하기 위해 같은 환경 변수를 읽음
+WARMUP_INTERVAL_MINUTES = int(os.getenv("F1SIM_WARMUP_INTERVAL_MINUTES", "30"))
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -34,38 +48,140 @@ app.add_middleware(
     # ------------------
 )
 
+# --- 요청 계측 ---
+# 요청 헤더에 이 값을 1로 보내면 응답의 Server-Timing 헤더에 단계별 소요 시간을 담아 보냅니다.
+PROFILE_HEADER = "X-F1Sim-Profile"
+
+class InstrumentRequests:
+    """
+    요청별 소요 시간을 메트릭으로 기록하고, 요청한 경우 단계별 프로파일을 응답 헤더로 반환합니다.
+    (@app.middleware("http") 대신 ASGI 미들웨어로 구현: 스트리밍 응답에서 클라이언트 연결 끊김을 감지할 수 있도록
+    receive를 그대로 전달하고, 응답 본문을 중계하지 않습니다.)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = metrics.start_profile() if Headers(scope=scope).get(PROFILE_HEADER) == "1" else None
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile is not None:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", metrics.server_timing(profile, time.perf_counter() - start)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            metrics.REQUEST_SECONDS.labels(
+                scope["method"], route.path if route else "unmatched", str(status_code)
+            ).observe(time.perf_counter() - start)
+
+app.add_middleware(InstrumentRequests)
+
 # --- 라우터 포함 ---
 app.include_router(data.router)         # 데이터 조회 관련 API (레이스, 드라이버 목록)
 app.include_router(simulation.router)   # 시뮬레이션 실행 관련 API
+app.include_router(system.router)       # 서버 상태(실행 풀 등) 조회 API
 # ------------------
 
 # --- 앱 시작/종료 이벤트 ---
 
+async def preload_and_warm():
+    """
+    [시작 직후 1회, 백그라운드] 무거운 모듈과 FastF1 캐시를 준비하고, 캐시 인덱스를 점검한 뒤
+    최근 레이스를 메모리에 올립니다. 단계마다 준비 상태를 갱신하며 모두 끝나면 /ready가 200을 반환합니다.
+    """
+    try:
+        await executor.run_io(lifecycle.preload)
+        # 인덱스가 없으면 구성하고 용량 점검
+        await executor.run_io(clear_fast_f1_cache)
+        await warmup_service.warm_recent_races()
+        lifecycle.mark("warmup")
+    except Exception as e:
+        logging.error(f"[lifecycle] 시작 준비 중 오류 발생: {e}", exc_info=True)
+
+async def warm_new_races():
+    """ [스케줄러 작업] warmup_service.warm_new_races (첫 실행 시점에 서비스 import) """
+    await warmup_service.warm_new_races()
+
+def prune_whatif_states():
+    """ [스케줄러 작업] 만료된 전략 수정(what-if) 상태 파일 정리 """
+    removed = whatif_service.prune_expired()
+    if removed:
+        logging.info(f"만료된 what-if 상태 {removed}개 정리")
+
+def prune_results():
+    """ [스케줄러 작업] 디스크에 저장한 시뮬레이션 결과 중 오래 읽지 않은 것 정리 """
+    removed = result_cache.prune_expired()
+    if removed:
+        logging.info(f"오래된 시뮬레이션 결과 {removed}개 정리")
+
 @app.on_event("startup")
 async def startup_event():
     """
-    앱 시작 시 FastF1 캐시 설정 및 캐시 정리 스케줄러를 시작합니다.
+    앱 시작 시 캐시 정리/레이스 워밍업 스케줄러를 시작합니다.
+    FastF1 캐시 설정과 무거운 모듈 import는 요청을 받기 시작한 뒤 백그라운드에서 진행합니다
+    (F1SIM_PRELOAD=0이면 첫 요청에서 진행). 준비 상태는 /ready로 확인합니다.
     """
-    # 1. FastF1 캐시 설정 (용량 제한) 
-    setup_fast_f1_cache()
-    
-    # 2. 캐시 정리 스케줄러 (시간 제한)
+    # 1. 캐시 정리 스케줄러 (시간 제한)
     scheduler.add_job(
         clear_fast_f1_cache,
         trigger=CronTrigger(hour=4, minute=0, timezone=pytz.timezone('Asia/Seoul')),
         id="daily_cache_clear",
         replace_existing=True,
     )
+
+    # 전략 수정 상태 파일 정리 (여러 워커가 공유하는 derived 저장소의 만료된 리포트)
+    scheduler.add_job(
+        prune_whatif_states,
+        trigger=IntervalTrigger(hours=1),
+        id="whatif_prune",
+        replace_existing=True,
+    )
+
+    # 디스크에 저장한 시뮬레이션 결과 정리 (이전 데이터 버전의 결과는 다시 읽히지 않으므로)
+    scheduler.add_job(
+        prune_results,
+        trigger=IntervalTrigger(hours=6),
+        id="result_prune",
+        replace_existing=True,
+    )
+
+    # 2. 레이스 워밍업: 새로 끝난 레이스의 세션 번들을 미리 생성 (첫 사용자가 로드 비용을 치르지 않도록)
+    scheduler.add_job(
+        warm_new_races,
+        trigger=IntervalTrigger(minutes=WARMUP_INTERVAL_MINUTES),
+        id="race_warmup",
+        replace_existing=True,
+    )
+
+    # 3. 시작 직후 1회: 모듈/FastF1 캐시 미리 준비, 캐시 인덱스 점검, 최근 레이스 워밍업
+    if lifecycle.PRELOAD:
+        scheduler.add_job(preload_and_warm, id="initial_preload", replace_existing=True)
     scheduler.start()
-    logging.info("APScheduler 시작됨. (매일 4시(KST) 캐시 정리)")
+    logging.info("APScheduler 시작됨. (매일 4시(KST) 캐시 정리, 레이스 워밍업)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """
-    앱 종료 시 스케줄러를 종료합니다.
+    앱 종료 시 스케줄러와 실행 풀을 종료합니다.
     """
     scheduler.shutdown()
     logging.info("APScheduler 종료됨.")
+    executor.shutdown()
 
 # --- 기본 엔드포인트 ---
 
@@ -81,6 +197,24 @@ async def health_check(response: Response):
     
     return {"status": "ok"}
 
+# F1SIM_PRELOAD=0일 때 /ready가 시작한 FastF1 캐시 활성화 작업 (한 번만 실행)
+_cache_setup = None
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    [준비 상태 확인] GET /ready
+    /health와 달리, 무거운 모듈/FastF1 캐시/최근 레이스 워밍업이 모두 끝났을 때만 200을 반환합니다 (그 전에는 503).
+    오케스트레이터가 준비된 워커에만 트래픽을 보내도록 readiness probe로 사용합니다.
+    F1SIM_PRELOAD=0이면 FastF1 캐시만 기다리며, 아직 아무 요청도 캐시를 켜지 않았으면 첫 확인 시 백그라운드에서 켭니다.
+    """
+    global _cache_setup
+    if not lifecycle.is_ready():
+        if not lifecycle.PRELOAD and _cache_setup is None:
+            _cache_setup = asyncio.ensure_future(executor.run_io(setup_fast_f1_cache))
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return lifecycle.status()
+
 @app.get("/")
 async def read_root():
     """
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+import os
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Union
 from datetime import datetime
 
@@ -41,6 +42,21 @@ class SimulationRequest(BaseModel):
     driverId: str = Field(..., description="시뮬레이션할 드라이버 ID")
     pitLossSeconds: float = Field(..., description="피트 스톱 시 예상 손실 시간 (초 단위)")
     scenarios: List[Scenario] = Field(..., description="비교 분석할 전략 시나리오 리스트")
+    optimize: bool = Field(False, description="True이면 가능한 모든 전략을 탐색하여 최적 전략을 계산 (False이면 시나리오 중 최소값)")
+    maxStops: int = Field(2, ge=1, le=4, description="최적 전략 탐색 시 허용할 최대 피트 스톱 횟수")
+    monteCarloRuns: int = Field(0, ge=0, le=100000, description="몬테카를로 시뮬레이션 반복 횟수 (0이면 실행하지 않음)")
+    randomSeed: Optional[int] = Field(None, description="몬테카를로 난수 시드 (같은 값이면 같은 결과)")
+    fuelCorrected: bool = Field(False, description="연료 감소 효과를 보정한 타이어 성능 저하 모델 사용")
+
+# 배치 요청 하나에 담을 수 있는 최대 요청 수 (넘으면 422)
+BATCH_MAX_ITEMS = int(os.getenv("F1SIM_BATCH_MAX_ITEMS", "200"))
+
+class BatchSimulationRequest(BaseModel):
+    """ API: POST /api/simulate/batch 요청 본문 """
+    items: List[SimulationRequest] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS,
+        description="시뮬레이션 요청 목록 (여러 레이스/드라이버 혼합 가능, 최대 F1SIM_BATCH_MAX_ITEMS개)"
+    )
 
 # --- 시뮬레이션 응답 모델 (Response) ---
 
@@ -64,8 +80,111 @@ class RaceEvent(BaseModel):
     startLap: int = Field(..., description="이벤트 발생 시작 랩")
     endLap: int = Field(..., description="이벤트 종료 랩")
 
+class ScenarioDistribution(BaseModel):
+    """ 몬테카를로 시뮬레이션에서 시나리오 하나의 총 시간 분포 """
+    name: str = Field(..., description="전략 시나리오 이름")
+    meanTime: float = Field(..., description="총 레이스 시간 평균 (초)")
+    p50Time: float = Field(..., description="총 레이스 시간 중앙값 (초)")
+    p90Time: float = Field(..., description="총 레이스 시간 90 백분위수 (초)")
+    winProbability: float = Field(..., description="전체 시나리오 중 가장 빠를 확률 (0~1)")
+
+class MonteCarloResult(BaseModel):
+    """ 몬테카를로 시뮬레이션 결과 """
+    runs: int = Field(..., description="시뮬레이션한 레이스 횟수")
+    scenarios: List[ScenarioDistribution] = Field(..., description="시나리오별 총 시간 분포")
+
 class SimulationResponse(BaseModel):
     """ API: POST /api/simulate 응답 본문 """
     reportId: str = Field(..., description="리포트 고유 ID (UUID)")
     results: Dict[str, Union[StrategyResult, List[StrategyResult]]] = Field(..., description="시뮬레이션 결과 모음 (실제, 최적, 사용자 정의 시나리오)")
-    raceEvents: List[RaceEvent] = Field(..., description="경기 중 발생한 특이사항(SC 등) 목록")
\ No newline at end of file
+    raceEvents: List[RaceEvent] = Field(..., description="경기 중 발생한 특이사항(SC 등) 목록")
+    monteCarlo: Optional[MonteCarloResult] = Field(None, description="몬테카를로 시뮬레이션 결과 (monteCarloRuns > 0일 때)")
+
+# --- 전략 수정 (what-if) 모델 ---
+
+class WhatIfRequest(BaseModel):
+    """ API: POST /api/simulate/{reportId}/whatif 요청 본문 """
+    scenarioName: str = Field(..., description="수정할 시나리오 이름 (기존 결과의 name)")
+    stints: List[StintRequest] = Field(..., min_length=1, description="수정된 스틴트 목록 (endLap = 피트 스톱 랩, 생략하면 기존 스틴트의 값 유지)")
+
+class WhatIfResponse(BaseModel):
+    """ API: POST /api/simulate/{reportId}/whatif 응답 본문 """
+    reportId: str = Field(..., description="기준 리포트 ID")
+    result: StrategyResult = Field(..., description="수정된 시나리오의 시뮬레이션 결과")
+    previousTotalTime: float = Field(..., description="수정 전 총 레이스 시간 (초)")
+    recomputedFromLap: int = Field(..., description="다시 계산을 시작한 랩 (이전 랩은 기존 결과 재사용)")
+
+# --- 필드 전체 (다중 차량) 시뮬레이션 모델 ---
+
+class DriverStrategy(BaseModel):
+    """ 필드 시뮬레이션에서 한 드라이버의 전략 """
+    driverId: str = Field(..., description="드라이버 ID")
+    stints: List[StintRequest] = Field(..., min_length=1, description="스틴트 목록 (endLap = 피트 스톱 랩, 모두 생략하면 균등 분할)")
+
+class FieldSimulationRequest(BaseModel):
+    """ API: POST /api/simulate/field 요청 본문 """
+    year: int = Field(..., description="시즌 연도 (예: 2024)")
+    raceId: str = Field(..., description="대상 레이스 ID")
+    pitLossSeconds: float = Field(..., description="피트 스톱 시 예상 손실 시간 (초 단위)")
+    strategies: List[DriverStrategy] = Field([], description="실제 전략 대신 사용할 드라이버별 전략 (나머지 드라이버는 실제 전략)")
+    grid: Optional[List[str]] = Field(None, description="출발 순서 (드라이버 ID 목록, 생략하면 기준 랩 타임 순)")
+    fuelCorrected: bool = Field(False, description="연료 감소 효과를 보정한 타이어 성능 저하 모델 사용")
+
+class FieldDriverResult(BaseModel):
+    """ 필드 시뮬레이션에서 한 드라이버의 결과 """
+    driverId: str = Field(..., description="드라이버 ID")
+    position: int = Field(..., description="최종 순위 (1부터)")
+    totalTime: float = Field(..., description="완주(또는 리타이어) 시점의 누적 시간 (초, 출발 위치 간격 포함)")
+    gapToLeader: Optional[float] = Field(None, description="우승자와의 시간 차 (초, 랩 다운/리타이어는 None)")
+    lapsCompleted: int = Field(..., description="완료한 랩 수")
+    pitLaps: List[int] = Field(..., description="피트 스톱 랩 번호 목록")
+    trafficLossSeconds: float = Field(..., description="더티 에어와 추월 지연으로 잃은 총 시간 (초)")
+    lapTimes: List[float] = Field(..., description="각 랩 소요 시간 (트래픽 영향 포함)")
+    positionsByLap: List[int] = Field(..., description="각 랩 종료 시점의 순위")
+
+class FieldSimulationResponse(BaseModel):
+    """ API: POST /api/simulate/field 응답 본문 """
+    totalLaps: int = Field(..., description="레이스 전체 랩 수")
+    results: List[FieldDriverResult] = Field(..., description="최종 순위순 드라이버별 결과")
+
+# --- 파라미터 민감도 스윕 모델 ---
+
+class SweepRange(BaseModel):
+    """ 스윕할 파라미터의 등간격 구간 """
+    start: float = Field(..., description="시작 값")
+    stop: float = Field(..., description="끝 값 (포함)")
+    steps: int = Field(..., ge=2, le=500, description="구간을 나눌 점의 수")
+
+    @model_validator(mode="after")
+    def _check_order(self):
+        # 랩 테이블/세션 번들을 준비하기 전에 요청 검증 단계(422)에서 거절
+        if not self.start < self.stop:
+            raise ValueError("start는 stop보다 작아야 합니다.")
+        return self
+
+class SweepRequest(BaseModel):
+    """ API: POST /api/simulate/sweep 요청 본문 """
+    year: int = Field(..., description="시즌 연도 (예: 2024)")
+    raceId: str = Field(..., description="대상 레이스 ID")
+    driverId: str = Field(..., description="시뮬레이션할 드라이버 ID")
+    scenarios: List[Scenario] = Field(..., min_length=1, description="비교할 전략 시나리오 리스트")
+    pitLossSeconds: SweepRange = Field(SweepRange(start=18.0, stop=28.0, steps=21), description="피트 스톱 손실 시간 구간 (초)")
+    degradationScale: SweepRange = Field(SweepRange(start=0.7, stop=1.3, steps=13), description="타이어 성능 저하율 배율 구간 (1.0 = 적합한 모델 그대로)")
+    fuelCorrected: bool = Field(False, description="연료 감소 효과를 보정한 타이어 성능 저하 모델 사용")
+
+class Crossover(BaseModel):
+    """ 최선 전략이 바뀌는 지점 """
+    axis: str = Field(..., description="변하는 파라미터 ('pitLossSeconds' 또는 'degradationScale')")
+    value: float = Field(..., description="최선 전략이 바뀌는 파라미터 값 (두 전략의 총 시간이 같아지는 지점)")
+    fixedValue: float = Field(..., description="고정된 다른 파라미터의 값")
+    fromScenario: str = Field(..., description="값이 작은 쪽의 최선 전략")
+    toScenario: str = Field(..., description="값이 큰 쪽의 최선 전략")
+
+class SweepResponse(BaseModel):
+    """ API: POST /api/simulate/sweep 응답 본문 """
+    scenarios: List[str] = Field(..., description="시나리오 이름 (totalTimes 첫 번째 축 순서)")
+    pitLossSeconds: List[float] = Field(..., description="피트 손실 격자 값 (두 번째 축)")
+    degradationScale: List[float] = Field(..., description="성능 저하 배율 격자 값 (세 번째 축)")
+    totalTimes: List[List[List[float]]] = Field(..., description="총 레이스 시간 (시나리오 x 피트 손실 x 성능 저하 배율, 초)")
+    best: List[List[int]] = Field(..., description="격자 점별 최선 시나리오 인덱스 (피트 손실 x 성능 저하 배율)")
+    crossovers: List[Crossover] = Field(..., description="격자 축을 따라 최선 전략이 바뀌는 지점")
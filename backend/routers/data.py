@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from models.simulation import RaceInfo, DriverInfo
-# --- services 임포트 ---
-from services import data_service 
+from core.lazy import lazy_import
+# --- services 임포트 (FastF1/pandas를 불러오므로 첫 요청 시점에 import) ---
+data_service = lazy_import("services.data_service")
 
 router = APIRouter()
 
@@ -14,7 +15,8 @@ async def get_races(year: int):
     프론트엔드의 '경기 데이터 선택' 드롭다운을 구성하는 데 사용됩니다.
     """
     
-    races = data_service.get_races_for_year(year)
+    # 스케줄 조회는 블로킹 I/O이므로 I/O 스레드 풀에서 실행 (동시 요청은 한 번의 로드로 병합)
+    races = await data_service.fetch_races_for_year(year)
     
     if not races:
         raise HTTPException(status_code=404, detail="Data not found for the selected year")
@@ -28,7 +30,8 @@ async def get_drivers(year: int, race_id: str):
     프론트엔드의 '드라이버 선택' 드롭다운을 구성하는 데 사용됩니다.
     """
     
-    drivers = data_service.get_drivers_for_race(year, race_id)
+    # 세션 로드는 블로킹 I/O이므로 I/O 스레드 풀에서 실행 (동시 요청은 한 번의 로드로 병합)
+    drivers = await data_service.fetch_drivers_for_race(year, race_id)
     
     if not drivers:
         raise HTTPException(status_code=404, detail="Data not found for the selected race")
@@ -1,13 +1,42 @@
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException
-from models.simulation import SimulationRequest, SimulationResponse
-from services import simulation_service
+import os
+import time
+from collections import defaultdict
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from models.simulation import (
+    SimulationRequest, SimulationResponse, BatchSimulationRequest, WhatIfRequest, WhatIfResponse,
+    FieldSimulationRequest, FieldSimulationResponse, SweepRequest, SweepResponse
+)
+from core import admission, executor, metrics
+from core.lazy import lazy_import
+
+# 서비스/인코딩 모듈은 pandas, NumPy, FastF1을 불러오므로 첫 요청(또는 시작 후 미리 로드) 시점에 import
+data_service = lazy_import("services.data_service")
+result_cache = lazy_import("services.result_cache")
+simulation_service = lazy_import("services.simulation_service")
+sweep_service = lazy_import("services.sweep_service")
+whatif_service = lazy_import("services.whatif_service")
+encoding = lazy_import("core.encoding")
 
 router = APIRouter()
 
+# 배치 요청에서 한 프로세스 작업으로 묶을 최대 요청 수 (같은 레이스라도 이 단위로 나누어 여러 코어에 분산)
+BATCH_CHUNK_SIZE = int(os.getenv("F1SIM_BATCH_CHUNK_SIZE", "10"))
+# 스트리밍 응답에서 단계가 길어질 때 연결 유지용 주석을 보내는 간격 (로드 밸런서 유휴 타임아웃보다 짧게)
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("F1SIM_STREAM_HEARTBEAT_SECONDS", "10"))
+
 
 @router.post("/api/simulate", response_model=SimulationResponse)
-async def run_simulation(request: SimulationRequest):
+async def run_simulation(
+    request: SimulationRequest,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    lapTimeEncoding: Literal["plain", "delta"] = Query("plain", description="랩 타임 표현 (delta: 밀리초 차이값)")
+):
     """
     [시뮬레이션 실행] POST /api/simulate
     프론트엔드에서 보낸 설정값(연도, 레이스, 드라이버, 타이어 전략 등)을 받아 시뮬레이션을 수행합니다.
@@ -17,13 +46,60 @@ async def run_simulation(request: SimulationRequest):
     - optimal: AI가 계산한 해당 경기의 최적 전략
     - scenarios: 사용자가 직접 구성한 커스텀 전략들의 예측 결과
     - raceEvents: 경기 중 발생한 SC(세이프티카) 등의 이벤트 정보
+
+    응답 형식은 Accept 헤더로 선택합니다: application/json (기본), application/msgpack,
+    application/vnd.apache.arrow.stream. lapTimeEncoding=delta이면 랩 타임을 밀리초 차이값으로 보냅니다.
+    같은 요청의 결과는 캐시에서 재사용하며, ETag가 If-None-Match와 같으면 304를 반환합니다.
     """
 
     try:
         # --- (정상 실행) ---
         # 핵심 기능인 시뮬레이션을 실행하고 결과를 반환하려 시도
-        response = simulation_service.run_simulation(request)
-        return response
+        # 1. 클라이언트가 이미 가진 결과면 304: 요청 키는 저장된 랩 테이블의 데이터 버전만으로 만들 수 있으므로
+        #    세션 로드 전에 확인 (조건부 요청이 콜드 로드를 일으키지 않도록). 응답 형식은 Accept로 달라짐
+        #    ETag에는 응답의 reportId가 들어 있으며, 그 리포트를 계속 수정할 수 있을 때만 304
+        media_type = encoding.negotiate(accept)
+        delta = lapTimeEncoding == "delta"
+        result_key = result_cache.request_key(request)
+        headers = {"Vary": "Accept"}
+        if result_key is not None:
+            report_id = result_cache.matching_report(if_none_match, result_key, media_type, delta)
+            if report_id is not None and await executor.run_io(whatif_service.is_fresh, report_id):
+                headers["ETag"] = result_cache.etag(result_key, media_type, delta, report_id)
+                return Response(status_code=304, headers=headers)
+
+        # 2. 세션 로드(I/O)는 스레드 풀에서 실행하여 랩 테이블을 캐시/저장소에 준비 (동시 요청 병합)
+        with metrics.stage("fetch_lap_table"):
+            lap_table = await data_service.fetch_lap_table(request.year, request.raceId)
+        if lap_table is None:
+            raise HTTPException(status_code=404, detail="Race data not found.")
+
+        # 같은 요청(같은 데이터/모델 버전)의 결과가 있으면 재사용 (방금 처음 저장된 레이스면 이제 키를 만들 수 있음)
+        if result_key is None:
+            result_key = result_cache.request_key(request)
+        response = None
+        if result_key is not None:
+            response = await result_cache.lookup(result_key)
+
+        # 3. 시뮬레이션(CPU)은 프로세스 풀에서 실행 (워커는 저장소의 랩 테이블을 메모리 맵으로 읽음)
+        #    웜 계산 예산 안에서만 실행하고, 예산을 넘으면 503 + Retry-After
+        if response is None:
+            async with admission.warm_compute.slot():
+                with metrics.stage("simulate"):
+                    response = await executor.run_cpu(simulation_service.run_simulation, request)
+            if result_key is not None:
+                await result_cache.store(result_key, response)
+
+        # 결과를 전략 수정(what-if)의 기준으로 등록하고 이 응답의 reportId를 받음
+        # (캐시된 결과를 받은 클라이언트끼리도 수정 상태가 섞이지 않도록 응답마다 다른 reportId)
+        response = await executor.run_io(whatif_service.register, request, response, result_key)
+        if result_key is not None:
+            headers["ETag"] = result_cache.etag(result_key, media_type, delta, response.reportId)
+
+        # 4. 요청한 형식으로 직접 인코딩 (응답 모델 재검증 없이 전송)
+        with metrics.stage("serialize"):
+            content = encoding.encode_response(response, media_type, delta=delta)
+        return Response(content=content, media_type=media_type, headers=headers)
 
     except HTTPException as e:
         # --- (예상된 오류 처리) ---
@@ -37,4 +113,249 @@ async def run_simulation(request: SimulationRequest):
         logging.error(f"시뮬레이션 중 알 수 없는 오류 발생: {e}", exc_info=True)
 
         # 2. "서버 내부 오류(500)"가 발생했음을 클라이언트에게 알림
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+def _sse(event: str, data) -> str:
+    """ Server-Sent Events 메시지 한 건 """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _wait_with_heartbeat(task: asyncio.Future):
+    """ task가 끝날 때까지 STREAM_HEARTBEAT_SECONDS마다 SSE 주석(연결 유지)을 내보냅니다. """
+    while not task.done():
+        done, _ = await asyncio.wait({task}, timeout=STREAM_HEARTBEAT_SECONDS)
+        if not done:
+            yield ": keep-alive\n\n"
+
+
+@router.post("/api/simulate/stream")
+async def run_simulation_stream(request: SimulationRequest, http_request: Request):
+    """
+    [시뮬레이션 스트리밍] POST /api/simulate/stream
+    /api/simulate와 같은 요청을 받아, 진행 상황을 Server-Sent Events(text/event-stream)로 전송합니다.
+
+    이벤트 (data는 JSON):
+    - stage: {stage, elapsedSeconds} 단계 완료 (fetch_lap_table, session_bundle, simulate_scenarios, ...)
+    - scenario: {index, result} 사용자 시나리오 결과
+    - optimal: 최적 전략 결과, monteCarlo: 몬테카를로 결과
+    - result: /api/simulate와 같은 형식의 최종 결과 (마지막 이벤트)
+    - error: {status, detail} (승인 제어로 거절된 경우 retryAfterSeconds 포함)
+
+    클라이언트가 연결을 끊으면 다음 단계부터 실행하지 않습니다.
+    (세션 로드는 같은 레이스의 다른 요청과 공유되므로 끝까지 진행되어 캐시에 저장됩니다.)
+    """
+    started = time.perf_counter()
+
+    def stage_event(name: str) -> str:
+        return _sse("stage", {"stage": name, "elapsedSeconds": round(time.perf_counter() - started, 3)})
+
+    async def stream():
+        pending = None
+        try:
+            # 1. 세션 로드 (I/O 풀, 동시 요청 병합). 콜드 로드 동안에도 연결 유지 주석을 보냄
+            pending = asyncio.ensure_future(data_service.fetch_lap_table(request.year, request.raceId))
+            async for heartbeat in _wait_with_heartbeat(pending):
+                yield heartbeat
+            lap_table = pending.result()
+            if lap_table is None:
+                raise HTTPException(status_code=404, detail="Race data not found.")
+            yield stage_event("fetch_lap_table")
+
+            # 2. 같은 요청의 결과가 캐시에 있으면 바로 전송
+            result_key = result_cache.request_key(request)
+            response = await result_cache.lookup(result_key) if result_key is not None else None
+
+            # 3. 단계별 실행: 한 단계씩 I/O 풀에서 진행하고, 단계 사이에 연결이 끊겼으면 중단 (웜 계산 예산 안에서)
+            #    최적화/몬테카를로처럼 CPU 위주인 단계는 /api/simulate와 같이 프로세스 풀에서 실행
+            if response is None:
+                steps = simulation_service.iter_simulation(lap_table, request)
+                value = None
+                async with admission.warm_compute.slot():
+                    while True:
+                        if await http_request.is_disconnected():
+                            logging.info("스트리밍 시뮬레이션 취소됨 (클라이언트 연결 끊김)")
+                            return
+                        pending = asyncio.ensure_future(executor.run_io(simulation_service.advance, steps, value))
+                        async for heartbeat in _wait_with_heartbeat(pending):
+                            yield heartbeat
+                        step = pending.result()
+                        value = None
+                        if step is None:
+                            break
+                        event, payload = step
+                        if event == "compute":
+                            pending = asyncio.ensure_future(executor.run_cpu(simulation_service.run_stage, *payload))
+                            async for heartbeat in _wait_with_heartbeat(pending):
+                                yield heartbeat
+                            value = pending.result()
+                            continue
+                        if event == "result":
+                            response = payload
+                            break
+                        if event == "stage":
+                            yield stage_event(payload)
+                        elif event == "scenario":
+                            index, result = payload
+                            yield _sse("scenario", {"index": index, "result": result.model_dump(mode="json")})
+                        else:
+                            yield _sse(event, payload.model_dump(mode="json") if payload is not None else None)
+
+                if result_key is not None:
+                    await result_cache.store(result_key, response)
+
+            response = await executor.run_io(whatif_service.register, request, response, result_key)
+            yield _sse("result", response.model_dump(mode="json"))
+
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            if e.headers and "Retry-After" in e.headers:
+                error["retryAfterSeconds"] = int(e.headers["Retry-After"])
+            yield _sse("error", error)
+        except Exception as e:
+            logging.error(f"스트리밍 시뮬레이션 중 알 수 없는 오류 발생: {e}", exc_info=True)
+            yield _sse("error", {"status": 500, "detail": f"Internal Server Error: {e}"})
+        finally:
+            # 연결이 끊겨 스트림이 취소되면, 아직 시작하지 않은 단계 실행도 취소
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/api/simulate/{report_id}/whatif", response_model=WhatIfResponse)
+async def run_whatif(report_id: str, request: WhatIfRequest):
+    """
+    [전략 수정] POST /api/simulate/{reportId}/whatif
+    기존 시뮬레이션 결과의 시나리오 하나에서 피트 랩/컴파운드를 바꾼 결과를 계산합니다.
+    바뀐 스틴트의 시작 랩부터만 다시 계산하고, 그 이전 랩의 누적 시간은 기존 결과를 재사용합니다.
+    세션을 다시 로드하거나 성능 저하 모델을 다시 적합하지 않습니다.
+    같은 리포트에 대한 수정은 누적되며, 다음 수정은 직전 수정 결과를 기준으로 합니다.
+    """
+    try:
+        with metrics.stage("whatif"):
+            return await executor.run_io(whatif_service.apply_edit, report_id, request)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logging.error(f"전략 수정 계산 중 알 수 없는 오류 발생: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+@router.post("/api/simulate/field", response_model=FieldSimulationResponse)
+async def run_field_simulation(request: FieldSimulationRequest):
+    """
+    [필드 시뮬레이션] POST /api/simulate/field
+    레이스의 모든 드라이버를 랩 단위로 함께 시뮬레이션합니다 (드라이버 x 랩 행렬).
+    앞 차와의 간격에 따른 더티 에어 손실과, 충분히 빠르지 않으면 추월하지 못하는 제약을 적용하여
+    언더컷이나 트래픽 속 피트 아웃의 효과를 반영합니다.
+    strategies에 없는 드라이버는 실제 전략을 사용합니다.
+
+    반환값: 최종 순위순 드라이버별 결과 (총 시간, 순위 변화, 트래픽 손실 시간 등)
+    """
+    try:
+        with metrics.stage("fetch_lap_table"):
+            lap_table = await data_service.fetch_lap_table(request.year, request.raceId)
+        if lap_table is None:
+            raise HTTPException(status_code=404, detail="Race data not found.")
+
+        async with admission.warm_compute.slot():
+            with metrics.stage("simulate"):
+                return await executor.run_cpu(simulation_service.run_field_simulation, request)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logging.error(f"필드 시뮬레이션 중 알 수 없는 오류 발생: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+@router.post("/api/simulate/sweep", response_model=SweepResponse)
+async def run_sweep(request: SweepRequest):
+    """
+    [민감도 스윕] POST /api/simulate/sweep
+    피트 손실 시간과 타이어 성능 저하 배율의 격자 전체에서 모든 시나리오의 총 시간을 한 번에 계산합니다.
+    /api/simulate를 격자 점마다 반복 호출하는 대신 사용합니다.
+
+    반환값:
+    - totalTimes: 시나리오 x 피트 손실 x 배율 총 시간 행렬
+    - best: 격자 점별 최선 시나리오 인덱스
+    - crossovers: 최선 전략이 바뀌는 정확한 파라미터 값
+    """
+    try:
+        with metrics.stage("fetch_lap_table"):
+            lap_table = await data_service.fetch_lap_table(request.year, request.raceId)
+        if lap_table is None:
+            raise HTTPException(status_code=404, detail="Race data not found.")
+
+        async with admission.warm_compute.slot():
+            with metrics.stage("simulate"):
+                return await executor.run_cpu(sweep_service.run_sweep, request)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logging.error(f"민감도 스윕 중 알 수 없는 오류 발생: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+@router.post("/api/simulate/batch")
+async def run_simulation_batch(request: BatchSimulationRequest):
+    """
+    [배치 시뮬레이션] POST /api/simulate/batch
+    여러 (연도, 레이스, 드라이버, 시나리오) 요청을 한 번에 처리합니다.
+    요청은 레이스별로 묶여 세션을 한 번만 로드하고, 묶음 단위로 프로세스 풀에 분산됩니다.
+    
+    반환값 (application/x-ndjson, 묶음이 끝나는 대로 한 줄씩 전송):
+    - index: 요청 목록에서의 순번
+    - response: 성공 시 /api/simulate와 같은 형식의 결과
+    - error: 실패 시 {status, detail}
+    """
+
+    # 1. 레이스별로 요청을 묶고, 큰 묶음은 BATCH_CHUNK_SIZE 단위로 나눔
+    groups = defaultdict(list)
+    for index, item in enumerate(request.items):
+        groups[(item.year, str(item.raceId))].append((index, item))
+
+    chunks = []
+    for (year, race_id), items in groups.items():
+        for start in range(0, len(items), BATCH_CHUNK_SIZE):
+            chunks.append((year, race_id, items[start:start + BATCH_CHUNK_SIZE]))
+
+    async def run_chunk(year, race_id, items):
+        try:
+            # 세션 로드는 I/O 풀에서 레이스당 한 번 (같은 레이스의 다른 묶음과 병합)
+            await data_service.fetch_lap_table(year, race_id)
+            # 묶음마다 웜 계산 슬롯 하나를 사용 (큰 배치가 프로세스 풀을 독차지하지 않도록)
+            async with admission.warm_compute.slot():
+                return await executor.run_cpu(simulation_service.run_simulation_group, items)
+        except HTTPException as e:
+            # 콜드 로드/웜 계산 예산 초과(503) 등: 묶음의 각 요청에 같은 오류를 기록
+            return [
+                {
+                    "index": index, "year": item.year, "raceId": item.raceId, "driverId": item.driverId,
+                    "error": {"status": e.status_code, "detail": e.detail},
+                }
+                for index, item in items
+            ]
+        except Exception as e:
+            logging.error(f"배치 시뮬레이션 묶음 실패 ({year} {race_id}): {e}", exc_info=True)
+            return [
+                {
+                    "index": index, "year": item.year, "raceId": item.raceId, "driverId": item.driverId,
+                    "error": {"status": 500, "detail": f"Internal Server Error: {e}"},
+                }
+                for index, item in items
+            ]
+
+    async def stream():
+        # 2. 모든 묶음을 동시에 시작하고, 끝나는 순서대로 결과를 전송
+        tasks = [asyncio.ensure_future(run_chunk(*chunk)) for chunk in chunks]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for output in await finished:
+                    yield json.dumps(output, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
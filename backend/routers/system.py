@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from core import admission, executor, memory_cache
+from core.lazy import lazy_import
+
+data_service = lazy_import("services.data_service")
+
+router = APIRouter()
+
+@router.get("/api/system/executor")
+async def get_executor_stats():
+    """
+    [실행 풀 상태 조회] GET /api/system/executor
+    I/O 스레드 풀과 시뮬레이션 프로세스 풀의 동시 실행 수와 대기열 길이를 반환합니다.
+    """
+    return executor.get_stats()
+
+@router.get("/api/system/admission")
+async def get_admission_stats():
+    """
+    [승인 제어 상태 조회] GET /api/system/admission
+    콜드 로드(coldLoad)와 웜 계산(warmCompute) 예산별 동시 실행 수, 대기열 길이,
+    승인/거절(503) 횟수와 현재 Retry-After 예상값을 반환합니다.
+    """
+    return admission.get_all_stats()
+
+@router.get("/api/system/singleflight")
+async def get_singleflight_stats():
+    """
+    [로더 상태 조회] GET /api/system/singleflight
+    레이스 데이터/스케줄 로더의 적중(hits), 미스(misses), 병합된 대기(coalesced) 횟수를 반환합니다.
+    """
+    return data_service.get_loader_stats()
+
+@router.get("/api/system/cache")
+async def get_cache_stats():
+    """
+    [메모리 캐시 상태 조회] GET /api/system/cache
+    캐시별 항목 수, 사용 용량(바이트), 적중/미스, 용량 초과 제거 및 만료 횟수를 반환합니다.
+    """
+    return memory_cache.get_all_stats()
+
+@router.delete("/api/system/cache/{name}")
+async def clear_cache(name: str):
+    """
+    [메모리 캐시 비우기] DELETE /api/system/cache/{name}
+    지정한 캐시(예: lapTable, schedule, drivers)의 모든 항목을 제거합니다.
+    """
+    cache = memory_cache.get_cache(name)
+    if cache is None:
+        raise HTTPException(status_code=404, detail=f"Cache not found: {name}")
+    cache.clear()
+    return cache.stats()
+
+@router.delete("/api/system/races/{year}/{race_id}")
+async def invalidate_race(year: int, race_id: str):
+    """
+    [레이스 캐시 무효화] DELETE /api/system/races/{year}/{race_id}
+    레이스를 다시 준비(ingest --force)한 뒤 호출하면, 해당 레이스의 랩 테이블, 드라이버 목록,
+    성능 저하 모델, 세션 번들과 메모리의 시뮬레이션 결과를 버리고 다음 요청에서 새 데이터로 다시 읽습니다.
+    """
+    invalidated = await executor.run_io(data_service.invalidate_race, year, race_id)
+    return {"year": year, "raceId": race_id, "invalidated": invalidated}
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    [Prometheus 메트릭] GET /metrics
+    단계별 소요 시간 히스토그램(f1sim_stage_seconds), 요청 소요 시간, 메모리 캐시 적중/미스,
+    FastF1 다운로드 바이트를 Prometheus 텍스트 형식으로 반환합니다.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
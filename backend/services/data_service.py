@@ -1,31 +1,88 @@
-import fastf1 as ff1
 import logging
-from typing import List
+import os
+import threading
+import pandas as pd
+from dataclasses import dataclass
+from typing import List, Optional
 from models.simulation import RaceInfo, DriverInfo
-from functools import lru_cache
-from datetime import datetime # [추가] 날짜 비교를 위해 임포트
+from core import admission, derived_store, metrics
+from core.cache import get_fastf1, record_session_access
+from core.memory_cache import MemoryCache
+from core.singleflight import SingleFlight
+from services import degradation
+from datetime import datetime, timedelta # [추가] 날짜 비교를 위해 임포트
 
-@lru_cache(maxsize=20) 
-def load_race_data(year: int, race_id: str):
+# 시뮬레이터가 실제로 사용하는 랩 컬럼 (압축 랩 테이블 구성)
+LAP_TABLE_COLUMNS = [
+    'Driver', 'LapNumber', 'LapTime', 'Compound', 'TyreLife', 'Stint',
+    'PitInTime', 'PitOutTime', 'TrackStatus', 'IsAccurate'
+]
+
+# --- 메모리 캐시 설정 (용량/TTL 제한) ---
+_MB = 1024 * 1024
+
+# 압축 랩 테이블: 레이스당 수십 KB~수 MB, 용량 한도 내에서 LRU
+lap_table_cache = MemoryCache(
+    "lapTable",
+    max_bytes=int(os.getenv("F1SIM_LAP_TABLE_CACHE_MB", "256")) * _MB,
+    ttl=None,
+    negative_ttl=60.0,
+)
+# 연도별 스케줄: 새로 열린 경기가 목록에 반영되도록 주기적으로 만료
+schedule_cache = MemoryCache(
+    "schedule",
+    max_bytes=4 * _MB,
+    ttl=float(os.getenv("F1SIM_SCHEDULE_TTL_SECONDS", "3600")),
+    negative_ttl=60.0,
+)
+# 레이스별 드라이버 목록
+drivers_cache = MemoryCache("drivers", max_bytes=4 * _MB, ttl=None, negative_ttl=60.0)
+
+def _race_key(year: int, race_id: str):
+    return (year, str(race_id))
+
+@dataclass
+class LapTable:
+    """
+    세션 하나의 압축 랩 테이블.
+    FastF1 세션 객체(텔레메트리, 위치 데이터 포함) 대신 이 테이블만 메모리에 유지합니다.
+    시간 컬럼은 모두 초(float) 단위입니다: LapTimeSeconds, PitInTime, PitOutTime.
     """
-    (수정됨) FastF1 세션 데이터를 로드합니다 (캐시 활용).
+    year: int
+    race_id: str
+    laps: pd.DataFrame
+    drivers: List[str]  # 결과(results)에 기록된 드라이버 약어 (예: 'VER')
+
+    def pick_driver(self, driver_id: str) -> pd.DataFrame:
+        """ 특정 드라이버의 랩만 골라 반환합니다. """
+        return self.laps[self.laps['Driver'] == driver_id].reset_index(drop=True)
+
+
+def load_race_data(year: int, race_id: str, telemetry: bool = False):
+    """
+    (수정됨) FastF1 세션 데이터를 로드합니다.
+    기본값은 랩/결과/트랙 상태만 로드하는 경량 모드이며,
+    텔레메트리·날씨·메시지 데이터는 telemetry=True로 요청한 경우에만 로드합니다.
     """
     try:
         # --- 수정된 부분 1 ---
         # race_id (str)를 int로 변환하여 fastf1이 정확한 라운드를 찾도록 함
-        session = ff1.get_session(year, int(race_id), 'R')
+        session = get_fastf1().get_session(year, int(race_id), 'R')
         # --------------------
         
         # --- 수정된 부분 2 ---
-        # session.load_laps(with_telemetry=True) -> session.load()
-        session.load(laps=True, telemetry=True)
+        # 경량 모드: laps=True만 로드 (트랙 상태 포함), 결과는 항상 로드됨
+        session.load(laps=True, telemetry=telemetry, weather=telemetry, messages=telemetry)
         # --------------------
+
+        # 디스크 캐시 인덱스에 이 세션의 크기/접근 시간 기록 (용량 초과 시 오래된 세션 정리)
+        record_session_access(session)
         
         return session
     
     # --- 수정된 부분 3 ---
-    # except ff1.api.SessionNotAvailableError -> ff1.errors.SessionNotAvailableError
-    except ff1.errors.SessionNotAvailableError: 
+    # fastf1 3.x에는 errors 모듈이 없음: 없는 라운드/세션은 get_session이 ValueError를 발생시킴
+    except ValueError: 
     # --------------------
         logging.warning(f"{year} {race_id} 세션을 찾을 수 없습니다.")
         return None
@@ -34,88 +91,276 @@ def load_race_data(year: int, race_id: str):
         logging.error(f"세션 로드 중 오류 발생: {e}", exc_info=True)
         return None
 
-# 연도별 레이스 목록 (중복 제거됨)
-@lru_cache(maxsize=5)
-def get_races_for_year(year: int) -> List[RaceInfo]:
+def build_lap_table(year: int, race_id: str, session) -> LapTable:
+    """ 로드된 세션에서 필요한 컬럼만 추려 압축 랩 테이블을 만듭니다. """
+    laps = pd.DataFrame(session.laps).reindex(columns=LAP_TABLE_COLUMNS)
+
+    # Timedelta 컬럼을 초 단위 float으로 변환
+    laps['LapTimeSeconds'] = laps.pop('LapTime').dt.total_seconds()
+    laps['PitInTime'] = laps['PitInTime'].dt.total_seconds()
+    laps['PitOutTime'] = laps['PitOutTime'].dt.total_seconds()
+
+    laps['IsAccurate'] = laps['IsAccurate'].fillna(False).astype(bool)
+    for column in ('Driver', 'Compound', 'TrackStatus'):
+        laps[column] = laps[column].astype('category')
+
+    drivers = []
+    if session.results is not None and 'Abbreviation' in session.results:
+        drivers = [str(d) for d in session.results['Abbreviation'].dropna() if str(d)]
+
+    return LapTable(
+        year=year,
+        race_id=str(race_id),
+        laps=laps.reset_index(drop=True),
+        drivers=drivers
+    )
+
+@lap_table_cache.cached(key=_race_key)
+def get_lap_table(year: int, race_id: str) -> Optional[LapTable]:
     """
-    (수정됨) fastf1을 사용하여 해당 연도의 레이스 스케줄을 가져옵니다.
-    [수정] 아직 열리지 않은(데이터가 없는) 미래의 경기는 목록에서 제외합니다.
+    레이스의 압축 랩 테이블을 반환합니다 (캐시 활용).
+    1) 디스크 저장소(derived_store)에 있으면 메모리 맵으로 열고,
+    2) 없으면 FastF1 세션을 로드해 만든 뒤 저장소에 기록합니다.
+    세션을 로드할 수 없으면 None을 반환합니다.
     """
+    with metrics.stage("read_lap_table"):
+        stored = derived_store.read_lap_table(year, race_id)
+    if stored is not None:
+        laps, metadata = stored
+        return LapTable(year=year, race_id=str(race_id), laps=laps, drivers=metadata["drivers"])
+
+    with metrics.stage("load_race_data"):
+        session = load_race_data(year, race_id)
+    if session is None:
+        return None
+
     try:
-        logging.info(f"[data_service] {year}년 스케줄 로드 시도...")
-        schedule = ff1.get_event_schedule(year)
-        
-        if schedule.empty:
-            logging.warning(f"[data_service] {year}년 스케줄이 비어있습니다.")
-            return []
-
-        races = []
-        # [추가] 현재 시간 가져오기
-        now = datetime.now()
-
-        for _, event in schedule.iterrows():
-            # 'Session5' 접근 대신, 이벤트 이름을 확인합니다.
-            event_name_lower = str(event['EventName']).lower() 
-            
-            # 'test'나 'season' 같은 비-레이스 이벤트를 건너뜁니다.
-            if 'test' in event_name_lower or 'pre-season' in event_name_lower or 'season launch' in event_name_lower:
-                continue
-            
-            # RoundNumber가 숫자가 아닌 경우(예: 'TBC')를 대비합니다.
-            round_num_str = str(event['RoundNumber'])
-            if not round_num_str.isdigit():
-                continue
-            # --------------------------
-
-            # [추가] 아직 열리지 않은 경기(미래 날짜)는 데이터가 없으므로 제외
-            # EventDate는 해당 그랑프리의 메인 레이스 날짜입니다.
-            if event['EventDate'] > now:
-                continue
-                
-            # 상세 정보 매핑 추가
-            races.append(
-                RaceInfo(
-                    raceId=round_num_str, 
-                    name=event['EventName'],
-                    round=int(round_num_str),
-                    # 추가된 필드들
-                    date=event['EventDate'],
-                    location=event['Location'],
-                    officialName=event['OfficialEventName']
-                )
-            )
-        
-        logging.info(f"[data_service] {year}년 {len(races)}개 레이스를 찾았습니다.")
-        
-        races.sort(key=lambda r: r.round)
-        return races
-        
+        with metrics.stage("build_lap_table"):
+            lap_table = build_lap_table(year, race_id, session)
+    except Exception as e:
+        logging.error(f"{year} {race_id} 랩 테이블 생성 실패: {e}", exc_info=True)
+        return None
+
+    derived_store.write_lap_table(year, race_id, lap_table.laps, {"drivers": lap_table.drivers})
+    record_race_drivers(year, race_id, lap_table.drivers)
+    return lap_table
+
+# --- 시즌 메타데이터 인덱스 ---
+# 연도별 라운드, 이벤트 정보, 라운드별 드라이버 약어를 derived 저장소의 JSON 하나에 모아 둡니다.
+# 레이스/드라이버 목록 API는 이 인덱스만 읽으며, 세션(랩, 텔레메트리)을 로드하지 않습니다.
+
+# 현재(또는 이후) 시즌의 스케줄을 다시 받아 일정 변경을 반영하는 주기
+SEASON_SCHEDULE_REFRESH_HOURS = float(os.getenv("F1SIM_SEASON_SCHEDULE_REFRESH_HOURS", "24"))
+
+# 시즌 인덱스: 연도당 수 KB
+season_index_cache = MemoryCache("seasonIndex", max_bytes=4 * _MB, ttl=None, negative_ttl=60.0)
+# 인덱스 갱신(드라이버 기록, 스케줄 재구성)은 한 번에 하나씩
+_season_index_lock = threading.RLock()
+
+def _schedule_entries(year: int) -> List[dict]:
+    """
+    FastF1 스케줄에서 레이스 라운드만 골라 인덱스 항목으로 만듭니다.
+    아직 열리지 않은 경기도 포함하며, 날짜 필터는 조회 시점에 적용합니다.
+    """
+    with metrics.stage("load_schedule"):
+        schedule = get_fastf1().get_event_schedule(year)
+    if schedule.empty:
+        logging.warning(f"[data_service] {year}년 스케줄이 비어있습니다.")
+        return []
+
+    # 'test'나 'season' 같은 비-레이스 이벤트와, RoundNumber가 숫자가 아닌 경우(예: 'TBC')를 제외
+    event_name_lower = schedule['EventName'].astype(str).str.lower()
+    is_race = ~event_name_lower.str.contains('test|pre-season|season launch', regex=True)
+    round_num_str = schedule['RoundNumber'].astype(str)
+    has_round = round_num_str.str.isdigit()
+    has_date = schedule['EventDate'].notna()
+
+    selected = schedule[is_race & has_round & has_date]
+    return [
+        {
+            "raceId": race_id,
+            "name": name,
+            "round": int(race_id),
+            "date": pd.Timestamp(date).isoformat(),
+            "location": location,
+            "officialName": official_name,
+            "drivers": None,  # 처음 조회할 때 결과(results)에서 채움
+        }
+        for race_id, name, date, location, official_name in zip(
+            round_num_str[selected.index],
+            selected['EventName'],
+            selected['EventDate'],
+            selected['Location'],
+            selected['OfficialEventName'],
+        )
+    ]
+
+def _needs_schedule_refresh(index: dict) -> bool:
+    """ 지난 시즌은 일정이 바뀌지 않으므로 현재/이후 시즌만 주기적으로 다시 구성합니다. """
+    if index["year"] < datetime.now().year:
+        return False
+    built_at = datetime.fromisoformat(index["builtAt"])
+    return datetime.now() - built_at > timedelta(hours=SEASON_SCHEDULE_REFRESH_HOURS)
+
+def _build_season_index(year: int, previous: Optional[dict] = None) -> Optional[dict]:
+    """ 스케줄로 시즌 인덱스를 (다시) 만들고 저장합니다. 이미 기록된 드라이버 목록은 유지합니다. """
+    try:
+        logging.info(f"[data_service] {year}년 시즌 인덱스 구성...")
+        entries = _schedule_entries(year)
     except Exception as e:
-        # 오류 발생 시 더 자세한 로그를 남깁니다.
         logging.error(f"{year}년 레이스 스케줄 로드 실패: {e}", exc_info=True)
+        return previous
+
+    previous_races = previous["races"] if previous else {}
+    for entry in entries:
+        known = previous_races.get(entry["raceId"])
+        if known is not None:
+            entry["drivers"] = known.get("drivers")
+
+    index = {
+        "year": year,
+        "builtAt": datetime.now().isoformat(),
+        "races": {entry["raceId"]: entry for entry in entries},
+    }
+    if entries:
+        derived_store.write_season_index(year, index)
+    return index
+
+def get_season_index(year: int) -> Optional[dict]:
+    """
+    시즌 인덱스를 반환합니다: 메모리 -> 디스크(derived/seasons) -> 스케줄로 구성 순.
+    스케줄을 구할 수 없으면 None
+    """
+    found, index = season_index_cache.get(year)
+    if found and (index is None or not _needs_schedule_refresh(index)):
+        return index
+
+    with _season_index_lock:
+        found, index = season_index_cache.get(year)
+        if found and (index is None or not _needs_schedule_refresh(index)):
+            return index
+
+        if not found:
+            index = derived_store.read_season_index(year)
+        if index is None or _needs_schedule_refresh(index):
+            index = _build_season_index(year, previous=index)
+        if index is not None and not index["races"]:
+            index = None
+
+        season_index_cache.set(year, index)
+        return index
+
+def peek_season_index(year: int) -> Optional[dict]:
+    """ 이미 만들어진 시즌 인덱스(메모리 또는 디스크)만 반환합니다. 스케줄을 새로 받지 않습니다. """
+    found, index = season_index_cache.get(year)
+    if found:
+        return index
+    with _season_index_lock:
+        found, index = season_index_cache.get(year)
+        if found:
+            return index
+        index = derived_store.read_season_index(year)
+        if index is not None:
+            season_index_cache.set(year, index)
+        return index
+
+def _race_entry(index: Optional[dict], race_id: str) -> Optional[dict]:
+    if not index:
+        return None
+    try:
+        return index["races"].get(str(int(race_id)))
+    except ValueError:
+        return None
+
+def record_race_drivers(year: int, race_id: str, drivers: List[str]):
+    """
+    레이스의 드라이버 약어 목록을 시즌 인덱스에 기록합니다 (랩 테이블 생성, 결과 로드 시).
+    인덱스가 아직 없으면 기록하지 않습니다 (시뮬레이션 경로에서 스케줄을 받지 않도록).
+    """
+    if not drivers:
+        return
+    with _season_index_lock:
+        index = peek_season_index(year)
+        entry = _race_entry(index, race_id)
+        if entry is None or entry.get("drivers") == drivers:
+            return
+        entry["drivers"] = list(drivers)
+        derived_store.write_season_index(year, index)
+
+def load_race_drivers(year: int, race_id: str) -> List[str]:
+    """ 세션의 결과(results)만 로드하여 드라이버 약어 목록을 구합니다 (랩/텔레메트리 없음). """
+    try:
+        with metrics.stage("load_race_results"):
+            session = get_fastf1().get_session(year, int(race_id), 'R')
+            session.load(laps=False, telemetry=False, weather=False, messages=False)
+        record_session_access(session)
+    except Exception as e:
+        logging.error(f"{year} {race_id} 결과 로드 실패: {e}")
+        return []
+
+    if session.results is None or 'Abbreviation' not in session.results:
+        return []
+    return [str(d) for d in session.results['Abbreviation'].dropna() if str(d)]
+
+# 연도별 레이스 목록 (중복 제거됨)
+@schedule_cache.cached()
+def get_races_for_year(year: int) -> List[RaceInfo]:
+    """
+    시즌 인덱스에서 해당 연도의 레이스 목록을 가져옵니다.
+    [수정] 아직 열리지 않은(데이터가 없는) 미래의 경기는 목록에서 제외합니다.
+    """
+    index = get_season_index(year)
+    if not index:
         return []
 
+    # EventDate는 해당 그랑프리의 메인 레이스 날짜입니다.
+    now = datetime.now()
+    races = []
+    for entry in index["races"].values():
+        date = datetime.fromisoformat(entry["date"])
+        if date > now:
+            continue
+        races.append(RaceInfo(
+            raceId=entry["raceId"],
+            name=entry["name"],
+            round=entry["round"],
+            date=date,
+            location=entry["location"],
+            officialName=entry["officialName"]
+        ))
+
+    races.sort(key=lambda r: r.round)
+    return races
+
 # 레이스별 드라이버 목록
-@lru_cache(maxsize=100)
+@drivers_cache.cached(key=_race_key)
 def get_drivers_for_race(year: int, race_id: str) -> List[DriverInfo]:
     """
-    특정 레이스 세션에서 드라이버 목록을 가져옵니다.
+    특정 레이스의 드라이버 목록을 가져옵니다.
+    시즌 인덱스 -> 저장된 랩 테이블의 메타데이터 -> 세션 결과(results)만 로드 순으로 찾고,
+    새로 구한 목록은 인덱스에 기록합니다.
     """
-    session = load_race_data(year, race_id) # race_id는 여기서 str로 전달 (load_race_data가 int로 변환)
-    if not session or session.results is None:
-        return []
+    entry = _race_entry(peek_season_index(year), race_id)
+    drivers = entry.get("drivers") if entry else None
 
+    if drivers is None:
+        metadata = derived_store.read_lap_table_metadata(year, race_id)
+        drivers = metadata["drivers"] if metadata else load_race_drivers(year, race_id)
+        record_race_drivers(year, race_id, drivers)
+
+    return _driver_infos(year, race_id, drivers)
+
+def _driver_infos(year: int, race_id: str, abbreviations: List[str]) -> List[DriverInfo]:
+    """ 드라이버 약어 목록으로 드라이버 목록을 만듭니다. """
     try:
-        drivers = []
-        # session.results에서 드라이버 약어(예: VER, HAM)와 이름을 가져옴
-        for driver in session.drivers:
-            driver_info = session.get_driver(driver)
-            drivers.append(
-                DriverInfo(
-                    driverId=driver_info['Abbreviation'], # "VER"
-                    name=driver_info['Abbreviation']    # "VER"
-                )
+        # 결과(results)의 드라이버 약어(예: VER, HAM)를 사용
+        drivers = [
+            DriverInfo(
+                driverId=abbreviation, # "VER"
+                name=abbreviation    # "VER"
             )
+            for abbreviation in abbreviations
+        ]
         
         # 이름순으로 정렬
         drivers.sort(key=lambda d: d.name)
@@ -123,4 +368,75 @@ def get_drivers_for_race(year: int, race_id: str) -> List[DriverInfo]:
 
     except Exception as e:
         logging.error(f"{year} {race_id} 드라이버 로드 실패: {e}")
-        return []
\ No newline at end of file
+        return []
+
+# --- 비동기 로더 (라우터용, single-flight) ---
+# 같은 레이스/연도를 동시에 요청하면 FastF1 로드는 한 번만 실행되고 나머지 요청은 그 결과를 함께 기다립니다.
+
+def _lap_table_stored(year: int, race_id: str) -> bool:
+    try:
+        return derived_store.lap_table_path(year, race_id).exists()
+    except (OSError, ValueError):
+        return False
+
+def _lap_table_admission(year: int, race_id: str):
+    """ 저장소에 랩 테이블이 없으면 FastF1 세션 로드(콜드)가 필요하므로 콜드 로드 예산을 사용합니다. """
+    return None if _lap_table_stored(year, race_id) else admission.cold_loads
+
+def _drivers_admission(year: int, race_id: str):
+    """
+    메모리의 시즌 인덱스에 드라이버 목록이 없고 랩 테이블(메타데이터)도 저장되지 않았으면
+    세션 결과(results)를 FastF1로 로드해야 하므로 콜드 로드 예산을 사용합니다.
+    (이벤트 루프에서 호출되므로 디스크의 인덱스는 읽지 않음)
+    """
+    found, index = season_index_cache.get(year)
+    entry = _race_entry(index, race_id) if found else None
+    if (entry and entry.get("drivers") is not None) or _lap_table_stored(year, race_id):
+        return None
+    return admission.cold_loads
+
+_lap_table_flight = SingleFlight("lapTable", get_lap_table, admission=_lap_table_admission)
+_races_flight = SingleFlight("schedule", get_races_for_year)
+_drivers_flight = SingleFlight("drivers", get_drivers_for_race, admission=_drivers_admission)
+
+async def fetch_lap_table(year: int, race_id: str) -> Optional[LapTable]:
+    """ get_lap_table의 비동기 버전 (I/O 풀에서 실행, 동시 요청 병합) """
+    return await _lap_table_flight.run(year, race_id)
+
+async def fetch_races_for_year(year: int) -> List[RaceInfo]:
+    """ get_races_for_year의 비동기 버전 (I/O 풀에서 실행, 동시 요청 병합) """
+    return await _races_flight.run(year)
+
+async def fetch_drivers_for_race(year: int, race_id: str) -> List[DriverInfo]:
+    """ get_drivers_for_race의 비동기 버전 (캐시에 있으면 스레드 전환 없이 바로 반환, 결과 로드는 콜드 로드 예산 사용) """
+    return await _drivers_flight.run(year, race_id)
+
+def get_loader_stats() -> dict:
+    """ 비동기 로더의 적중/미스/병합 횟수 """
+    return {
+        _lap_table_flight.name: _lap_table_flight.stats(),
+        _races_flight.name: _races_flight.stats(),
+        _drivers_flight.name: _drivers_flight.stats(),
+    }
+
+def invalidate_race(year: int, race_id: str) -> dict:
+    """
+    레이스 하나의 메모리 캐시(랩 테이블, 드라이버 목록, 성능 저하 모델, 세션 번들)를 무효화합니다.
+    레이스를 다시 준비(ingest --force)한 뒤 실행 중인 서버가 이전 데이터를 계속 쓰지 않도록 합니다.
+    반환값: 캐시 이름 -> 제거한 항목이 있었는지
+    """
+    # simulation_service가 이 모듈을 import 하므로 (순환 import 방지) 호출 시점에 불러옴
+    from services import result_cache, simulation_service
+
+    key = _race_key(year, race_id)
+    invalidated = {
+        lap_table_cache.name: lap_table_cache.invalidate(key),
+        drivers_cache.name: drivers_cache.invalidate(key),
+        degradation.degradation_cache.name: degradation.degradation_cache.invalidate(key),
+        simulation_service.bundle_cache.name: simulation_service.bundle_cache.invalidate(key),
+    }
+    # 결과 캐시 키는 요청 해시라 레이스별로 고를 수 없으므로 메모리 캐시 전체를 비움
+    # (디스크 결과는 데이터 버전이 키에 들어가 있어 랩 테이블이 다시 만들어지면 자동으로 쓰이지 않음)
+    invalidated[result_cache.result_cache.name] = result_cache.result_cache.stats()["entries"] > 0
+    result_cache.result_cache.clear()
+    return invalidated
@@ -0,0 +1,154 @@
+import os
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from core.memory_cache import MemoryCache
+
+# --- 1. 모델 파라미터 ---
+
+# 컴파운드별 기본 성능 저하율 (적합할 랩이 부족할 때 사용)
+DEFAULT_DEGRADATION = {
+    "SOFT": 0.15,
+    "MEDIUM": 0.1,
+    "HARD": 0.08,
+    "INTERMEDIATE": 0.5,
+    "WET": 0.8,
+}
+# (드라이버, 컴파운드) 하나를 적합하는 데 필요한 최소 랩 수
+MIN_LAPS_PER_FIT = 5
+# 이 범위를 벗어난 기울기는 이상값으로 보고 CLAMPED_DEGRADATION으로 대체
+MAX_DEGRADATION = 0.5
+CLAMPED_DEGRADATION = 0.01
+# 적합 자체가 불가능할 때 (모든 랩의 TyreLife가 같은 경우 등)
+FAILED_FIT_DEGRADATION = 0.1
+# 연료가 1랩 분량 줄어들 때 빨라지는 랩 타임 (초)
+FUEL_EFFECT_PER_LAP = float(os.getenv("F1SIM_FUEL_EFFECT_PER_LAP", "0.03"))
+
+_MB = 1024 * 1024
+
+# 세션별 적합 결과: 드라이버 x 컴파운드 수십 행 정도의 작은 테이블
+degradation_cache = MemoryCache(
+    "degradation",
+    max_bytes=int(os.getenv("F1SIM_DEGRADATION_CACHE_MB", "16")) * _MB,
+    ttl=None,
+    negative_ttl=60.0,
+)
+
+
+@dataclass
+class DegradationTable:
+    """
+    세션 하나의 타이어 성능 저하 모델.
+    fits: (Driver, Compound) 인덱스, 컬럼 Laps / Degradation / FuelCorrected (초/랩)
+    field: Compound 인덱스, 같은 컬럼의 드라이버 평균 (해당 드라이버의 적합 결과가 없을 때 사용)
+    models: 조회용 사전 {컬럼: {드라이버(field는 None): {컴파운드: 값}}}
+
+    적합할 랩이 없는 세션도 기본값 모델을 가진 정상 결과이므로, 캐시가 로드 실패로 보지 않도록
+    __len__을 정의하지 않습니다 (정의하면 빈 테이블이 60초마다 다시 적합됨).
+    """
+    fits: pd.DataFrame
+    field: pd.DataFrame
+    models: Dict[str, Dict[Optional[str], Dict[str, float]]]
+
+    def to_records(self) -> List[dict]:
+        """ JSON으로 저장할 수 있는 적합 결과 목록 (table_from_records로 복원) """
+        return self.fits.reset_index().to_dict("records")
+
+# --- 2. 세션 전체 적합 ---
+
+def _clean_laps(laps: pd.DataFrame) -> pd.DataFrame:
+    """ 모델링에 쓰지 않는 랩(SC, VSC, In/Out 랩, 부정확한 랩) 제거 """
+    clean = laps.loc[
+        (laps['TrackStatus'] == '1') &
+        (laps['IsAccurate'] == True) &
+        (laps['PitInTime'].isna()) &
+        (laps['PitOutTime'].isna()),
+        ['Driver', 'Compound', 'LapNumber', 'TyreLife', 'LapTimeSeconds']
+    ].dropna()
+    return clean.assign(
+        Driver=clean['Driver'].astype(str),
+        Compound=clean['Compound'].astype(str),
+    )
+
+
+def _group_slopes(codes: np.ndarray, counts: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """ 그룹별 단순 선형 회귀 기울기 (중심화한 닫힌 해, np.polyfit의 1차 계수와 같음) """
+    mean_x = np.bincount(codes, weights=x) / counts
+    dx = x - mean_x[codes]
+    sxx = np.bincount(codes, weights=dx * dx)
+    sxy = np.bincount(codes, weights=dx * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = sxy / sxx
+
+    slopes = np.where((slopes < 0) | (slopes > MAX_DEGRADATION), CLAMPED_DEGRADATION, slopes)
+    return np.where(np.isfinite(slopes), slopes, FAILED_FIT_DEGRADATION)
+
+
+def fit_degradation_table(laps: pd.DataFrame) -> DegradationTable:
+    """
+    세션의 모든 드라이버/컴파운드에 대해 (TyreLife -> 랩 타임) 기울기를 한 번에 적합합니다.
+    FuelCorrected는 연료 감소로 빨라지는 효과(FUEL_EFFECT_PER_LAP)를 랩 타임에서 되돌린 뒤 적합한 값입니다.
+    """
+    clean = _clean_laps(laps)
+
+    groups = clean.groupby(['Driver', 'Compound'], sort=True)
+    codes = groups.ngroup().to_numpy()
+    counts = groups.size()
+
+    x = clean['TyreLife'].to_numpy(dtype=np.float64)
+    y = clean['LapTimeSeconds'].to_numpy(dtype=np.float64)
+    y_fuel = y + FUEL_EFFECT_PER_LAP * (clean['LapNumber'].to_numpy(dtype=np.float64) - 1)
+
+    n = counts.to_numpy(dtype=np.float64)
+    fits = pd.DataFrame(
+        {
+            "Laps": counts.to_numpy(),
+            "Degradation": _group_slopes(codes, n, x, y),
+            "FuelCorrected": _group_slopes(codes, n, x, y_fuel),
+        },
+        index=counts.index,
+    )
+    return _build_table(fits[fits['Laps'] >= MIN_LAPS_PER_FIT])
+
+
+def table_from_records(records: List[dict]) -> DegradationTable:
+    """ to_records로 저장한 적합 결과에서 테이블을 다시 만듭니다. """
+    fits = pd.DataFrame(records, columns=['Driver', 'Compound', 'Laps', 'Degradation', 'FuelCorrected'])
+    return _build_table(fits.set_index(['Driver', 'Compound']))
+
+
+def _build_table(fits: pd.DataFrame) -> DegradationTable:
+    """ 적합 결과에 드라이버 평균과 조회용 사전을 더해 테이블을 완성합니다. """
+    field = fits.groupby(level='Compound')[['Degradation', 'FuelCorrected']].mean()
+
+    # 요청마다 DataFrame을 조회하지 않도록 기본값 > field > 드라이버 순으로 미리 합쳐 둠
+    models = {}
+    for column in ('Degradation', 'FuelCorrected'):
+        field_model = {**DEFAULT_DEGRADATION, **field[column].astype(float).to_dict()}
+        per_driver = {None: field_model}
+        for (driver, compound), value in fits[column].astype(float).items():
+            per_driver.setdefault(driver, dict(field_model))[compound] = value
+        models[column] = per_driver
+
+    return DegradationTable(fits=fits, field=field, models=models)
+
+
+@degradation_cache.cached(key=lambda year, race_id, laps: (year, str(race_id)))
+def get_degradation_table(year: int, race_id: str, laps: pd.DataFrame) -> DegradationTable:
+    """ 세션별로 한 번만 적합하고 결과를 캐시합니다 (같은 레이스의 반복/배치 요청은 적합을 건너뜀). """
+    return fit_degradation_table(laps)
+
+# --- 3. 드라이버별 모델 조회 ---
+
+def model_for_driver(
+    table: DegradationTable,
+    driver_id: Optional[str] = None,
+    fuel_corrected: bool = False
+) -> Dict[str, float]:
+    """
+    컴파운드 -> 성능 저하율 사전을 만듭니다.
+    우선순위: 드라이버 본인의 적합 결과 > 드라이버 평균(field) > 기본값
+    """
+    models = table.models['FuelCorrected' if fuel_corrected else 'Degradation']
+    return dict(models.get(driver_id, models[None]))
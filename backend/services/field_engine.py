@@ -0,0 +1,204 @@
+import os
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from services.lap_engine import DEFAULT_DEGRADATION
+
+# --- 트래픽 모델 파라미터 (환경 변수로 조절) ---
+# 앞 차와의 간격이 이보다 작으면 더티 에어로 랩 타임 손실 (초)
+DIRTY_AIR_GAP = float(os.getenv("F1SIM_DIRTY_AIR_GAP", "1.0"))
+# 간격이 0일 때의 더티 에어 손실 (초/랩, 간격에 따라 선형으로 감소)
+DIRTY_AIR_PENALTY = float(os.getenv("F1SIM_DIRTY_AIR_PENALTY", "0.4"))
+# 앞 차보다 랩당 이만큼 이상 빨라야 추월 가능 (초). 그보다 작으면 앞 차 뒤에 묶임
+OVERTAKE_DELTA = float(os.getenv("F1SIM_OVERTAKE_DELTA", "0.8"))
+# 앞 차 뒤에 묶였을 때 유지하는 최소 간격 (초)
+MIN_FOLLOW_GAP = float(os.getenv("F1SIM_MIN_FOLLOW_GAP", "0.3"))
+# 출발 위치 한 칸당 출발선 통과 시간 차 (초)
+GRID_GAP_SECONDS = float(os.getenv("F1SIM_GRID_GAP_SECONDS", "0.25"))
+
+# --- 1. 필드 인코딩 ---
+
+@dataclass
+class FieldPlan:
+    """
+    필드 전체(드라이버 수 D x 랩 수 L)의 전략을 배열로 인코딩한 결과.
+    모든 배열의 열 j는 (j + 1)번째 랩을 의미합니다.
+    """
+    driver_ids: List[str]
+    compounds: List[str]          # 컴파운드 인덱스 -> 이름
+    compound_index: np.ndarray    # (D, L) 각 랩에서 사용하는 컴파운드 인덱스
+    tyre_life: np.ndarray         # (D, L) 각 랩의 타이어 사용 랩 수 (1부터 시작)
+    pit_mask: np.ndarray          # (D, L) 해당 랩 종료 시 피트 스톱 여부
+    laps_completed: np.ndarray    # (D,) 완료하는 랩 수 (리타이어한 드라이버는 L보다 작음)
+
+    @property
+    def total_laps(self) -> int:
+        return self.pit_mask.shape[1]
+
+
+def encode_field(
+    strategies: Dict[str, Tuple[List[str], List[int]]],
+    total_laps: int,
+    laps_completed: Dict[str, int]
+) -> FieldPlan:
+    """
+    드라이버별 (스틴트 컴파운드 목록, 스틴트 마지막 랩 목록)을 (D, L) 배열로 변환합니다.
+    스틴트 k는 이전 스틴트의 마지막 랩 다음 랩부터 end_laps[k]까지이며, 마지막 스틴트를 제외한
+    end_laps[k]가 피트 스톱 랩입니다 (lap_engine과 같은 규칙).
+    """
+    driver_ids = list(strategies)
+    compounds: List[str] = []
+    compound_index = np.zeros((len(driver_ids), total_laps), dtype=np.intp)
+    tyre_life = np.zeros((len(driver_ids), total_laps), dtype=np.int64)
+    pit_mask = np.zeros((len(driver_ids), total_laps), dtype=bool)
+    laps = np.arange(1, total_laps + 1)
+
+    for i, driver_id in enumerate(driver_ids):
+        stint_compounds, end_laps = strategies[driver_id]
+        for c in stint_compounds:
+            if c not in compounds:
+                compounds.append(c)
+        end_laps = np.asarray(end_laps)
+        stint_table = np.array([compounds.index(c) for c in stint_compounds])
+
+        stint_index = np.minimum(np.searchsorted(end_laps, laps, side="left"), len(end_laps) - 1)
+        start_laps = np.concatenate([[1], end_laps[:-1] + 1])
+        compound_index[i] = stint_table[stint_index]
+        tyre_life[i] = laps - start_laps[stint_index] + 1
+        pit_mask[i] = (laps == end_laps[stint_index]) & (stint_index < len(end_laps) - 1)
+
+    return FieldPlan(
+        driver_ids=driver_ids,
+        compounds=compounds,
+        compound_index=compound_index,
+        tyre_life=tyre_life,
+        pit_mask=pit_mask,
+        laps_completed=np.array([min(laps_completed.get(d, total_laps), total_laps) for d in driver_ids]),
+    )
+
+# --- 2. 깨끗한 공기(단독 주행) 랩 타임 ---
+
+def clean_air_lap_times(
+    plan: FieldPlan,
+    base_lap_times: np.ndarray,
+    degradation_models: List[Dict[str, float]],
+    pit_loss_seconds: float
+) -> np.ndarray:
+    """ 트래픽이 없을 때의 (D, L) 랩 타임. 드라이버별로 lap_engine과 같은 식입니다. """
+    degradation = np.array(
+        [[model.get(c, DEFAULT_DEGRADATION) for c in plan.compounds] for model in degradation_models],
+        dtype=np.float64,
+    ).reshape(len(plan.driver_ids), len(plan.compounds))
+    rates = np.take_along_axis(degradation, plan.compound_index, axis=1)
+    return base_lap_times[:, None] + rates * plan.tyre_life + plan.pit_mask * pit_loss_seconds
+
+# --- 3. 랩별 위치 갱신 ---
+
+def _hold_behind(new_times: np.ndarray, can_pass: np.ndarray) -> np.ndarray:
+    """
+    순위순으로 정렬된 차량의 랩 종료 시각에 '앞 차 + MIN_FOLLOW_GAP보다 먼저 도착할 수 없음' 제약을 적용합니다.
+    can_pass가 True인 차량은 앞 차를 추월할 수 있으므로 제약의 사슬이 거기서 끊깁니다.
+
+    held[k] = max(new[k], held[k-1] + gap)는 a[k] = new[k] - k * gap의 누적 최댓값으로 바꿀 수 있고,
+    구간(사슬)마다 충분히 큰 오프셋을 더하면 구간별 누적 최댓값을 한 번의 np.maximum.accumulate로 구할 수 있습니다.
+    """
+    if new_times.size == 0:
+        return new_times
+    offsets = np.arange(new_times.size) * MIN_FOLLOW_GAP
+    shifted = new_times - offsets
+    segment = np.cumsum(can_pass)
+    span = shifted.max() - shifted.min() + 1.0
+    held = np.maximum.accumulate(shifted + segment * span) - segment * span
+    return held + offsets
+
+
+def race_field(
+    plan: FieldPlan,
+    lap_times: np.ndarray,
+    grid_order: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    필드 전체를 랩 단위로 진행합니다. 랩마다 (드라이버 수 크기의 배열 연산으로):
+    1. 직전 랩 종료 시각으로 순위와 앞 차와의 간격을 구하고
+    2. 간격이 DIRTY_AIR_GAP보다 작으면 더티 에어 손실을 더한 뒤
+    3. 추월할 만큼 빠르지 않은 차량은 앞 차 뒤에 묶어 둡니다 (피트 스톱 중인 차량은 제외).
+
+    반환값: (실제 랩 타임 (D, L), 누적 시각 (D, L), 랩 종료 시점 순위 (D, L))
+    리타이어 이후 랩의 랩 타임/누적 시각은 NaN, 순위는 완료한 랩 수 기준으로 뒤에 배치됩니다.
+    """
+    n_drivers, total_laps = lap_times.shape
+    cumulative = np.full((n_drivers, total_laps), np.nan)
+
+    # 출발선 통과 시각: 출발 위치 한 칸마다 GRID_GAP_SECONDS
+    now = np.empty(n_drivers)
+    now[grid_order] = np.arange(n_drivers) * GRID_GAP_SECONDS
+
+    for j in range(total_laps):
+        running = plan.laps_completed > j
+
+        # 1. 직전 랩 종료 시각 순으로 정렬 (이번 랩을 달리는 차량만)
+        order = np.flatnonzero(running)
+        order = order[np.argsort(now[order], kind="stable")]
+        start = now[order]
+        clean = lap_times[order, j]
+        pitting = plan.pit_mask[order, j]
+
+        # 2. 더티 에어: 앞 차와의 간격에 따라 선형으로 감소하는 손실
+        gap = np.diff(start, prepend=-np.inf)
+        dirty_air = np.clip(1.0 - gap / DIRTY_AIR_GAP, 0.0, 1.0) * DIRTY_AIR_PENALTY
+        dirty_air[pitting] = 0.0
+        finish = start + clean + dirty_air
+
+        # 3. 추월 난이도: 피트 레인에 있지 않은 차량끼리, 앞 차보다 OVERTAKE_DELTA 이상 빠를 때만 추월
+        on_track = np.flatnonzero(~pitting)
+        pace = clean[on_track]
+        can_pass = np.concatenate([[True], pace[:-1] - pace[1:] > OVERTAKE_DELTA])
+        finish[on_track] = _hold_behind(finish[on_track], can_pass)
+
+        now[order] = finish
+        cumulative[order, j] = finish
+
+    start_times = np.zeros(n_drivers)
+    start_times[grid_order] = np.arange(n_drivers) * GRID_GAP_SECONDS
+    effective = np.diff(cumulative, axis=1, prepend=start_times[:, None])
+    return effective, cumulative, _positions(cumulative, plan.laps_completed)
+
+
+def _positions(cumulative: np.ndarray, laps_completed: np.ndarray) -> np.ndarray:
+    """
+    랩 종료 시점 순위 (D, L): 완료한 랩 수가 많은 순, 같으면 먼저 도착한 순.
+    리타이어한 드라이버는 마지막 랩의 시각을 유지하고, 완료한 랩 수 차이를 큰 시간 오프셋으로 바꿔 한 번에 정렬합니다.
+    """
+    total_laps = cumulative.shape[1]
+    laps_done = np.minimum(laps_completed[:, None], np.arange(1, total_laps + 1)[None, :])
+    last_time = np.take_along_axis(cumulative, laps_done - 1, axis=1)
+    lap_penalty = (np.nanmax(cumulative) + 1.0) * (total_laps - laps_done)
+    ranking = np.argsort(last_time + lap_penalty, axis=0, kind="stable")
+    positions = np.empty_like(ranking)
+    np.put_along_axis(positions, ranking, np.arange(1, cumulative.shape[0] + 1)[:, None], axis=0)
+    return positions
+
+
+def simulate_field(
+    plan: FieldPlan,
+    base_lap_times: np.ndarray,
+    degradation_models: List[Dict[str, float]],
+    pit_loss_seconds: float,
+    grid_order: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    필드 전체 시뮬레이션. grid_order는 출발 순서대로 나열한 드라이버 인덱스 (생략하면 기준 랩 타임 순).
+    반환값: clean/lapTimes/cumulative/positions (D, L) 배열과 trafficLoss (D,)
+    """
+    if grid_order is None:
+        grid_order = np.argsort(base_lap_times, kind="stable")
+
+    clean = clean_air_lap_times(plan, base_lap_times, degradation_models, pit_loss_seconds)
+    effective, cumulative, positions = race_field(plan, clean, grid_order)
+    return {
+        "clean": clean,
+        "lapTimes": effective,
+        "cumulative": cumulative,
+        "positions": positions,
+        "trafficLoss": np.nansum(effective - clean, axis=1),
+    }
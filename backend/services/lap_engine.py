@@ -0,0 +1,191 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Dict, Tuple
+from models.simulation import Scenario, StrategyResult, TireStint
+
+# 모델에 없는 컴파운드에 적용하는 기본 성능 저하율 (초/랩)
+DEFAULT_DEGRADATION = 0.1
+
+# --- 1. 시나리오 배치 인코딩 ---
+
+@dataclass
+class ScenarioBatch:
+    """
+    여러 시나리오를 (시나리오 수 S x 랩 수 L) 배열로 인코딩한 결과.
+    모든 배열의 열 j는 (j + 1)번째 랩을 의미합니다.
+    """
+    names: List[str]
+    compounds: List[str]          # 컴파운드 인덱스 -> 이름
+    compound_index: np.ndarray    # (S, L) 각 랩에서 사용하는 컴파운드 인덱스
+    tyre_life: np.ndarray         # (S, L) 각 랩의 타이어 사용 랩 수 (1부터 시작)
+    pit_mask: np.ndarray          # (S, L) 해당 랩 종료 시 피트 스톱 여부
+
+    @property
+    def total_laps(self) -> int:
+        return self.pit_mask.shape[1]
+
+
+def encode_scenarios(scenarios: List[Scenario], total_laps: int) -> ScenarioBatch:
+    """
+    시나리오 목록을 랩 단위 배열(컴파운드 인덱스, 타이어 수명, 피트 마스크)로 변환합니다.
+    피트 규칙은 기존 루프와 동일합니다: 스틴트가 N개이면 (total_laps // N) 랩마다 피트 스톱.
+    """
+    if not scenarios:
+        raise ValueError("시뮬레이션할 시나리오가 없습니다.")
+
+    stint_counts = np.array([len(s.stints) for s in scenarios])
+    if (stint_counts == 0).any():
+        raise ValueError("스틴트가 없는 시나리오가 있습니다.")
+
+    intervals = total_laps // stint_counts
+    if ((stint_counts > 1) & (intervals == 0)).any():
+        raise ValueError("스틴트 수가 전체 랩 수보다 많은 시나리오가 있습니다.")
+
+    # 배치 전체의 컴파운드 목록과 (S, 최대 스틴트 수) 컴파운드 인덱스 테이블
+    compounds: List[str] = []
+    stint_table = np.zeros((len(scenarios), stint_counts.max()), dtype=np.intp)
+    for i, scenario in enumerate(scenarios):
+        for j, stint in enumerate(scenario.stints):
+            if stint.compound not in compounds:
+                compounds.append(stint.compound)
+            stint_table[i, j] = compounds.index(stint.compound)
+
+    laps = np.arange(1, total_laps + 1)
+
+    # 피트 스톱 랩: 스틴트가 2개 이상이고, 주기에 해당하며, 마지막 랩이 아닌 랩
+    safe_intervals = np.maximum(intervals, 1)[:, None]
+    pit_mask = (
+        (stint_counts > 1)[:, None]
+        & (laps[None, :] % safe_intervals == 0)
+        & (laps[None, :] < total_laps)
+    )
+
+    # 해당 랩 이전까지 수행한 피트 스톱 횟수 -> 현재 스틴트 인덱스 (마지막 스틴트에서 고정)
+    pits_before = np.cumsum(pit_mask, axis=1) - pit_mask
+    stint_index = np.minimum(pits_before, (stint_counts - 1)[:, None])
+    compound_index = np.take_along_axis(stint_table, stint_index, axis=1)
+
+    # 타이어 수명: 직전 피트 스톱 랩 이후 경과한 랩 수
+    last_pit = np.maximum.accumulate(np.where(pit_mask, laps[None, :], 0), axis=1)
+    last_pit_before = np.concatenate(
+        [np.zeros((len(scenarios), 1), dtype=last_pit.dtype), last_pit[:, :-1]], axis=1
+    )
+    tyre_life = laps[None, :] - last_pit_before
+
+    return ScenarioBatch(
+        names=[s.name for s in scenarios],
+        compounds=compounds,
+        compound_index=compound_index,
+        tyre_life=tyre_life,
+        pit_mask=pit_mask,
+    )
+
+# --- 2. 랩 타임 계산 ---
+
+def compute_lap_times(
+    batch: ScenarioBatch,
+    base_lap_time: float,
+    degradation_model: Dict[str, float],
+    pit_loss_seconds: float
+) -> np.ndarray:
+    """ 배치 전체의 랩 타임 (S, L) 행렬을 한 번의 NumPy 연산으로 계산합니다. """
+    degradation = np.array(
+        [degradation_model.get(c, DEFAULT_DEGRADATION) for c in batch.compounds],
+        dtype=np.float64,
+    )
+    lap_times = base_lap_time + degradation[batch.compound_index] * batch.tyre_life
+    return lap_times + batch.pit_mask * pit_loss_seconds
+
+
+def cumulative_times(lap_times: np.ndarray) -> np.ndarray:
+    """
+    랩 타임의 누적 합 (S, L). 마지막 열이 총 레이스 시간입니다.
+    np.cumsum은 앞에서부터 순차적으로 더하므로 파이썬 sum()과 같은 값을 냅니다.
+    """
+    return np.cumsum(lap_times, axis=1)
+
+# --- 3. 결과 객체 생성 ---
+
+def build_strategy_results(
+    batch: ScenarioBatch,
+    lap_times: np.ndarray,
+    totals: np.ndarray
+) -> List[StrategyResult]:
+    """
+    계산이 끝난 배열로부터 StrategyResult 목록을 만듭니다.
+    값은 이미 올바른 타입이므로 model_construct로 랩 타임 요소별 검증을 생략합니다.
+    """
+    total_laps = batch.total_laps
+    results = []
+
+    for i, name in enumerate(batch.names):
+        pit_laps = (np.flatnonzero(batch.pit_mask[i]) + 1).tolist()
+
+        # 피트 스톱 랩을 경계로 스틴트 구간 생성
+        tire_stints = []
+        start_lap = 1
+        for end_lap in pit_laps + [total_laps]:
+            tire_stints.append(TireStint.model_construct(
+                compound=batch.compounds[batch.compound_index[i, end_lap - 1]],
+                startLap=start_lap,
+                endLap=end_lap
+            ))
+            start_lap = end_lap + 1
+
+        results.append(StrategyResult.model_construct(
+            name=name,
+            totalTime=float(totals[i]),
+            pitLaps=pit_laps,
+            lapTimes=lap_times[i].tolist(),
+            tireStints=tire_stints
+        ))
+
+    return results
+
+
+def simulate_scenarios(
+    scenarios: List[Scenario],
+    total_laps: int,
+    base_lap_time: float,
+    degradation_model: Dict[str, float],
+    pit_loss_seconds: float
+) -> List[StrategyResult]:
+    """ 시나리오 목록 전체를 배치로 시뮬레이션합니다. """
+    batch = encode_scenarios(scenarios, total_laps)
+    lap_times = compute_lap_times(batch, base_lap_time, degradation_model, pit_loss_seconds)
+    totals = cumulative_times(lap_times)[:, -1]
+    return build_strategy_results(batch, lap_times, totals)
+
+# --- 4. 파라미터 민감도 (총 시간의 선형 분해) ---
+
+def total_time_terms(
+    batch: ScenarioBatch,
+    base_lap_time: float,
+    degradation_model: Dict[str, float]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    총 시간 = constant + 성능 저하 배율 x degradation + 피트 손실 x pit_count 로 분해합니다 (각각 (S,)).
+    랩 타임 식이 두 파라미터에 대해 선형이므로, 어떤 (피트 손실, 배율) 조합도 이 세 값으로 계산됩니다.
+    """
+    degradation = np.array(
+        [degradation_model.get(c, DEFAULT_DEGRADATION) for c in batch.compounds],
+        dtype=np.float64,
+    )
+    constant = np.full(len(batch.names), batch.total_laps * base_lap_time)
+    degradation_term = (degradation[batch.compound_index] * batch.tyre_life).sum(axis=1)
+    pit_count = batch.pit_mask.sum(axis=1).astype(np.float64)
+    return constant, degradation_term, pit_count
+
+
+def sweep_totals(
+    terms: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    pit_losses: np.ndarray,
+    degradation_scales: np.ndarray
+) -> np.ndarray:
+    """ 모든 시나리오 x 피트 손실 x 배율 격자의 총 시간 (S, P, D)을 한 번의 브로드캐스트로 계산합니다. """
+    constant, degradation_term, pit_count = terms
+    return (
+        constant[:, None, None]
+        + pit_count[:, None, None] * pit_losses[None, :, None]
+        + degradation_term[:, None, None] * degradation_scales[None, None, :]
+    )
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
+from models.simulation import Scenario, RaceEvent, MonteCarloResult, ScenarioDistribution
+from services import lap_engine
+from core import derived_store
+from core.executor import CPU_START_METHOD
+from core.memory_cache import MemoryCache
+
+# --- 1. 불확실성 모델 파라미터 ---
+
+# 경기당 평균 SC/VSC 발생 횟수의 기본 사전값 (저장된 과거 경기 기록이 부족할 때 사용)
+SC_PRIOR_PER_RACE = 0.6
+# 사전값의 가중치 (해당 경기의 실제 발생 횟수 1회와 비교한 비중)
+SC_PRIOR_WEIGHT = 2.0
+# 한 경기에서 샘플링할 최대 SC 횟수
+SC_MAX_PER_RACE = 3
+# SC 지속 랩 수의 기본 사전 평균 (저장된 과거 경기 기록이 부족할 때 사용)
+SC_PRIOR_LENGTH = 4.0
+# 저장된 세션 번들에서 사전값을 추정하기 위해 필요한 최소 경기 수
+SC_PRIOR_MIN_RACES = int(os.getenv("F1SIM_SC_PRIOR_MIN_RACES", "5"))
+# SC 중 랩 타임 증가율 (기준 랩 타임 대비)
+SC_LAP_SLOWDOWN = 0.4
+# SC 중 피트 스톱 시 손실 시간 비율
+SC_PIT_LOSS_FACTOR = 0.5
+
+# 컴파운드별 성능 저하율의 상대 표준편차 (회귀 추정치 주변의 노이즈)
+DEGRADATION_NOISE = 0.2
+# 피트 스톱 1회당 손실 시간의 표준편차 (초)
+PIT_LOSS_SIGMA = 1.5
+
+# 메모리 사용량을 제한하기 위해 한 번에 계산하는 런 수
+RUN_CHUNK_SIZE = 2000
+# 런을 나누어 실행할 프로세스 수 (1이면 현재 프로세스에서만 계산).
+# 호출마다 프로세스를 새로 띄우므로, 프로세스 시작 비용보다 계산이 충분히 클 때(런 수가 많을 때)만 사용합니다.
+MC_SHARDS = int(os.getenv("F1SIM_MC_SHARDS", "1"))
+
+# 과거 경기 기록에서 추정한 SC 사전값 (새 번들이 쌓이면 반영되도록 주기적으로 만료)
+sc_prior_cache = MemoryCache(
+    "scPrior",
+    max_bytes=64 * 1024,
+    ttl=float(os.getenv("F1SIM_SC_PRIOR_TTL_SECONDS", "3600")),
+)
+
+# --- 2. SC 발생 모델 ---
+
+def _is_neutralisation(event_type: str) -> bool:
+    return event_type in ("SC", "VSC")
+
+
+@sc_prior_cache.cached()
+def historical_sc_prior() -> Dict[str, float]:
+    """
+    저장된 모든 세션 번들(derived/bundles)의 SC/VSC 기록으로 (경기당 발생 횟수, 평균 지속 랩 수) 사전값을 구합니다.
+    기록된 경기가 SC_PRIOR_MIN_RACES보다 적으면 기본 사전값(SC_PRIOR_PER_RACE, SC_PRIOR_LENGTH)을 사용합니다.
+    """
+    payloads = derived_store.read_all_bundles()
+    if len(payloads) < SC_PRIOR_MIN_RACES:
+        return {"rate": SC_PRIOR_PER_RACE, "mean_length": SC_PRIOR_LENGTH, "races": len(payloads)}
+
+    lengths = [
+        e["endLap"] - e["startLap"] + 1
+        for payload in payloads for e in payload["raceEvents"] if _is_neutralisation(e["type"])
+    ]
+    return {
+        "rate": len(lengths) / len(payloads),
+        "mean_length": float(np.mean(lengths)) if lengths else SC_PRIOR_LENGTH,
+        "races": len(payloads),
+    }
+
+
+def estimate_sc_model(race_events: List[RaceEvent], prior: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    해당 경기의 SC/VSC 기록과 과거 경기 기록의 사전값(prior, 생략하면 historical_sc_prior)을 섞어
+    (경기당 발생 횟수, 평균 지속 랩 수)를 추정합니다.
+    """
+    if prior is None:
+        prior = historical_sc_prior()
+    neutralisations = [e for e in race_events if _is_neutralisation(e.type)]
+    rate = (prior["rate"] * SC_PRIOR_WEIGHT + len(neutralisations)) / (SC_PRIOR_WEIGHT + 1)
+
+    lengths = [e.endLap - e.startLap + 1 for e in neutralisations]
+    mean_length = (prior["mean_length"] * SC_PRIOR_WEIGHT + sum(lengths)) / (SC_PRIOR_WEIGHT + len(lengths))
+    return {"rate": rate, "mean_length": mean_length}
+
+
+def _sample_sc_mask(rng: np.random.Generator, runs: int, total_laps: int, sc_model: Dict[str, float]) -> np.ndarray:
+    """ 런별 SC 구간을 샘플링하여 (runs, L) 불리언 마스크를 만듭니다. """
+    laps = np.arange(1, total_laps + 1)
+
+    counts = np.minimum(rng.poisson(sc_model["rate"], size=runs), SC_MAX_PER_RACE)
+    starts = rng.integers(1, total_laps + 1, size=(runs, SC_MAX_PER_RACE))
+    lengths = 1 + rng.poisson(max(sc_model["mean_length"] - 1, 0), size=(runs, SC_MAX_PER_RACE))
+    active = np.arange(SC_MAX_PER_RACE)[None, :] < counts[:, None]
+
+    in_period = (
+        (laps[None, None, :] >= starts[:, :, None])
+        & (laps[None, None, :] < (starts + lengths)[:, :, None])
+        & active[:, :, None]
+    )
+    return in_period.any(axis=1)
+
+# --- 3. 배치 몬테카를로 계산 ---
+
+def _simulate_totals(
+    batch: lap_engine.ScenarioBatch,
+    base_lap_time: float,
+    degradation: np.ndarray,
+    pit_loss_seconds: float,
+    sc_model: Dict[str, float],
+    runs: int,
+    seed
+) -> np.ndarray:
+    """ runs번의 무작위 레이스에 대한 시나리오별 총 시간 (runs, S) """
+    rng = np.random.default_rng(seed)
+    n_scenarios, total_laps = batch.pit_mask.shape
+    totals = np.empty((runs, n_scenarios))
+
+    for start in range(0, runs, RUN_CHUNK_SIZE):
+        n = min(RUN_CHUNK_SIZE, runs - start)
+
+        sc_mask = _sample_sc_mask(rng, n, total_laps, sc_model)                         # (n, L)
+        noisy_degradation = degradation[None, :] * np.maximum(
+            rng.normal(1.0, DEGRADATION_NOISE, size=(n, len(degradation))), 0.0
+        )                                                                               # (n, C)
+        pit_loss = pit_loss_seconds + rng.normal(0.0, PIT_LOSS_SIGMA, size=(n, n_scenarios, total_laps))
+
+        # 성능 저하: (n, S, L)
+        lap_times = noisy_degradation[:, batch.compound_index] * batch.tyre_life[None, :, :]
+        # SC 랩은 모든 시나리오에서 느려지고, SC 중 피트 스톱은 손실이 줄어듦
+        lap_times += (base_lap_time * (1.0 + SC_LAP_SLOWDOWN * sc_mask))[:, None, :]
+        pit_factor = np.where(sc_mask, SC_PIT_LOSS_FACTOR, 1.0)[:, None, :]
+        lap_times += batch.pit_mask[None, :, :] * pit_loss * pit_factor
+
+        totals[start:start + n] = lap_times.sum(axis=2)
+
+    return totals
+
+
+def run_monte_carlo(
+    scenarios: List[Scenario],
+    total_laps: int,
+    base_lap_time: float,
+    degradation_model: Dict[str, float],
+    pit_loss_seconds: float,
+    race_events: List[RaceEvent],
+    runs: int,
+    seed: Optional[int] = None,
+    shards: int = MC_SHARDS
+) -> MonteCarloResult:
+    """
+    SC 발생 시점/길이, 타이어 성능 저하, 피트 손실 시간을 무작위로 바꿔가며
+    runs번의 레이스를 시뮬레이션하고 시나리오별 총 시간 분포와 승리 확률을 반환합니다.
+    shards > 1이면 런을 나누어 여러 프로세스에서 계산합니다.
+    """
+    batch = lap_engine.encode_scenarios(scenarios, total_laps)
+    degradation = np.array(
+        [degradation_model.get(c, lap_engine.DEFAULT_DEGRADATION) for c in batch.compounds],
+        dtype=np.float64,
+    )
+    sc_model = estimate_sc_model(race_events)
+
+    # 샤드마다 독립적인 난수 시드 (seed가 같으면 결과도 같음)
+    shards = max(1, min(shards, runs))
+    shard_seeds = np.random.SeedSequence(seed).spawn(shards)
+    shard_runs = [len(r) for r in np.array_split(np.arange(runs), shards)]
+    args = [
+        (batch, base_lap_time, degradation, pit_loss_seconds, sc_model, n, s)
+        for n, s in zip(shard_runs, shard_seeds)
+    ]
+
+    if shards == 1:
+        totals = _simulate_totals(*args[0])
+    else:
+        # 호출 범위 안에서만 풀을 유지 (실행 풀의 워커 안에서 호출되어도 종료 시 자식 프로세스가 남지 않도록)
+        with ProcessPoolExecutor(
+            max_workers=shards, mp_context=multiprocessing.get_context(CPU_START_METHOD)
+        ) as pool:
+            totals = np.concatenate(list(pool.map(_simulate_totals, *zip(*args))))
+
+    # 런마다 가장 빠른 시나리오를 승자로 집계
+    wins = np.bincount(totals.argmin(axis=1), minlength=len(batch.names))
+    p50, p90 = np.percentile(totals, [50, 90], axis=0)
+
+    return MonteCarloResult(
+        runs=runs,
+        scenarios=[
+            ScenarioDistribution(
+                name=name,
+                meanTime=float(totals[:, i].mean()),
+                p50Time=float(p50[i]),
+                p90Time=float(p90[i]),
+                winProbability=float(wins[i] / runs),
+            )
+            for i, name in enumerate(batch.names)
+        ]
+    )
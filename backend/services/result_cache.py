@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+from models.simulation import SimulationRequest, SimulationResponse
+from core import derived_store, executor
+from core.memory_cache import MemoryCache
+
+# 시뮬레이션 로직(랩 타임 모델, 최적화, 몬테카를로)이 바뀌어 같은 요청의 결과가 달라지면 올립니다.
+RESULT_MODEL_VERSION = 1
+
+# 디스크 저장소 사용 여부 (재시작 후에도 결과 재사용). 기본값은 메모리 캐시만 사용
+RESULT_DISK_CACHE = os.getenv("F1SIM_RESULT_DISK_CACHE", "0") == "1"
+# 디스크에 저장한 결과를 이 시간 동안 읽지 않으면 삭제 (이전 데이터 버전의 결과가 쌓이지 않도록)
+RESULT_DISK_TTL_SECONDS = float(os.getenv("F1SIM_RESULT_DISK_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# 응답 하나는 시나리오 수에 따라 수 KB~수백 KB
+result_cache = MemoryCache(
+    "simulationResult",
+    max_bytes=int(os.getenv("F1SIM_RESULT_CACHE_MB", "64")) * 1024 * 1024,
+    ttl=None,
+    negative_ttl=0.0,
+)
+
+
+def request_key(request: SimulationRequest) -> Optional[str]:
+    """
+    정규화한 요청 + 모델 버전 + 데이터 버전의 해시.
+    결과가 매번 달라지는 요청(시드 없는 몬테카를로)이나 데이터 버전을 알 수 없는 경우 None
+    """
+    if request.monteCarloRuns > 0 and request.randomSeed is None:
+        return None
+
+    version = derived_store.data_version(request.year, request.raceId)
+    if version is None:
+        return None
+
+    # 필드 순서/기본값 표기와 무관하도록 모든 필드를 채운 JSON을 키 순서대로 직렬화
+    normalized = request.model_dump(mode="json")
+    normalized["raceId"] = str(int(request.raceId)) if request.raceId.strip().isdigit() else request.raceId
+    canonical = json.dumps(
+        {"request": normalized, "model": RESULT_MODEL_VERSION, "data": version},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _variant(key: str, media_type: str, delta: bool) -> str:
+    return hashlib.sha256(f"{key}|{media_type}|{int(delta)}".encode()).hexdigest()[:32]
+
+
+def etag(key: str, media_type: str, delta: bool, report_id: str) -> str:
+    """
+    응답 표현(형식, 랩 타임 인코딩)과 reportId별로 구분되는 강한 ETag.
+    reportId는 응답마다 다르므로 ETag에 포함해야 같은 ETag가 항상 같은 본문을 가리킵니다.
+    """
+    return f'"{_variant(key, media_type, delta)}.{report_id}"'
+
+
+def matching_report(if_none_match: Optional[str], key: str, media_type: str, delta: bool) -> Optional[str]:
+    """
+    If-None-Match 헤더(목록, 약한 비교 지원)에서 같은 결과/표현의 ETag를 찾아 그 응답의 reportId를 반환합니다.
+    클라이언트가 가진 본문은 그 reportId를 담고 있으므로, 리포트가 아직 유효할 때만 304로 응답해야 합니다.
+    """
+    if not if_none_match:
+        return None
+    variant = _variant(key, media_type, delta)
+    for tag in if_none_match.split(","):
+        found, _, report_id = tag.strip().removeprefix("W/").strip('"').partition(".")
+        if found == variant and report_id:
+            return report_id
+    return None
+
+
+async def lookup(key: str) -> Optional[SimulationResponse]:
+    """ 메모리 캐시, (사용하는 경우) 디스크 저장소 순으로 결과를 찾습니다. """
+    found, response = result_cache.get(key)
+    if found:
+        return response
+    if not RESULT_DISK_CACHE:
+        return None
+
+    content = await executor.run_io(derived_store.read_result, key)
+    if content is None:
+        return None
+    try:
+        response = SimulationResponse.model_validate_json(content)
+    except Exception as e:
+        logging.warning(f"저장된 결과 복원 실패 ({key}): {e}")
+        return None
+    result_cache.set(key, response)
+    return response
+
+
+async def store(key: str, response: SimulationResponse):
+    """
+    결과를 메모리 캐시와 (사용하는 경우) 디스크 저장소에 기록합니다.
+    reportId는 응답마다 새로 붙이므로(whatif_service.register) 저장하지 않습니다.
+    """
+    response = response.model_copy(update={"reportId": ""})
+    result_cache.set(key, response)
+    if RESULT_DISK_CACHE:
+        await executor.run_io(derived_store.write_result, key, response.model_dump_json().encode())
+
+
+def prune_expired() -> int:
+    """ [스케줄러 작업] 디스크 저장소에서 오래 읽지 않은 결과를 정리합니다. """
+    return derived_store.prune_results(RESULT_DISK_TTL_SECONDS)
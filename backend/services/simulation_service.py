@@ -1,142 +1,149 @@
+import functools
 import logging
+import os
 import uuid
 import numpy as np
 import pandas as pd
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import Any, Callable, Generator, List, Dict, Optional, Tuple
 from models.simulation import (
-    SimulationRequest, SimulationResponse, StrategyResult, RaceEvent, Scenario, TireStint
+    SimulationRequest, SimulationResponse, StrategyResult, RaceEvent, Scenario, TireStint, DriverInfo,
+    StintRequest, FieldSimulationRequest, FieldSimulationResponse, FieldDriverResult
 )
-from services import data_service
+from core import derived_store, metrics
+from core.memory_cache import MemoryCache
+from services import data_service, degradation, field_engine, lap_engine, monte_carlo, strategy_optimizer
 from fastapi import HTTPException
 
 # --- 1. 실제 전략 분석 ---
 
-def get_actual_strategy(driver_laps: pd.DataFrame) -> StrategyResult:
-    """ 드라이버의 실제 레이스 전략을 분석합니다. """
+def _empty_actual_strategy() -> StrategyResult:
+    return StrategyResult(
+        name="Actual", 
+        totalTime=0.0, 
+        pitLaps=[], 
+        lapTimes=[], 
+        tireStints=[]
+    )
+
+def get_actual_strategies(laps: pd.DataFrame) -> Dict[str, StrategyResult]:
+    """
+    세션의 모든 드라이버의 실제 레이스 전략을 한 번에 분석합니다.
+    스틴트는 (컴파운드, 스틴트 번호)의 연속 구간(run-length)으로 찾습니다.
+    반환값: 드라이버 약어 -> 실제 전략
+    """
     try:
-        # 피트 스톱 랩 찾기 (PitOutTime이 기록된 랩)
-        pit_laps = driver_laps[driver_laps['PitOutTime'].notna()]['LapNumber'].tolist()
-        
-        # 실제 랩 타임 (초 단위로 변환)
-        lap_times_data = driver_laps['LapTime'].dropna().apply(lambda x: x.total_seconds()).tolist()
-        
-        # 실제 총 레이스 시간
-        total_time = sum(lap_times_data)
-        
-        # 실제 타이어 스틴트 분석 로직
-        tire_stints = []
-        current_compound = None
-        start_lap = 1
-        
-        # 데이터프레임을 순회하며 스틴트 추출
-        laps_with_compound = driver_laps[['LapNumber', 'Compound']].dropna()
-        
-        for _, row in laps_with_compound.iterrows():
-            lap = int(row['LapNumber'])
-            compound = row['Compound']
-            
-            if current_compound is None:
-                current_compound = compound
-                start_lap = lap
-            elif compound != current_compound:
-                # 타이어 변경 감지 -> 이전 스틴트 저장
-                tire_stints.append(TireStint(
-                    compound=str(current_compound),
-                    startLap=start_lap,
-                    endLap=lap - 1
-                ))
-                current_compound = compound
-                start_lap = lap
-        
-        # 마지막 스틴트 추가
-        if current_compound is not None:
-            max_lap = int(driver_laps['LapNumber'].max())
-            tire_stints.append(TireStint(
-                compound=str(current_compound),
-                startLap=start_lap,
-                endLap=max_lap
-            ))
-
-        return StrategyResult(
-            name="Actual",
-            totalTime=total_time,
-            pitLaps=pit_laps,
-            lapTimes=lap_times_data,
-            tireStints=tire_stints
-        )
+        laps = laps[laps['Driver'].notna()]
+        driver_codes, driver_names = pd.factorize(laps['Driver'].astype(str))
+
+        # 드라이버별로 모으되 드라이버 안에서는 원래 순서 유지
+        order = np.argsort(driver_codes, kind='stable')
+        codes = driver_codes[order]
+        lap_numbers = laps['LapNumber'].to_numpy(dtype=np.float64)[order]
+        lap_times = laps['LapTimeSeconds'].to_numpy(dtype=np.float64)[order]
+        pitted = laps['PitOutTime'].notna().to_numpy()[order]
+        compound_codes, compounds = pd.factorize(laps['Compound'])
+        compound_codes = compound_codes[order]
+        stints = laps['Stint'].to_numpy(dtype=np.float64)[order]
+
+        n_drivers = len(driver_names)
+        driver_bounds = np.searchsorted(codes, np.arange(n_drivers + 1))
+        last_laps = np.full(n_drivers, np.nan)
+        has_laps = ~np.isnan(lap_numbers)
+        np.fmax.at(last_laps, codes[has_laps], lap_numbers[has_laps])
+
+        # 피트 스톱 랩 (PitOutTime이 기록된 랩)과 실제 랩 타임
+        pit_mask = pitted & has_laps
+        time_mask = ~np.isnan(lap_times)
+
+        # 스틴트: 컴파운드가 기록된 랩에서 드라이버/컴파운드/스틴트 번호가 바뀌는 지점이 새 스틴트의 시작
+        stint_rows = np.flatnonzero(has_laps & (compound_codes >= 0))
+        run_codes = codes[stint_rows]
+        run_keys = np.stack([run_codes, compound_codes[stint_rows], np.nan_to_num(stints[stint_rows], nan=-1)])
+        starts = np.ones(len(stint_rows), dtype=bool)
+        starts[1:] = (run_keys[:, 1:] != run_keys[:, :-1]).any(axis=0)
+        start_rows = stint_rows[starts]
+
+        run_driver = codes[start_rows]
+        run_start = lap_numbers[start_rows]
+        # 다음 스틴트가 같은 드라이버이면 그 시작 직전 랩까지, 마지막 스틴트는 드라이버의 마지막 랩까지
+        run_end = last_laps[run_driver].copy()
+        same_driver = run_driver[1:] == run_driver[:-1]
+        run_end[:-1][same_driver] = run_start[1:][same_driver] - 1
+        run_bounds = np.searchsorted(run_driver, np.arange(n_drivers + 1))
+
+        strategies = {}
+        for code, driver in enumerate(driver_names):
+            rows = slice(driver_bounds[code], driver_bounds[code + 1])
+            runs = slice(run_bounds[code], run_bounds[code + 1])
+
+            lap_times_data = lap_times[rows][time_mask[rows]].tolist()
+            tire_stints = [
+                TireStint.model_construct(compound=str(compounds[c]), startLap=int(start), endLap=int(end))
+                for c, start, end in zip(
+                    compound_codes[start_rows[runs]], run_start[runs], run_end[runs]
+                )
+            ]
+            strategies[driver] = StrategyResult.model_construct(
+                name="Actual",
+                totalTime=sum(lap_times_data),
+                pitLaps=lap_numbers[rows][pit_mask[rows]].astype(int).tolist(),
+                lapTimes=lap_times_data,
+                tireStints=tire_stints
+            )
+        return strategies
+
     except Exception as e:
         logging.error(f"실제 전략 분석 실패: {e}")
-        return StrategyResult(
-            name="Actual", 
-            totalTime=0.0, 
-            pitLaps=[], 
-            lapTimes=[], 
-            tireStints=[]
-        )
+        return {}
+
+def get_actual_strategy(driver_laps: pd.DataFrame) -> StrategyResult:
+    """ 드라이버 한 명의 실제 레이스 전략을 분석합니다. """
+    strategies = get_actual_strategies(driver_laps)
+    return next(iter(strategies.values()), None) or _empty_actual_strategy()
 
 # --- 2. 타이어 성능 모델링 ---
 
 def model_tire_degradation(driver_laps: pd.DataFrame) -> Dict[str, float]:
-    """ 타이어 컴파운드별 성능 저하(degradation)를 모델링 """
-    degradation_models = {}
-    
-    # 이상치(SC, VSC, In/Out 랩) 제거
-    laps_for_model = driver_laps[
-        (driver_laps['TrackStatus'] == '1') & 
-        (driver_laps['IsAccurate'] == True) & 
-        (driver_laps['PitInTime'].isna()) &
-        (driver_laps['PitOutTime'].isna())
-    ].copy()
-    
-    laps_for_model['LapTimeSeconds'] = laps_for_model['LapTime'].dt.total_seconds()
-    
-    compounds = laps_for_model['Compound'].unique()
-    
-    for compound in compounds:
-        compound_laps = laps_for_model[laps_for_model['Compound'] == compound]
-        
-        if len(compound_laps) < 5: 
-            continue
-            
-        try:
-            model = np.polyfit(compound_laps['TyreLife'], compound_laps['LapTimeSeconds'], 1)
-            degradation_per_lap = model[0]
-            
-            if degradation_per_lap < 0 or degradation_per_lap > 0.5:
-                 degradation_per_lap = 0.01 
-                 
-            degradation_models[compound] = degradation_per_lap
-            
-        except Exception as e:
-            logging.warning(f"{compound} 모델링 실패: {e}. 기본값(0.1) 사용.")
-            degradation_models[compound] = 0.1 
-
-    if "SOFT" not in degradation_models: degradation_models["SOFT"] = 0.15
-    if "MEDIUM" not in degradation_models: degradation_models["MEDIUM"] = 0.1
-    if "HARD" not in degradation_models: degradation_models["HARD"] = 0.08
-    if "INTERMEDIATE" not in degradation_models: degradation_models["INTERMEDIATE"] = 0.5
-    if "WET" not in degradation_models: degradation_models["WET"] = 0.8
-
-    return degradation_models
+    """ 타이어 컴파운드별 성능 저하(degradation)를 모델링 (랩 목록 하나만 적합, 캐시하지 않음) """
+    return degradation.model_for_driver(degradation.fit_degradation_table(driver_laps))
 
 # --- 3. 레이스 이벤트 추출 ---
 
-def get_race_events(session) -> List[RaceEvent]:
-    """ SC, VSC, Red Flag 이벤트를 추출합니다. """
+# FastF1 TrackStatus 코드: '4' = SC, '5' = Red Flag, '6'/'7' = VSC (발령/종료)
+RACE_EVENT_CODES = {
+    "SC": "4",
+    "VSC": "67",
+    "RedFlag": "5",
+}
+
+def get_race_events(laps: pd.DataFrame) -> List[RaceEvent]:
+    """ 랩 테이블의 TrackStatus로부터 SC, VSC, Red Flag 이벤트를 추출합니다. """
     events = []
     try:
-        sc_periods = session.laps.get_safety_car_periods()
-        if sc_periods is not None:
-            for _, row in sc_periods.iterrows():
+        status = laps[['LapNumber', 'TrackStatus']].dropna()
+        track_status = status['TrackStatus'].astype(str)
+
+        for event_type, codes in RACE_EVENT_CODES.items():
+            # 한 명이라도 해당 상태로 주행한 랩 번호
+            flagged = track_status.str.contains(f"[{codes}]", regex=True)
+            flagged_laps = np.unique(status.loc[flagged, 'LapNumber'].astype(int))
+            if flagged_laps.size == 0:
+                continue
+
+            # 연속된 랩을 하나의 이벤트 구간으로 묶음
+            breaks = np.flatnonzero(np.diff(flagged_laps) != 1) + 1
+            for run in np.split(flagged_laps, breaks):
                 events.append(RaceEvent(
-                    type="SC",
-                    startLap=int(row['StartLaps']),
-                    endLap=int(row['EndLaps'])
+                    type=event_type,
+                    startLap=int(run[0]),
+                    endLap=int(run[-1])
                 ))
-                
+
     except Exception as e:
         logging.warning(f"레이스 이벤트 추출 실패: {e}")
-        
+
+    events.sort(key=lambda e: e.startLap)
     return events
 
 # --- 4. 시뮬레이션 실행 (메인 서비스) ---
@@ -144,40 +151,143 @@ def get_race_events(session) -> List[RaceEvent]:
 def run_simulation(request: SimulationRequest) -> SimulationResponse:
     """ 메인 시뮬레이션 서비스 함수 """
     
-    session = data_service.load_race_data(request.year, request.raceId)
-    if not session:
+    lap_table = data_service.get_lap_table(request.year, request.raceId)
+    if not lap_table:
         raise HTTPException(status_code=404, detail="Race data not found.")
-        
-    driver_laps = session.laps.pick_driver(request.driverId).reset_index()
+
+    return simulate_driver(lap_table, request)
+
+def simulate_driver(
+    lap_table: data_service.LapTable,
+    request: SimulationRequest,
+    bundle: Optional["SessionBundle"] = None
+) -> SimulationResponse:
+    """
+    이미 로드된 랩 테이블로 드라이버 한 명의 시뮬레이션을 수행합니다.
+    iter_simulation의 단계를 모두 (계산 단계는 이 프로세스에서 바로) 실행하고 마지막 결과만 반환합니다.
+    """
+    steps = iter_simulation(lap_table, request, bundle)
+    value = None
+    while (step := advance(steps, value)) is not None:
+        event, payload = step
+        value = run_stage(*payload) if event == "compute" else None
+        if event == "result":
+            return payload
+    raise RuntimeError("시뮬레이션 결과가 없습니다.")
+
+def advance(steps: Generator, value: Any = None) -> Optional[Tuple[str, Any]]:
+    """ iter_simulation을 다음 이벤트까지 진행합니다 (value: 직전 compute 단계의 결과). 끝났으면 None """
+    try:
+        return steps.send(value)
+    except StopIteration:
+        return None
+
+def run_stage(name: str, fn: Callable[[], Any]) -> Any:
+    """ iter_simulation이 내보낸 계산 단계를 실행합니다 (프로세스 풀에서 실행할 수 있도록 모듈 수준 함수). """
+    with metrics.stage(name):
+        return fn()
+
+def iter_simulation(
+    lap_table: data_service.LapTable,
+    request: SimulationRequest,
+    bundle: Optional["SessionBundle"] = None
+) -> Generator[Tuple[str, Any], Any, None]:
+    """
+    드라이버 한 명의 시뮬레이션을 단계별로 실행하는 제너레이터 (advance로 진행).
+    실제 전략, 성능 저하 모델, 레이스 이벤트는 세션 번들에서 가져옵니다 (세션당 한 번만 계산).
+
+    단계가 끝날 때마다 (이벤트, 내용)을 내보냅니다:
+    - ("stage", 단계 이름): session_bundle, simulate_scenarios, optimize_strategy, monte_carlo
+    - ("scenario", (순번, StrategyResult)): 사용자 시나리오 결과
+    - ("compute", (단계 이름, 인자 없는 함수)): CPU 위주 단계(최적화, 몬테카를로). 호출한 쪽이
+      run_stage로 실행하고(스트리밍 응답은 프로세스 풀에서) 결과를 advance로 돌려줍니다.
+    - ("optimal", StrategyResult), ("monteCarlo", MonteCarloResult)
+    - ("result", SimulationResponse): 마지막 이벤트
+    다음 값을 요청하지 않으면 이후 단계는 실행되지 않습니다 (스트리밍 응답의 취소 지점).
+    """
+    with metrics.stage("pick_driver"):
+        driver_laps = lap_table.pick_driver(request.driverId)
     if driver_laps.empty:
          raise HTTPException(status_code=404, detail="Driver data not found.")
 
     total_laps = int(driver_laps['LapNumber'].max())
+
+    if bundle is None:
+        with metrics.stage("session_bundle"):
+            bundle = get_session_bundle(lap_table.year, lap_table.race_id)
+        yield "stage", "session_bundle"
+
+    actual_result = bundle.actual_strategies.get(request.driverId)
+    if actual_result is None:
+        actual_result = get_actual_strategy(driver_laps)
+    degradation_model = degradation.model_for_driver(
+        bundle.degradation_table, request.driverId, request.fuelCorrected
+    )
+    race_events = bundle.race_events
     
-    actual_result = get_actual_strategy(driver_laps)
-    degradation_model = model_tire_degradation(driver_laps)
-    race_events = get_race_events(session)
-    
+    base_lap_time = float(driver_laps['LapTimeSeconds'].dropna().min())
+
+    # 모든 시나리오를 한 번에 배열 연산으로 시뮬레이션
     simulated_scenarios: List[StrategyResult] = []
-    
-    base_lap_time = driver_laps['LapTime'].dropna().min().total_seconds()
+    if request.scenarios:
+        try:
+            with metrics.stage("simulate_scenarios"):
+                simulated_scenarios = lap_engine.simulate_scenarios(
+                    scenarios=request.scenarios,
+                    total_laps=total_laps,
+                    base_lap_time=base_lap_time,
+                    degradation_model=degradation_model,
+                    pit_loss_seconds=request.pitLossSeconds
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        yield "stage", "simulate_scenarios"
+        for index, result in enumerate(simulated_scenarios):
+            yield "scenario", (index, result)
 
-    for scenario in request.scenarios:
-        sim_result = _simulate_strategy(
-            scenario=scenario,
+    optimal_result = None
+    if request.optimize:
+        # 규정을 만족하는 사용자 시나리오 중 최선값을 탐색 상한으로 사용
+        legal_totals = [
+            s.totalTime for s in simulated_scenarios
+            if strategy_optimizer.is_legal_strategy(s, request.maxStops)
+        ]
+        optimal_result = yield "compute", ("optimize_strategy", functools.partial(
+            strategy_optimizer.optimize_strategy,
             total_laps=total_laps,
             base_lap_time=base_lap_time,
             degradation_model=degradation_model,
-            pit_loss_seconds=request.pitLossSeconds
-        )
-        simulated_scenarios.append(sim_result)
-        
-    if not simulated_scenarios:
-        raise HTTPException(status_code=400, detail="No valid scenarios to simulate.")
+            pit_loss_seconds=request.pitLossSeconds,
+            max_stops=request.maxStops,
+            upper_bound=min(legal_totals) if legal_totals else None
+        ))
+        yield "stage", "optimize_strategy"
 
-    optimal_result = min(simulated_scenarios, key=lambda x: x.totalTime)
-    optimal_result.name = "Optimal" 
+    if optimal_result is None:
+        if not simulated_scenarios:
+            raise HTTPException(status_code=400, detail="No valid scenarios to simulate.")
+
+        # 사용자 시나리오 결과는 그대로 두고 복사본의 이름만 바꿈 (시나리오 목록과 what-if 기준에 원래 이름 유지)
+        optimal_result = min(simulated_scenarios, key=lambda x: x.totalTime).model_copy(update={"name": "Optimal"})
+    yield "optimal", optimal_result
     
+    # 몬테카를로: SC/성능 저하/피트 손실의 불확실성을 반영한 총 시간 분포
+    monte_carlo_result = None
+    if request.monteCarloRuns > 0 and request.scenarios:
+        monte_carlo_result = yield "compute", ("monte_carlo", functools.partial(
+            monte_carlo.run_monte_carlo,
+            scenarios=request.scenarios,
+            total_laps=total_laps,
+            base_lap_time=base_lap_time,
+            degradation_model=degradation_model,
+            pit_loss_seconds=request.pitLossSeconds,
+            race_events=race_events,
+            runs=request.monteCarloRuns,
+            seed=request.randomSeed
+        ))
+        yield "stage", "monte_carlo"
+        yield "monteCarlo", monte_carlo_result
+
     response = SimulationResponse(
         reportId=str(uuid.uuid4()),
         results={
@@ -185,13 +295,61 @@ def run_simulation(request: SimulationRequest) -> SimulationResponse:
             "optimal": optimal_result,
             "scenarios": simulated_scenarios
         },
-        raceEvents=race_events
+        raceEvents=race_events,
+        monteCarlo=monte_carlo_result
     )
     
-    return response
+    yield "result", response
 
 
-# --- 5. 개별 시나리오 시뮬레이터 (Helper) ---
+# --- 5. 배치 시뮬레이션 (같은 레이스의 여러 요청) ---
+
+def run_simulation_group(items: List[Tuple[int, SimulationRequest]]) -> List[dict]:
+    """
+    같은 (연도, 레이스)에 대한 요청 묶음을 한 번의 랩 테이블 로드와 세션 번들 조회로 처리합니다.
+    반환값: 요청 순번(index)별 결과 dict 목록 (JSON 직렬화 가능, 실패한 요청은 error 포함)
+    """
+    year, race_id = items[0][1].year, items[0][1].raceId
+    lap_table = data_service.get_lap_table(year, race_id)
+
+    outputs = []
+    if not lap_table:
+        for index, request in items:
+            outputs.append(_batch_output(index, request, error=(404, "Race data not found.")))
+        return outputs
+
+    with metrics.stage("session_bundle"):
+        bundle = get_session_bundle(year, race_id)
+
+    for index, request in items:
+        try:
+            response = simulate_driver(lap_table, request, bundle=bundle)
+            outputs.append(_batch_output(index, request, response=response))
+        except HTTPException as e:
+            outputs.append(_batch_output(index, request, error=(e.status_code, e.detail)))
+        except Exception as e:
+            logging.error(f"배치 시뮬레이션 중 오류 발생 (#{index}): {e}", exc_info=True)
+            outputs.append(_batch_output(index, request, error=(500, f"Internal Server Error: {e}")))
+
+    return outputs
+
+def _batch_output(index: int, request: SimulationRequest, response=None, error=None) -> dict:
+    """ 배치 결과 한 줄 (NDJSON) """
+    output = {
+        "index": index,
+        "year": request.year,
+        "raceId": request.raceId,
+        "driverId": request.driverId,
+    }
+    if response is not None:
+        output["response"] = response.model_dump(mode="json")
+    else:
+        status_code, detail = error
+        output["error"] = {"status": status_code, "detail": detail}
+    return output
+
+
+# --- 6. 개별 시나리오 시뮬레이터 (Helper) ---
 
 def _simulate_strategy(
     scenario: Scenario, 
@@ -202,69 +360,213 @@ def _simulate_strategy(
 ) -> StrategyResult:
     """ 
     단일 시나리오에 대해 랩 타임을 계산합니다. 
+    (계산은 lap_engine의 배치 엔진을 시나리오 1개짜리 배치로 호출합니다.)
     """
-    
-    lap_times_data = []
-    pit_laps = []
-    tire_stints = [] # (추가)
-    
-    current_stint_index = 0
-    tire_life = 0
-    current_stint_start_lap = 1 # (추가)
-    
-    # 수동 랩 지정을 위한 임시 endLap 설정 (시나리오에 스틴트가 1개면 마지막 랩)
-    if len(scenario.stints) == 1:
-        scenario.stints[0].endLap = total_laps
-
-    for lap in range(1, total_laps + 1):
-        if current_stint_index >= len(scenario.stints):
-            current_stint_index = len(scenario.stints) - 1
-            
-        stint = scenario.stints[current_stint_index]
-        compound = stint.compound
-        tire_life += 1
-        
-        # 랩 타임 계산
-        degradation = degradation_model.get(compound, 0.1) * tire_life
-        lap_time = base_lap_time + degradation
-        
-        # 임시 피트 스톱 로직
-        stints_count = len(scenario.stints)
-        if stints_count > 1 and (lap % (total_laps // stints_count) == 0) and lap < total_laps:
-            is_pit_lap = True
-        else:
-            is_pit_lap = False
-
-        if is_pit_lap:
-            lap_time += pit_loss_seconds 
-            pit_laps.append(lap)
-            
-            # 스틴트 정보 저장
-            tire_stints.append(TireStint(
-                compound=compound,
-                startLap=current_stint_start_lap,
-                endLap=lap
-            ))
-            current_stint_start_lap = lap + 1 # 다음 스틴트 시작 랩
-            
-            tire_life = 0 
-            if current_stint_index < len(scenario.stints) - 1:
-                current_stint_index += 1
-        
-        lap_times_data.append(lap_time)
-
-    # 마지막 스틴트 저장
-    last_compound = scenario.stints[current_stint_index].compound
-    tire_stints.append(TireStint(
-        compound=last_compound,
-        startLap=current_stint_start_lap,
-        endLap=total_laps
-    ))
+    return lap_engine.simulate_scenarios(
+        scenarios=[scenario],
+        total_laps=total_laps,
+        base_lap_time=base_lap_time,
+        degradation_model=degradation_model,
+        pit_loss_seconds=pit_loss_seconds
+    )[0]
 
-    return StrategyResult(
-        name=scenario.name,
-        totalTime=sum(lap_times_data),
-        pitLaps=pit_laps,
-        lapTimes=lap_times_data,
-        tireStints=tire_stints
-    )
\ No newline at end of file
+
+# --- 7. 세션 번들 (세션당 한 번 계산하는 분석 결과) ---
+
+# 번들 하나는 드라이버 20명의 실제 전략과 모델 정도로 수백 KB 이하
+bundle_cache = MemoryCache(
+    "sessionBundle",
+    max_bytes=int(os.getenv("F1SIM_BUNDLE_CACHE_MB", "64")) * 1024 * 1024,
+    ttl=None,
+    negative_ttl=60.0,
+)
+
+@dataclass
+class SessionBundle:
+    """
+    세션 하나에서 미리 계산해 두는 분석 결과.
+    랩 테이블 자체는 derived_store의 Arrow 파일에, 나머지는 옆의 JSON 파일에 저장됩니다.
+    """
+    year: int
+    race_id: str
+    drivers: List[DriverInfo]
+    actual_strategies: Dict[str, StrategyResult]  # 드라이버 약어 -> 실제 전략
+    degradation_table: degradation.DegradationTable
+    race_events: List[RaceEvent]
+
+    def to_payload(self) -> dict:
+        return {
+            "drivers": [d.model_dump(mode="json") for d in self.drivers],
+            "actualStrategies": {
+                driver: result.model_dump(mode="json") for driver, result in self.actual_strategies.items()
+            },
+            "degradation": self.degradation_table.to_records(),
+            "raceEvents": [e.model_dump(mode="json") for e in self.race_events],
+        }
+
+    @classmethod
+    def from_payload(cls, year: int, race_id: str, payload: dict) -> "SessionBundle":
+        return cls(
+            year=year,
+            race_id=str(race_id),
+            drivers=[DriverInfo(**d) for d in payload["drivers"]],
+            actual_strategies={
+                driver: StrategyResult(**result) for driver, result in payload["actualStrategies"].items()
+            },
+            degradation_table=degradation.table_from_records(payload["degradation"]),
+            race_events=[RaceEvent(**e) for e in payload["raceEvents"]],
+        )
+
+def build_session_bundle(lap_table: data_service.LapTable) -> SessionBundle:
+    """ 랩 테이블에서 드라이버 목록, 실제 전략, 성능 저하 모델, 레이스 이벤트를 계산합니다. """
+    laps = lap_table.laps
+    with metrics.stage("actual_strategies"):
+        actual_strategies = get_actual_strategies(laps)
+    with metrics.stage("degradation_fit"):
+        degradation_table = degradation.get_degradation_table(lap_table.year, lap_table.race_id, laps)
+    with metrics.stage("race_events"):
+        race_events = get_race_events(laps)
+
+    return SessionBundle(
+        year=lap_table.year,
+        race_id=lap_table.race_id,
+        drivers=data_service.get_drivers_for_race(lap_table.year, lap_table.race_id),
+        actual_strategies=actual_strategies,
+        degradation_table=degradation_table,
+        race_events=race_events,
+    )
+
+@bundle_cache.cached(key=lambda year, race_id: (year, str(race_id)))
+def get_session_bundle(year: int, race_id: str) -> Optional[SessionBundle]:
+    """
+    세션 번들을 반환합니다 (캐시 활용).
+    디스크에 저장된 번들이 있으면 그대로 읽고, 없으면 랩 테이블에서 계산해 저장합니다.
+    랩 테이블을 구할 수 없으면 None을 반환합니다.
+    """
+    payload = derived_store.read_bundle(year, race_id)
+    if payload is not None:
+        try:
+            return SessionBundle.from_payload(year, race_id, payload)
+        except Exception as e:
+            logging.warning(f"{year} {race_id} 세션 번들 복원 실패, 다시 계산합니다: {e}")
+
+    lap_table = data_service.get_lap_table(year, race_id)
+    if not lap_table:
+        return None
+
+    bundle = build_session_bundle(lap_table)
+    derived_store.write_bundle(year, race_id, bundle.to_payload())
+    return bundle
+
+
+# --- 8. 필드 전체 (다중 차량) 시뮬레이션 ---
+
+def _resolve_field_stints(stints: List[StintRequest], total_laps: int) -> Tuple[List[str], List[int]]:
+    """
+    요청 스틴트를 (컴파운드 목록, 스틴트 마지막 랩 목록)으로 바꿉니다.
+    endLap이 없는 스틴트는 lap_engine과 같은 균등 분할 규칙((total_laps // N) 랩마다 피트 스톱)을 따릅니다.
+    """
+    interval = total_laps // len(stints)
+    if len(stints) > 1 and interval == 0:
+        raise HTTPException(status_code=400, detail="스틴트 수가 전체 랩 수보다 많습니다.")
+
+    end_laps = [
+        stint.endLap if stint.endLap is not None else interval * (k + 1)
+        for k, stint in enumerate(stints)
+    ]
+    end_laps[-1] = total_laps
+    if any(b <= a for a, b in zip([0] + end_laps, end_laps)):
+        raise HTTPException(status_code=400, detail="스틴트의 endLap은 1 이상이고 순서대로 증가해야 합니다.")
+    return [stint.compound for stint in stints], end_laps
+
+def run_field_simulation(request: FieldSimulationRequest) -> FieldSimulationResponse:
+    """
+    레이스에 참가한 모든 드라이버를 함께 시뮬레이션하여 트래픽(더티 에어, 추월 난이도)과 순위를 반영합니다.
+    요청에 전략이 없는 드라이버는 실제 전략을 그대로 사용하며, 기준 랩 타임/성능 저하 모델은
+    단일 드라이버 시뮬레이션과 같습니다 (세션 번들에서 가져오며 다시 적합하지 않음).
+    """
+    lap_table = data_service.get_lap_table(request.year, request.raceId)
+    if not lap_table:
+        raise HTTPException(status_code=404, detail="Race data not found.")
+    with metrics.stage("session_bundle"):
+        bundle = get_session_bundle(request.year, request.raceId)
+
+    with metrics.stage("field_setup"):
+        # 드라이버별 기준 랩 타임(최소 랩 타임)과 마지막 랩: 카테고리 코드로 한 번에 집계
+        laps = lap_table.laps
+        codes = laps['Driver'].cat.codes.to_numpy()
+        categories = laps['Driver'].cat.categories
+        # 드라이버가 비어 있는(NaN) 행은 코드가 -1이므로 제외 (그대로 두면 마지막 드라이버에 집계됨)
+        valid = codes >= 0
+        codes = codes[valid]
+        base_by_code = np.full(len(categories), np.nan)
+        last_lap_by_code = np.zeros(len(categories), dtype=np.int64)
+        np.fmin.at(base_by_code, codes, laps['LapTimeSeconds'].to_numpy(dtype=np.float64)[valid])
+        np.maximum.at(last_lap_by_code, codes, laps['LapNumber'].to_numpy(dtype=np.float64)[valid].astype(np.int64))
+        base_by_driver = {
+            str(d): (base, int(last))
+            for d, base, last in zip(categories, base_by_code, last_lap_by_code)
+            if last > 0 and not np.isnan(base)
+        }
+        total_laps = int(last_lap_by_code.max())
+
+        # 실제 전략 (마지막 스틴트는 레이스 끝까지, 리타이어는 laps_completed로 처리)
+        strategies = {}
+        for driver_id in base_by_driver:
+            actual = bundle.actual_strategies.get(driver_id)
+            if actual is None or not actual.tireStints:
+                continue
+            end_laps = [s.endLap for s in actual.tireStints]
+            end_laps[-1] = total_laps
+            strategies[driver_id] = ([s.compound for s in actual.tireStints], end_laps)
+
+        for override in request.strategies:
+            if override.driverId not in strategies:
+                raise HTTPException(status_code=404, detail=f"Driver data not found: {override.driverId}")
+            strategies[override.driverId] = _resolve_field_stints(override.stints, total_laps)
+
+        driver_ids = list(strategies)
+        plan = field_engine.encode_field(
+            strategies, total_laps, {d: base_by_driver[d][1] for d in driver_ids}
+        )
+        base_lap_times = np.array([base_by_driver[d][0] for d in driver_ids])
+        degradation_models = [
+            degradation.model_for_driver(bundle.degradation_table, driver_id, request.fuelCorrected)
+            for driver_id in driver_ids
+        ]
+
+        # 출발 순서: 요청한 순서 다음에 나머지 드라이버를 기준 랩 타임 순으로
+        grid_order = None
+        if request.grid:
+            duplicates = sorted({d for d in request.grid if request.grid.count(d) > 1})
+            if duplicates:
+                raise HTTPException(status_code=400, detail=f"출발 순서에 중복된 드라이버가 있습니다: {', '.join(duplicates)}")
+            listed = [driver_ids.index(d) for d in request.grid if d in strategies]
+            rest = [i for i in np.argsort(base_lap_times, kind="stable") if i not in listed]
+            grid_order = np.array(listed + rest, dtype=np.intp)
+
+    with metrics.stage("field_simulation"):
+        field = field_engine.simulate_field(
+            plan, base_lap_times, degradation_models, request.pitLossSeconds, grid_order
+        )
+
+    final_positions = field["positions"][:, -1]
+    final_times = field["cumulative"][np.arange(len(driver_ids)), plan.laps_completed - 1]
+    leader = int(np.argmin(final_positions))
+
+    results = []
+    for i in np.argsort(final_positions):
+        finished = plan.laps_completed[i] == total_laps
+        results.append(FieldDriverResult.model_construct(
+            driverId=driver_ids[i],
+            position=int(final_positions[i]),
+            totalTime=float(final_times[i]),
+            gapToLeader=float(final_times[i] - final_times[leader]) if finished else None,
+            lapsCompleted=int(plan.laps_completed[i]),
+            pitLaps=(np.flatnonzero(plan.pit_mask[i, :plan.laps_completed[i]]) + 1).tolist(),
+            trafficLossSeconds=float(field["trafficLoss"][i]),
+            lapTimes=field["lapTimes"][i, :plan.laps_completed[i]].tolist(),
+            positionsByLap=field["positions"][i].tolist(),
+        ))
+
+    return FieldSimulationResponse(totalLaps=total_laps, results=results)
@@ -0,0 +1,180 @@
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from models.simulation import StrategyResult
+from services import lap_engine
+
+# 최적화 탐색에 사용하는 드라이 컴파운드 (두 종류 이상 사용 규정 적용 대상)
+DRY_COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+
+# 부동소수점 오차로 최적 경로가 가지치기되지 않도록 두는 여유값 (초)
+PRUNE_EPSILON = 1e-6
+
+# --- 1. 동적 계획법 (DP) 탐색 ---
+#
+# 상태: (랩, 컴파운드 c, 타이어 수명 t, 피트 스톱 횟수 s, 사용한 컴파운드 비트마스크 m)
+# V[c, t, s, m] = 1랩부터 현재 랩까지의 최소 누적 시간
+#  - 주행 유지: (c, t, s, m) -> (c, t + 1, s, m)
+#  - 피트 스톱: 현재 랩에 피트 손실 추가 후 -> (c', 1, s + 1, m | bit(c'))
+# 랩 타임 모델은 lap_engine과 동일합니다: base + degradation[c] * t (+ 피트 손실)
+
+def _dp_tables(
+    total_laps: int,
+    base_lap_time: float,
+    degradation: np.ndarray,
+    pit_loss_seconds: float,
+    max_stops: int,
+    upper_bound: Optional[float]
+) -> List[np.ndarray]:
+    """ 랩별 DP 테이블 목록을 계산합니다. tables[l - 1]이 l번째 랩의 테이블입니다. """
+    n_compounds = len(degradation)
+    n_masks = 1 << n_compounds
+    life = np.arange(total_laps + 1)
+
+    # lap_cost[c, t]: 컴파운드 c, 타이어 수명 t인 랩의 주행 시간
+    lap_cost = base_lap_time + degradation[:, None] * life[None, :]
+
+    # 남은 랩의 하한 (성능 저하가 음수가 아닐 때만 가지치기에 사용)
+    can_prune = upper_bound is not None and (degradation >= 0).all()
+    min_lap_cost = base_lap_time + degradation.min()
+
+    table = np.full((n_compounds, total_laps + 1, max_stops + 1, n_masks), np.inf)
+    for c in range(n_compounds):
+        table[c, 1, 0, 1 << c] = lap_cost[c, 1]
+    tables = [table]
+
+    for lap in range(2, total_laps + 1):
+        prev = tables[-1]
+        table = np.full_like(prev, np.inf)
+
+        # 주행 유지: 타이어 수명 + 1
+        table[:, 2:, :, :] = prev[:, 1:-1, :, :] + lap_cost[:, 2:, None, None]
+
+        # 피트 스톱: 직전 랩의 (c, t) 중 최소값에서 새 컴파운드로 교체
+        best_prev = prev.min(axis=(0, 1)) + pit_loss_seconds  # (s, m)
+        for c in range(n_compounds):
+            bit = 1 << c
+            for mask in range(n_masks):
+                candidate = best_prev[:-1, mask] + lap_cost[c, 1]
+                target = table[c, 1, 1:, mask | bit]
+                np.minimum(target, candidate, out=target)
+
+        # 가지치기: 남은 랩을 가장 빠르게 달려도 현재 최선값을 넘는 상태 제거
+        if can_prune:
+            remaining = (total_laps - lap) * min_lap_cost
+            table[table + remaining > upper_bound + PRUNE_EPSILON] = np.inf
+
+        tables.append(table)
+
+    return tables
+
+
+def _backtrack(
+    tables: List[np.ndarray],
+    state: Tuple[int, int, int, int]
+) -> Tuple[List[int], List[int]]:
+    """ 최종 상태에서 거꾸로 따라가며 (랩별 컴파운드 인덱스, 피트 스톱 랩)을 복원합니다. """
+    c, t, s, m = state
+    compounds_per_lap = []
+    pit_laps = []
+
+    for lap in range(len(tables), 0, -1):
+        compounds_per_lap.append(c)
+        if lap == 1:
+            break
+        if t > 1:
+            t -= 1
+            continue
+
+        # t == 1: 직전 랩 종료 시 피트 스톱으로 이 컴파운드를 장착한 경우
+        prev = tables[lap - 2]
+        bit = 1 << c
+        candidates = [mask for mask in (m, m ^ bit) if mask | bit == m]
+        best = None
+        for mask in candidates:
+            sub = prev[:, :, s - 1, mask]
+            idx = np.unravel_index(np.argmin(sub), sub.shape)
+            if best is None or sub[idx] < best[0]:
+                best = (sub[idx], int(idx[0]), int(idx[1]), mask)
+
+        _, c, t, m = best
+        s -= 1
+        pit_laps.append(lap - 1)
+
+    compounds_per_lap.reverse()
+    pit_laps.reverse()
+    return compounds_per_lap, pit_laps
+
+# --- 2. 최적 전략 탐색 (메인) ---
+
+def optimize_strategy(
+    total_laps: int,
+    base_lap_time: float,
+    degradation_model: Dict[str, float],
+    pit_loss_seconds: float,
+    max_stops: int,
+    upper_bound: Optional[float] = None,
+    compounds: List[str] = DRY_COMPOUNDS
+) -> Optional[StrategyResult]:
+    """
+    최대 피트 스톱 횟수 내에서 가능한 모든 컴파운드 순서와 피트 랩을 탐색하여
+    총 레이스 시간이 가장 짧은 전략을 반환합니다.
+    드라이 컴파운드를 두 종류 이상 사용해야 한다는 규정을 적용합니다.
+
+    upper_bound: 이미 알고 있는 (규정을 만족하는) 전략의 총 시간. 이보다 느린 상태는 가지치기됩니다.
+    규정을 만족하는 전략이 없으면 None을 반환합니다.
+    """
+    if total_laps < 2 or max_stops < 1:
+        return None
+
+    degradation = np.array(
+        [degradation_model.get(c, lap_engine.DEFAULT_DEGRADATION) for c in compounds],
+        dtype=np.float64,
+    )
+    tables = _dp_tables(
+        total_laps, base_lap_time, degradation, pit_loss_seconds, max_stops, upper_bound
+    )
+
+    # 두 종류 이상의 컴파운드를 사용한 비트마스크만 허용
+    final = tables[-1].copy()
+    for mask in range(final.shape[3]):
+        if bin(mask).count("1") < 2:
+            final[:, :, :, mask] = np.inf
+
+    best_index = np.unravel_index(np.argmin(final), final.shape)
+    if not np.isfinite(final[best_index]):
+        return None
+
+    compounds_per_lap, pit_laps = _backtrack(tables, tuple(int(i) for i in best_index))
+
+    # 복원한 전략을 lap_engine 배치로 만들어 랩 타임/결과를 계산
+    laps = np.arange(1, total_laps + 1)
+    pit_mask = np.isin(laps, pit_laps)
+    last_pit = np.maximum.accumulate(np.where(pit_mask, laps, 0))
+    tyre_life = laps - np.concatenate([[0], last_pit[:-1]])
+
+    batch = lap_engine.ScenarioBatch(
+        names=["Optimal"],
+        compounds=list(compounds),
+        compound_index=np.array([compounds_per_lap], dtype=np.intp),
+        tyre_life=tyre_life[None, :],
+        pit_mask=pit_mask[None, :],
+    )
+    lap_times = lap_engine.compute_lap_times(
+        batch, base_lap_time, degradation_model, pit_loss_seconds
+    )
+    totals = lap_engine.cumulative_times(lap_times)[:, -1]
+    return lap_engine.build_strategy_results(batch, lap_times, totals)[0]
+
+
+def is_legal_strategy(
+    result: StrategyResult,
+    max_stops: int,
+    compounds: List[str] = DRY_COMPOUNDS
+) -> bool:
+    """ 시뮬레이션 결과가 최적화 탐색 공간 안에 있는 (규정을 만족하는) 전략인지 확인합니다. """
+    used = {stint.compound for stint in result.tireStints}
+    return (
+        len(result.pitLaps) <= max_stops
+        and used.issubset(compounds)
+        and len(used) >= 2
+    )
@@ -0,0 +1,101 @@
+import numpy as np
+from typing import List
+from fastapi import HTTPException
+from models.simulation import Crossover, SweepRange, SweepRequest, SweepResponse
+from core import metrics
+from services import data_service, degradation, lap_engine, simulation_service
+
+
+def _grid(sweep_range: SweepRange) -> np.ndarray:
+    return np.linspace(sweep_range.start, sweep_range.stop, sweep_range.steps)
+
+
+def _envelope_crossovers(intercepts: np.ndarray, slopes: np.ndarray, low: float, high: float) -> List[tuple]:
+    """
+    직선 y_s(x) = intercepts[s] + slopes[s] * x 들의 하한(lower envelope)을 low에서 high까지 따라가며,
+    최솟값을 주는 직선이 바뀌는 지점 (x, 이전 인덱스, 다음 인덱스) 목록을 반환합니다.
+    격자 사이에서 바뀌는 지점도 정확한 값으로 구합니다.
+    """
+    values = intercepts + slopes * low
+    # 같은 값이면 기울기가 작은 쪽이 이후에도 최선
+    current = int(np.lexsort((slopes, values))[0])
+    x = low
+    crossovers = []
+    while True:
+        flatter = slopes < slopes[current]
+        if not flatter.any():
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            meets = (intercepts - intercepts[current]) / (slopes[current] - slopes)
+        meets = np.where(flatter & (meets > x), meets, np.inf)
+        # 현재 직선보다 완만한 직선 중 가장 먼저 만나는 직선 (동시에 만나면 가장 완만한 직선)
+        nxt = int(np.lexsort((slopes, meets))[0])
+        if not meets[nxt] <= high:
+            break
+        crossovers.append((float(meets[nxt]), current, nxt))
+        current, x = nxt, meets[nxt]
+    return crossovers
+
+
+def run_sweep(request: SweepRequest) -> SweepResponse:
+    """
+    시나리오들의 총 시간을 피트 손실 x 성능 저하 배율 격자 전체에서 계산합니다.
+    기준 랩 타임과 성능 저하 모델은 /api/simulate와 같으며 (세션 번들에서 가져옴, 다시 적합하지 않음),
+    총 시간이 두 파라미터에 대해 선형이므로 시나리오당 세 값만 구한 뒤 격자 전체를 한 번에 브로드캐스트합니다.
+    """
+    lap_table = data_service.get_lap_table(request.year, request.raceId)
+    if not lap_table:
+        raise HTTPException(status_code=404, detail="Race data not found.")
+
+    driver_laps = lap_table.pick_driver(request.driverId)
+    if driver_laps.empty:
+        raise HTTPException(status_code=404, detail="Driver data not found.")
+    with metrics.stage("session_bundle"):
+        bundle = simulation_service.get_session_bundle(request.year, request.raceId)
+
+    total_laps = int(driver_laps['LapNumber'].max())
+    base_lap_time = float(driver_laps['LapTimeSeconds'].dropna().min())
+    degradation_model = degradation.model_for_driver(
+        bundle.degradation_table, request.driverId, request.fuelCorrected
+    )
+
+    pit_losses = _grid(request.pitLossSeconds)
+    scales = _grid(request.degradationScale)
+
+    with metrics.stage("sweep"):
+        try:
+            batch = lap_engine.encode_scenarios(request.scenarios, total_laps)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        constant, degradation_term, pit_count = lap_engine.total_time_terms(batch, base_lap_time, degradation_model)
+        totals = lap_engine.sweep_totals((constant, degradation_term, pit_count), pit_losses, scales)
+        best = totals.argmin(axis=0)
+
+    # 최선 전략이 바뀌는 지점: 배율을 고정하고 피트 손실을 따라, 피트 손실을 고정하고 배율을 따라
+    crossovers = []
+    with metrics.stage("sweep_crossovers"):
+        for scale in scales:
+            for value, before, after in _envelope_crossovers(
+                constant + scale * degradation_term, pit_count, pit_losses[0], pit_losses[-1]
+            ):
+                crossovers.append(Crossover(
+                    axis="pitLossSeconds", value=value, fixedValue=float(scale),
+                    fromScenario=batch.names[before], toScenario=batch.names[after]
+                ))
+        for pit_loss in pit_losses:
+            for value, before, after in _envelope_crossovers(
+                constant + pit_loss * pit_count, degradation_term, scales[0], scales[-1]
+            ):
+                crossovers.append(Crossover(
+                    axis="degradationScale", value=value, fixedValue=float(pit_loss),
+                    fromScenario=batch.names[before], toScenario=batch.names[after]
+                ))
+
+    return SweepResponse(
+        scenarios=batch.names,
+        pitLossSeconds=pit_losses.tolist(),
+        degradationScale=scales.tolist(),
+        totalTimes=totals.tolist(),
+        best=best.tolist(),
+        crossovers=crossovers,
+    )
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from core import derived_store, executor
+from core.cache import get_fastf1
+from services import data_service, simulation_service
+
+# --- 워밍업 설정 (환경 변수로 조절) ---
+# 앱 시작 시 미리 준비할 최근 레이스 수 (0이면 시작 시 워밍업하지 않음)
+WARMUP_RECENT_RACES = int(os.getenv("F1SIM_WARMUP_RECENT_RACES", "3"))
+# 동시에 준비할 레이스 수 (FastF1 다운로드가 몰리지 않도록 제한)
+WARMUP_CONCURRENCY = int(os.getenv("F1SIM_WARMUP_CONCURRENCY", "2"))
+# 새로 끝난 레이스를 확인하는 주기 (분)
+WARMUP_INTERVAL_MINUTES = int(os.getenv("F1SIM_WARMUP_INTERVAL_MINUTES", "30"))
+# 레이스 시작 후 데이터가 공개될 때까지 기다리는 시간 (시간)
+RACE_DATA_DELAY_HOURS = float(os.getenv("F1SIM_RACE_DATA_DELAY_HOURS", "4"))
+
+
+def get_finished_races(year: int) -> List[Tuple[int, str]]:
+    """
+    FastF1 스케줄에서 레이스 세션이 끝나 데이터가 공개되었을 시점이 지난 경기를 찾습니다.
+    반환값: 라운드 순서의 (연도, 라운드) 목록
+    """
+    try:
+        schedule = get_fastf1().get_event_schedule(year, include_testing=False)
+    except Exception as e:
+        logging.error(f"[warmup] {year}년 스케줄 로드 실패: {e}")
+        return []
+
+    if schedule.empty or 'Session5DateUtc' not in schedule:
+        return []
+
+    race_start = pd.to_datetime(schedule['Session5DateUtc'], errors='coerce')
+    cutoff = datetime.utcnow() - timedelta(hours=RACE_DATA_DELAY_HOURS)
+    rounds = pd.to_numeric(schedule['RoundNumber'], errors='coerce')
+
+    finished = schedule[(race_start <= cutoff) & (rounds > 0)]
+    return [(year, str(int(r))) for r in sorted(rounds[finished.index])]
+
+
+def warm_race(year: int, race_id: str) -> bool:
+    """
+    레이스 하나의 랩 테이블과 세션 번들을 만들어 디스크와 메모리 캐시에 올립니다.
+    이후 해당 레이스 요청은 FastF1 로드 없이 처리됩니다. 성공하면 True
+    """
+    bundle = simulation_service.get_session_bundle(year, race_id)
+    if bundle is None:
+        logging.warning(f"[warmup] {year} {race_id} 번들 생성 실패 (데이터 없음)")
+        return False
+
+    data_service.drivers_cache.set((year, str(race_id)), bundle.drivers)
+    return True
+
+
+async def warm_races(races: List[Tuple[int, str]], concurrency: int = WARMUP_CONCURRENCY) -> int:
+    """ 여러 레이스를 동시 실행 수를 제한하여 준비합니다. 반환값: 성공한 레이스 수 """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def warm(year: int, race_id: str) -> bool:
+        async with semaphore:
+            try:
+                # 랩 테이블은 사용자 요청과 같은 single-flight 로더로 가져옴 (동시 로드 방지)
+                if await data_service.fetch_lap_table(year, race_id) is None:
+                    return False
+                return await executor.run_io(warm_race, year, race_id)
+            except Exception as e:
+                logging.error(f"[warmup] {year} {race_id} 워밍업 중 오류 발생: {e}", exc_info=True)
+                return False
+
+    results = await asyncio.gather(*(warm(year, race_id) for year, race_id in races))
+    return sum(results)
+
+
+async def warm_new_races():
+    """
+    [스케줄러 작업] 올해 끝난 레이스 중 아직 번들이 없는 경기를 준비합니다.
+    """
+    year = datetime.utcnow().year
+    finished = await executor.run_io(get_finished_races, year)
+    pending = [(y, r) for y, r in finished if not derived_store.has_bundle(y, r)]
+    if not pending:
+        return
+
+    logging.info(f"[warmup] 새로 끝난 레이스 {len(pending)}개 준비 시작: {pending}")
+    done = await warm_races(pending)
+    logging.info(f"[warmup] {done}/{len(pending)}개 레이스 준비 완료")
+
+
+async def warm_recent_races(count: int = WARMUP_RECENT_RACES):
+    """
+    [앱 시작 시] 가장 최근에 끝난 레이스 count개를 메모리에 올립니다 (연초에는 전년도까지 포함).
+    """
+    if count <= 0:
+        return
+
+    year = datetime.utcnow().year
+    races = await executor.run_io(get_finished_races, year)
+    if len(races) < count:
+        races = await executor.run_io(get_finished_races, year - 1) + races
+    recent = races[-count:]
+
+    logging.info(f"[warmup] 최근 레이스 {len(recent)}개 미리 로드 시작: {recent}")
+    done = await warm_races(recent)
+    logging.info(f"[warmup] {done}/{len(recent)}개 레이스 미리 로드 완료")
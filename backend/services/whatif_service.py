@@ -0,0 +1,336 @@
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from models.simulation import (
+    SimulationRequest, SimulationResponse, StrategyResult, TireStint, WhatIfRequest, WhatIfResponse
+)
+from core import derived_store
+from core.memory_cache import MemoryCache
+from services import data_service, degradation, lap_engine, simulation_service
+
+# 리포트별 수정 상태: 사용자가 화면을 보고 있는 동안만 유지 (마지막 수정 후 이 시간이 지나면 만료)
+WHATIF_TTL_SECONDS = float(os.getenv("F1SIM_WHATIF_TTL_SECONDS", "1800"))
+
+# 상태는 derived 저장소에 기록하여 워커 프로세스끼리 공유하고, 메모리에는 최근 상태를 올려 둡니다.
+# (같은 리포트를 여러 워커가 동시에 수정하면 마지막에 저장한 수정이 남습니다.)
+# 결과 캐시에서 같은 결과를 받은 응답들은 기준 상태(base) 하나를 공유하고, 응답마다 다른 reportId를 받습니다.
+# 리포트의 수정 상태는 첫 수정 때 기준 상태를 복사하여 reportId로 저장하므로 클라이언트끼리 섞이지 않습니다.
+whatif_cache = MemoryCache(
+    "whatIf",
+    max_bytes=int(os.getenv("F1SIM_WHATIF_CACHE_MB", "32")) * 1024 * 1024,
+    ttl=WHATIF_TTL_SECONDS,
+    negative_ttl=0.0,
+)
+
+# --- 1. 수정 상태 ---
+
+@dataclass
+class ScenarioState:
+    """ 시나리오 하나의 현재 스틴트 구성과 랩 타임, 누적 시간 (prefix sum) """
+    compounds: List[str]     # 스틴트별 컴파운드
+    end_laps: List[int]      # 스틴트별 마지막 랩 (마지막 스틴트 제외 = 피트 스톱 랩)
+    lap_times: np.ndarray    # (L,)
+    cumulative: np.ndarray   # (L,) 랩 타임의 누적 합, 마지막 값이 총 시간
+
+
+@dataclass
+class WhatIfContext:
+    """ 리포트 하나의 수정 기준 (시뮬레이션 요청, 모델 파라미터, 시나리오별 상태) """
+    request: SimulationRequest
+    total_laps: int
+    scenarios: Dict[str, ScenarioState]
+    # 첫 수정 시점에 세션 번들/랩 테이블 캐시에서 한 번만 채움
+    base_lap_time: Optional[float] = None
+    degradation_model: Optional[Dict[str, float]] = None
+    # 같은 리포트에 대한 수정은 순서대로 적용
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # 저장소에 기록된 상태의 리비전 (다른 프로세스가 수정했는지 확인용, 저장 실패 시 None)
+    revision: Optional[Tuple[int, int]] = None
+
+
+def _state_from_result(result: StrategyResult) -> Optional[ScenarioState]:
+    if not result.lapTimes or not result.tireStints:
+        return None
+    lap_times = np.asarray(result.lapTimes, dtype=np.float64)
+    return ScenarioState(
+        compounds=[s.compound for s in result.tireStints],
+        end_laps=[s.endLap for s in result.tireStints],
+        lap_times=lap_times,
+        cumulative=np.cumsum(lap_times),
+    )
+
+
+def _to_payload(context: WhatIfContext) -> dict:
+    return {
+        "request": context.request.model_dump(mode="json"),
+        "totalLaps": context.total_laps,
+        "scenarios": {
+            name: {
+                "compounds": state.compounds,
+                "endLaps": [int(e) for e in state.end_laps],
+                "lapTimes": state.lap_times.tolist(),
+                "cumulative": state.cumulative.tolist(),
+            }
+            for name, state in context.scenarios.items()
+        },
+    }
+
+
+def _from_payload(payload: dict, revision: Tuple[int, int]) -> WhatIfContext:
+    return WhatIfContext(
+        request=SimulationRequest(**payload["request"]),
+        total_laps=payload["totalLaps"],
+        scenarios={
+            name: ScenarioState(
+                compounds=state["compounds"],
+                end_laps=state["endLaps"],
+                lap_times=np.asarray(state["lapTimes"], dtype=np.float64),
+                cumulative=np.asarray(state["cumulative"], dtype=np.float64),
+            )
+            for name, state in payload["scenarios"].items()
+        },
+        revision=revision,
+    )
+
+
+def _save(report_id: str, context: WhatIfContext):
+    context.revision = derived_store.write_whatif_state(report_id, _to_payload(context))
+    whatif_cache.set(report_id, context)
+
+
+def _context_from_response(request: SimulationRequest, response: SimulationResponse) -> Optional[WhatIfContext]:
+    results = [response.results.get("optimal")] + list(response.results.get("scenarios", []))
+    scenarios = {}
+    for result in results:
+        state = _state_from_result(result) if result is not None else None
+        if state is not None:
+            scenarios[result.name] = state
+    if not scenarios:
+        return None
+
+    total_laps = len(next(iter(scenarios.values())).lap_times)
+    return WhatIfContext(request=request, total_laps=total_laps, scenarios=scenarios)
+
+
+def _base_id(result_key: str) -> str:
+    """ 같은 결과(요청 해시)를 받은 리포트들이 공유하는 기준 상태의 ID: 결과 키 앞 8바이트 + 0 """
+    return str(uuid.UUID(bytes=bytes.fromhex(result_key[:16]) + bytes(8)))
+
+
+def _new_report_id(base_id: str) -> str:
+    """ 응답마다 새 reportId: 기준 상태 ID의 앞 8바이트 + 무작위 (마지막 바이트는 0이 아니므로 기준 ID와 겹치지 않음) """
+    return str(uuid.UUID(bytes=uuid.UUID(base_id).bytes[:8] + os.urandom(7) + b"\x01"))
+
+
+def _base_of(report_id: str) -> Optional[str]:
+    """ reportId가 가리키는 기준 상태의 ID. 형식이 맞지 않으면 None """
+    try:
+        prefix = uuid.UUID(report_id).bytes[:8]
+    except (ValueError, TypeError):
+        return None
+    return str(uuid.UUID(bytes=prefix + bytes(8)))
+
+
+def _is_base(report_id: str) -> bool:
+    """ 기준 상태 자신의 ID인지 (클라이언트에게 주지 않으며, 이 ID로는 수정할 수 없음) """
+    return _base_of(report_id) == report_id.lower()
+
+
+def _age_seconds(revision: Tuple[int, int]) -> float:
+    return (time.time_ns() - revision[1]) / 1e9
+
+
+def register(request: SimulationRequest, response: SimulationResponse, result_key: Optional[str] = None) -> SimulationResponse:
+    """
+    시뮬레이션 결과를 수정 기준으로 등록하고, 이 응답에 쓸 결과(reportId 포함)를 반환합니다.
+    - result_key가 있으면(결과 캐시를 사용하는 요청) 기준 상태를 공유하고 응답마다 새 reportId를 붙입니다.
+      기준 상태는 없거나 만료 시간의 절반이 지났을 때만 저장하므로, 캐시 적중마다 파일을 쓰지 않습니다.
+    - 없으면 응답의 reportId로 바로 등록합니다.
+    """
+    if result_key is None:
+        context = _context_from_response(request, response)
+        if context is not None:
+            _save(response.reportId, context)
+        return response
+
+    base_id = _base_id(result_key)
+    revision = derived_store.whatif_revision(base_id)
+    if revision is None or _age_seconds(revision) > WHATIF_TTL_SECONDS / 2:
+        context = _context_from_response(request, response)
+        if context is not None:
+            derived_store.write_whatif_state(base_id, _to_payload(context))
+    return response.model_copy(update={"reportId": _new_report_id(base_id)})
+
+
+def is_fresh(report_id: str) -> bool:
+    """
+    리포트를 앞으로도 한동안(만료 시간의 절반 이상) 수정할 수 있는지.
+    조건부 요청에 304로 응답해도 클라이언트가 가진 reportId를 계속 쓸 수 있는지 확인할 때 사용합니다.
+    """
+    if _is_base(report_id):
+        return False
+    for state_id in (report_id, _base_of(report_id)):
+        revision = derived_store.whatif_revision(state_id) if state_id else None
+        if revision is not None and _age_seconds(revision) <= WHATIF_TTL_SECONDS / 2:
+            return True
+    return False
+
+
+def _read_state(state_id: Optional[str]) -> Optional[Tuple[dict, Tuple[int, int]]]:
+    """ 저장된 상태 (없거나 만료되었으면 None) """
+    revision = derived_store.whatif_revision(state_id) if state_id else None
+    if revision is None or _age_seconds(revision) > WHATIF_TTL_SECONDS:
+        return None
+    return derived_store.read_whatif_state(state_id)
+
+
+def _load_context(report_id: str) -> WhatIfContext:
+    """
+    리포트의 수정 상태를 가져옵니다: 메모리에 있고 저장소의 리비전과 같으면 그대로,
+    다른 프로세스가 수정했으면 저장소에서 다시 읽습니다. 아직 수정하지 않은 리포트는 공유 기준 상태에서 시작합니다.
+    없거나 만료되었으면 404
+    """
+    if _is_base(report_id):
+        raise HTTPException(status_code=404, detail="Report not found or expired.")
+
+    revision = derived_store.whatif_revision(report_id)
+    found, context = whatif_cache.get(report_id)
+    if found and context.revision == revision:
+        return context
+
+    # 수정한 적이 있는 리포트는 자신의 상태만 사용 (만료되었으면 기준 상태로 되돌리지 않음)
+    stored = _read_state(report_id) if revision is not None else _read_state(_base_of(report_id))
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Report not found or expired.")
+
+    previous = context if found else None
+    context = _from_payload(*stored)
+    if previous is not None:
+        # 같은 리포트의 기준 랩 타임/성능 저하 모델은 바뀌지 않으므로 이미 구한 값을 재사용
+        context.base_lap_time = previous.base_lap_time
+        context.degradation_model = previous.degradation_model
+    whatif_cache.set(report_id, context)
+    return context
+
+
+def _ensure_models(context: WhatIfContext):
+    """ 기준 랩 타임과 성능 저하 모델을 캐시된 랩 테이블/세션 번들에서 가져옵니다 (재로드/재적합 없음). """
+    if context.degradation_model is not None:
+        return
+
+    request = context.request
+    lap_table = data_service.get_lap_table(request.year, request.raceId)
+    bundle = simulation_service.get_session_bundle(request.year, request.raceId)
+    if not lap_table or bundle is None:
+        raise HTTPException(status_code=404, detail="Race data not found.")
+
+    driver_laps = lap_table.pick_driver(request.driverId)
+    context.base_lap_time = float(driver_laps['LapTimeSeconds'].dropna().min())
+    context.degradation_model = degradation.model_for_driver(
+        bundle.degradation_table, request.driverId, request.fuelCorrected
+    )
+
+# --- 2. 증분 재계산 ---
+
+def _resolve_stints(edit: WhatIfRequest, state: ScenarioState, total_laps: int) -> ScenarioState:
+    """ 수정 요청의 스틴트를 (컴파운드, 마지막 랩) 목록으로 바꾸고 검증합니다. """
+    compounds, end_laps = [], []
+    for k, stint in enumerate(edit.stints):
+        if stint.endLap is not None:
+            end_lap = stint.endLap
+        elif k < len(state.end_laps) - 1 and k < len(edit.stints) - 1:
+            end_lap = state.end_laps[k]
+        else:
+            end_lap = total_laps
+        compounds.append(stint.compound)
+        end_laps.append(end_lap)
+    end_laps[-1] = total_laps
+
+    if any(b <= a for a, b in zip([0] + end_laps, end_laps)) or end_laps[0] < 1:
+        raise HTTPException(status_code=400, detail="스틴트의 endLap은 1 이상이고 순서대로 증가해야 합니다.")
+
+    return ScenarioState(compounds=compounds, end_laps=end_laps, lap_times=state.lap_times, cumulative=state.cumulative)
+
+
+def _first_changed_lap(old: ScenarioState, new: ScenarioState) -> int:
+    """ 구성이 처음 달라지는 스틴트의 시작 랩 (그 이전 랩은 랩 타임이 같음) """
+    start_lap = 1
+    for k in range(min(len(old.compounds), len(new.compounds))):
+        if old.compounds[k] != new.compounds[k] or old.end_laps[k] != new.end_laps[k]:
+            return start_lap
+        start_lap = new.end_laps[k] + 1
+    return start_lap
+
+
+def apply_edit(report_id: str, edit: WhatIfRequest) -> WhatIfResponse:
+    """
+    기존 결과에서 바뀐 스틴트의 시작 랩부터만 랩 타임을 다시 계산하고,
+    바뀌지 않은 앞부분의 누적 시간(prefix sum)에 이어 붙여 총 시간을 구합니다.
+    """
+    context = _load_context(report_id)
+    with context.lock:
+        response = _apply_edit(report_id, context, edit)
+        _save(report_id, context)
+        return response
+
+
+def prune_expired() -> int:
+    """ [스케줄러 작업] 만료된 수정 상태 파일을 정리합니다. """
+    return derived_store.prune_whatif_states(WHATIF_TTL_SECONDS)
+
+
+def _apply_edit(report_id: str, context: WhatIfContext, edit: WhatIfRequest) -> WhatIfResponse:
+    state = context.scenarios.get(edit.scenarioName)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Scenario not found: {edit.scenarioName}")
+
+    _ensure_models(context)
+    total_laps = context.total_laps
+    new_state = _resolve_stints(edit, state, total_laps)
+    first_lap = _first_changed_lap(state, new_state)
+
+    # first_lap부터의 랩: lap_engine과 같은 식 (기준 + 성능 저하 x 타이어 수명 + 피트 손실)
+    laps = np.arange(first_lap, total_laps + 1)
+    end_laps = np.asarray(new_state.end_laps)
+    stint_index = np.searchsorted(end_laps, laps, side="left")
+    start_laps = np.concatenate([[1], end_laps[:-1] + 1])
+    degradation_rates = np.array(
+        [context.degradation_model.get(c, lap_engine.DEFAULT_DEGRADATION) for c in new_state.compounds]
+    )
+    is_pit = (laps == end_laps[stint_index]) & (stint_index < len(end_laps) - 1)
+    suffix = (
+        context.base_lap_time
+        + degradation_rates[stint_index] * (laps - start_laps[stint_index] + 1)
+        + is_pit * context.request.pitLossSeconds
+    )
+
+    # 바뀌지 않은 앞부분의 누적 시간에서 이어서 순차 합산 (전체 재계산과 같은 값)
+    prefix_total = state.cumulative[first_lap - 2] if first_lap > 1 else 0.0
+    suffix_cumulative = np.cumsum(np.concatenate([[prefix_total], suffix]))[1:]
+
+    new_state.lap_times = np.concatenate([state.lap_times[:first_lap - 1], suffix])
+    new_state.cumulative = np.concatenate([state.cumulative[:first_lap - 1], suffix_cumulative])
+    previous_total = float(state.cumulative[-1])
+    context.scenarios[edit.scenarioName] = new_state
+
+    result = StrategyResult.model_construct(
+        name=edit.scenarioName,
+        totalTime=float(new_state.cumulative[-1]),
+        pitLaps=new_state.end_laps[:-1],
+        lapTimes=new_state.lap_times.tolist(),
+        tireStints=[
+            TireStint.model_construct(compound=c, startLap=int(s), endLap=int(e))
+            for c, s, e in zip(new_state.compounds, start_laps, end_laps)
+        ]
+    )
+    return WhatIfResponse(
+        reportId=report_id,
+        result=result,
+        previousTotalTime=previous_total,
+        recomputedFromLap=first_lap,
+    )
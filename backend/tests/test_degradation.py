@@ -0,0 +1,27 @@
+from benchmarks.fixtures import make_lap_table
+from core import memory_cache
+from services import degradation
+
+
+def test_empty_fit_is_cached_with_default_model(monkeypatch):
+    # 모든 랩이 SC 상황이면 적합할 랩이 없음
+    laps = make_lap_table().laps.assign(TrackStatus="4")
+    calls = []
+    original = degradation.fit_degradation_table
+
+    def counting_fit(laps):
+        calls.append(1)
+        return original(laps)
+
+    monkeypatch.setattr(degradation, "fit_degradation_table", counting_fit)
+    degradation.degradation_cache.invalidate((2024, "1"))
+
+    table = degradation.get_degradation_table(2024, "1", laps)
+    assert table.fits.empty
+    assert degradation.model_for_driver(table, "D00") == degradation.DEFAULT_DEGRADATION
+
+    # 빈 적합 결과도 (negative_ttl이 아닌) 일반 항목으로 캐시되어 다시 적합하지 않아야 함
+    assert not memory_cache.is_negative(table)
+    assert degradation.get_degradation_table(2024, "1", laps) is table
+    assert len(calls) == 1
+    degradation.degradation_cache.invalidate((2024, "1"))
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from models.simulation import Scenario, StrategyResult, TireStint
+from services import lap_engine
+
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE"]
+
+
+def reference_simulate_strategy(
+    scenario: Scenario,
+    total_laps: int,
+    base_lap_time: float,
+    degradation_model: dict,
+    pit_loss_seconds: float
+) -> StrategyResult:
+    """ 배치 엔진 도입 전의 랩 단위 루프 (simulation_service._simulate_strategy 원본) """
+    lap_times_data = []
+    pit_laps = []
+    tire_stints = []
+
+    current_stint_index = 0
+    tire_life = 0
+    current_stint_start_lap = 1
+
+    for lap in range(1, total_laps + 1):
+        if current_stint_index >= len(scenario.stints):
+            current_stint_index = len(scenario.stints) - 1
+
+        stint = scenario.stints[current_stint_index]
+        compound = stint.compound
+        tire_life += 1
+
+        lap_time = base_lap_time + degradation_model.get(compound, 0.1) * tire_life
+
+        stints_count = len(scenario.stints)
+        is_pit_lap = stints_count > 1 and (lap % (total_laps // stints_count) == 0) and lap < total_laps
+
+        if is_pit_lap:
+            lap_time += pit_loss_seconds
+            pit_laps.append(lap)
+            tire_stints.append(TireStint(compound=compound, startLap=current_stint_start_lap, endLap=lap))
+            current_stint_start_lap = lap + 1
+            tire_life = 0
+            if current_stint_index < len(scenario.stints) - 1:
+                current_stint_index += 1
+
+        lap_times_data.append(lap_time)
+
+    tire_stints.append(TireStint(
+        compound=scenario.stints[current_stint_index].compound,
+        startLap=current_stint_start_lap,
+        endLap=total_laps
+    ))
+
+    return StrategyResult(
+        name=scenario.name,
+        totalTime=sum(lap_times_data),
+        pitLaps=pit_laps,
+        lapTimes=lap_times_data,
+        tireStints=tire_stints
+    )
+
+
+def random_scenarios(rng: np.random.Generator, count: int):
+    return [
+        Scenario(
+            name=f"S{i}",
+            stints=[{"compound": str(c)} for c in rng.choice(COMPOUNDS, size=int(rng.integers(1, 5)))],
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_simulate_scenarios_matches_per_lap_loop(seed):
+    rng = np.random.default_rng(seed)
+    total_laps = int(rng.integers(20, 79))
+    base_lap_time = float(rng.uniform(75.0, 100.0))
+    pit_loss_seconds = float(rng.uniform(15.0, 30.0))
+    # 모델에 없는 컴파운드(기본값 적용)도 섞이도록 일부만 포함
+    degradation_model = {c: float(rng.uniform(0.01, 0.2)) for c in COMPOUNDS[:3] if rng.random() < 0.8}
+    scenarios = random_scenarios(rng, 12)
+
+    results = lap_engine.simulate_scenarios(scenarios, total_laps, base_lap_time, degradation_model, pit_loss_seconds)
+
+    assert len(results) == len(scenarios)
+    for scenario, result in zip(scenarios, results):
+        expected = reference_simulate_strategy(scenario, total_laps, base_lap_time, degradation_model, pit_loss_seconds)
+        assert result.name == expected.name
+        assert result.pitLaps == expected.pitLaps
+        assert [s.model_dump() for s in result.tireStints] == [s.model_dump() for s in expected.tireStints]
+        np.testing.assert_allclose(result.lapTimes, expected.lapTimes, rtol=0, atol=1e-9)
+        assert result.totalTime == pytest.approx(expected.totalTime, abs=1e-6)
+
+
+def test_encode_scenarios_rejects_more_stints_than_laps():
+    scenario = Scenario(name="too many", stints=[{"compound": "SOFT"}] * 5)
+    with pytest.raises(ValueError):
+        lap_engine.encode_scenarios([scenario], total_laps=3)
@@ -0,0 +1,84 @@
+import itertools
+import numpy as np
+import pytest
+from services import lap_engine, strategy_optimizer
+
+COMPOUNDS = strategy_optimizer.DRY_COMPOUNDS
+
+
+def reference_race_time(
+    compounds: tuple,
+    pit_laps: tuple,
+    total_laps: int,
+    base_lap_time: float,
+    degradation_model: dict,
+    pit_loss_seconds: float
+) -> float:
+    """ 주어진 컴파운드 순서와 피트 랩으로 랩 단위 루프를 돌려 총 시간을 계산 """
+    total = 0.0
+    stint = 0
+    tire_life = 0
+    for lap in range(1, total_laps + 1):
+        tire_life += 1
+        total += base_lap_time + degradation_model.get(compounds[stint], lap_engine.DEFAULT_DEGRADATION) * tire_life
+        if lap in pit_laps:
+            total += pit_loss_seconds
+            stint += 1
+            tire_life = 0
+    return total
+
+
+def brute_force(total_laps, base_lap_time, degradation_model, pit_loss_seconds, max_stops):
+    """ 피트 랩 조합과 컴파운드 순서를 모두 나열하여 (두 종류 이상 사용 규정 적용) 최소 총 시간을 구함 """
+    best = None
+    for stops in range(1, max_stops + 1):
+        for pit_laps in itertools.combinations(range(1, total_laps), stops):
+            for compounds in itertools.product(COMPOUNDS, repeat=stops + 1):
+                if len(set(compounds)) < 2:
+                    continue
+                total = reference_race_time(
+                    compounds, pit_laps, total_laps, base_lap_time, degradation_model, pit_loss_seconds
+                )
+                if best is None or total < best:
+                    best = total
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_optimize_strategy_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    total_laps = int(rng.integers(2, 11))
+    max_stops = int(rng.integers(1, 4))
+    base_lap_time = float(rng.uniform(75.0, 100.0))
+    # 피트 손실을 작게 두어 여러 번 멈추는 전략도 최적이 될 수 있도록 함
+    pit_loss_seconds = float(rng.uniform(0.0, 3.0))
+    # 모델에 없는 컴파운드(기본값 적용)도 섞이도록 일부만 포함
+    degradation_model = {c: float(rng.uniform(0.0, 1.5)) for c in COMPOUNDS if rng.random() < 0.8}
+
+    expected = brute_force(total_laps, base_lap_time, degradation_model, pit_loss_seconds, max_stops)
+    result = strategy_optimizer.optimize_strategy(
+        total_laps, base_lap_time, degradation_model, pit_loss_seconds, max_stops
+    )
+
+    assert result.totalTime == pytest.approx(expected, abs=1e-6)
+    assert strategy_optimizer.is_legal_strategy(result, max_stops)
+
+    # 복원한 전략(스틴트, 피트 랩)을 다시 계산해도 같은 총 시간이어야 함
+    compounds = tuple(stint.compound for stint in result.tireStints)
+    assert [stint.endLap for stint in result.tireStints[:-1]] == result.pitLaps
+    assert result.totalTime == pytest.approx(
+        reference_race_time(compounds, tuple(result.pitLaps), total_laps, base_lap_time, degradation_model, pit_loss_seconds),
+        abs=1e-6,
+    )
+
+    # 최적값 이상의 상한을 주어도 가지치기로 최적 전략을 잃지 않아야 함
+    bounded = strategy_optimizer.optimize_strategy(
+        total_laps, base_lap_time, degradation_model, pit_loss_seconds, max_stops, upper_bound=expected
+    )
+    assert bounded.totalTime == pytest.approx(expected, abs=1e-6)
+
+
+def test_optimize_strategy_requires_a_pit_stop():
+    # 피트 스톱 없이는 두 종류의 컴파운드를 쓸 수 없으므로 규정을 만족하는 전략이 없음
+    assert strategy_optimizer.optimize_strategy(10, 90.0, {}, 20.0, max_stops=0) is None
+    assert strategy_optimizer.optimize_strategy(1, 90.0, {}, 20.0, max_stops=2) is None
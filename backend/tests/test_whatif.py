@@ -0,0 +1,143 @@
+import uuid
+import numpy as np
+import pytest
+from models.simulation import Scenario, SimulationRequest, WhatIfRequest
+from services import lap_engine, whatif_service
+
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE"]
+
+
+def encode_stints(compounds, end_laps, total_laps) -> lap_engine.ScenarioBatch:
+    """ 스틴트 구성(컴파운드, 마지막 랩)을 그대로 lap_engine 배치 한 줄로 인코딩 (피트 주기 규칙 없이) """
+    laps = np.arange(1, total_laps + 1)
+    end_laps = np.asarray(end_laps)
+    stint_index = np.searchsorted(end_laps, laps, side="left")
+    start_laps = np.concatenate([[1], end_laps[:-1] + 1])
+    names = list(dict.fromkeys(compounds))
+    return lap_engine.ScenarioBatch(
+        names=["reference"],
+        compounds=names,
+        compound_index=np.array([[names.index(compounds[k]) for k in stint_index]]),
+        tyre_life=(laps - start_laps[stint_index] + 1)[None, :],
+        pit_mask=((laps == end_laps[stint_index]) & (stint_index < len(end_laps) - 1))[None, :],
+    )
+
+
+def full_recompute(compounds, end_laps, total_laps, base_lap_time, degradation_model, pit_loss_seconds):
+    batch = encode_stints(compounds, end_laps, total_laps)
+    lap_times = lap_engine.compute_lap_times(batch, base_lap_time, degradation_model, pit_loss_seconds)
+    return lap_times[0], lap_engine.cumulative_times(lap_times)[0, -1]
+
+
+def random_edit(rng: np.random.Generator, name: str, state: whatif_service.ScenarioState, total_laps: int) -> WhatIfRequest:
+    """ 스틴트 수(1~4)와 컴파운드, 피트 랩을 무작위로 바꾼 수정. 일부는 endLap을 생략하여 기존 값을 이어받음 """
+    n = int(rng.integers(1, 5))
+    pit_laps = [int(lap) for lap in np.sort(rng.choice(np.arange(1, total_laps), size=n - 1, replace=False))]
+    inherited = [k < len(state.end_laps) - 1 and rng.random() < 0.3 for k in range(n - 1)]
+    resolved = [state.end_laps[k] if inherit else lap for k, (inherit, lap) in enumerate(zip(inherited, pit_laps))]
+    if any(b <= a for a, b in zip([0] + resolved, resolved + [total_laps])):
+        inherited = [False] * (n - 1)
+
+    stints = [{"compound": str(c)} for c in rng.choice(COMPOUNDS, size=n)]
+    for k, lap in enumerate(pit_laps):
+        if not inherited[k]:
+            stints[k]["endLap"] = lap
+    return WhatIfRequest(scenarioName=name, stints=stints)
+
+
+def make_context(rng: np.random.Generator):
+    total_laps = int(rng.integers(30, 79))
+    base_lap_time = float(rng.uniform(75.0, 100.0))
+    pit_loss_seconds = float(rng.uniform(15.0, 30.0))
+    degradation_model = {c: float(rng.uniform(0.01, 0.2)) for c in COMPOUNDS[:3]}
+    scenarios = [
+        Scenario(name=f"S{i}", stints=[{"compound": str(c)} for c in rng.choice(COMPOUNDS, size=int(rng.integers(1, 4)))])
+        for i in range(3)
+    ]
+    results = lap_engine.simulate_scenarios(scenarios, total_laps, base_lap_time, degradation_model, pit_loss_seconds)
+
+    request = SimulationRequest(
+        year=2024, raceId="1", driverId="D00", pitLossSeconds=pit_loss_seconds, scenarios=scenarios
+    )
+    context = whatif_service.WhatIfContext(
+        request=request,
+        total_laps=total_laps,
+        scenarios={r.name: whatif_service._state_from_result(r) for r in results},
+        base_lap_time=base_lap_time,
+        degradation_model=degradation_model,
+    )
+    return context, results
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chained_edits_match_full_recompute(seed):
+    rng = np.random.default_rng(seed)
+    context, results = make_context(rng)
+    report_id = str(uuid.uuid4())
+    previous_totals = {r.name: r.totalTime for r in results}
+
+    for _ in range(6):
+        name = str(rng.choice(list(previous_totals)))
+        previous = context.scenarios[name]
+        edit = random_edit(rng, name, previous, context.total_laps)
+        previous_lap_times = np.array(previous.lap_times, copy=True)
+        response = whatif_service._apply_edit(report_id, context, edit)
+        result = response.result
+
+        compounds = [s.compound for s in result.tireStints]
+        end_laps = [s.endLap for s in result.tireStints]
+        assert compounds == [s.compound for s in edit.stints]
+        for k, (stint, end_lap) in enumerate(zip(edit.stints[:-1], end_laps)):
+            assert end_lap == (stint.endLap if stint.endLap is not None else previous.end_laps[k])
+        assert end_laps[-1] == context.total_laps
+        assert result.pitLaps == end_laps[:-1]
+
+        lap_times, total = full_recompute(
+            compounds, end_laps, context.total_laps, context.base_lap_time,
+            context.degradation_model, context.request.pitLossSeconds,
+        )
+        np.testing.assert_allclose(result.lapTimes, lap_times, rtol=0, atol=1e-9)
+        assert result.totalTime == pytest.approx(total, abs=1e-6)
+        assert response.previousTotalTime == pytest.approx(previous_totals[name], abs=1e-6)
+        # 다시 계산한 첫 랩 이전은 직전 결과와 같아야 함
+        first = response.recomputedFromLap - 1
+        np.testing.assert_array_equal(result.lapTimes[:first], previous_lap_times[:first])
+        previous_totals[name] = result.totalTime
+
+
+def test_edit_changing_stint_count_recomputes_from_first_difference():
+    rng = np.random.default_rng(0)
+    context, _ = make_context(rng)
+    report_id = str(uuid.uuid4())
+    total_laps = context.total_laps
+
+    whatif_service._apply_edit(report_id, context, WhatIfRequest(
+        scenarioName="S0", stints=[{"compound": "MEDIUM", "endLap": 20}, {"compound": "HARD"}]
+    ))
+    before = context.scenarios["S0"].lap_times.copy()
+
+    # 첫 스틴트는 그대로 두고 스틴트를 하나 더 추가 -> 21랩부터 다시 계산
+    response = whatif_service._apply_edit(report_id, context, WhatIfRequest(
+        scenarioName="S0",
+        stints=[{"compound": "MEDIUM", "endLap": 20}, {"compound": "HARD", "endLap": 40}, {"compound": "SOFT"}],
+    ))
+    assert response.recomputedFromLap == 21
+    assert response.result.pitLaps == [20, 40]
+    np.testing.assert_array_equal(response.result.lapTimes[:20], before[:20])
+
+    lap_times, total = full_recompute(
+        ["MEDIUM", "HARD", "SOFT"], [20, 40, total_laps], total_laps, context.base_lap_time,
+        context.degradation_model, context.request.pitLossSeconds,
+    )
+    np.testing.assert_allclose(response.result.lapTimes, lap_times, rtol=0, atol=1e-9)
+    assert response.result.totalTime == pytest.approx(total, abs=1e-6)
+
+    # 다시 한 스틴트로 줄이면 1랩부터 다시 계산
+    response = whatif_service._apply_edit(report_id, context, WhatIfRequest(scenarioName="S0", stints=[{"compound": "HARD"}]))
+    assert response.result.pitLaps == []
+    lap_times, total = full_recompute(
+        ["HARD"], [total_laps], total_laps, context.base_lap_time,
+        context.degradation_model, context.request.pitLossSeconds,
+    )
+    np.testing.assert_allclose(response.result.lapTimes, lap_times, rtol=0, atol=1e-9)
+    assert response.result.totalTime == pytest.approx(total, abs=1e-6)